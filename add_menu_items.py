@@ -2,10 +2,22 @@
 """
 Simple Menu Item Entry Script for Prana Juice Bar
 This script helps you quickly add your menu items manually.
+
+Items are written to the SQLite menu catalogue (menu_catalogue.db) as soon as
+they are added, one transaction each; menu_template.json is exported from the
+catalogue for the bot setup.
+
+Usage:
+    python add_menu_items.py                                # interactive editor
+    python add_menu_items.py --import items.csv             # bulk import (CSV/JSONL/XLSX)
+    python add_menu_items.py --import items.csv --dry-run   # show the diff, change nothing
 """
 
-import json
-import os
+import argparse
+import sys
+
+from menu_catalogue import DEFAULT_CATALOGUE, MENU_TEMPLATE, MenuCatalogue, open_catalogue
+from menu_import import import_file
 
 def add_menu_item():
     """Add a single menu item"""
@@ -50,6 +62,9 @@ def add_menu_item():
     
     description = input("Descripción (opcional): ").strip()
     
+    tags_input = input("Etiquetas, separadas por comas (ej: cold, energy, detox - opcional): ").strip()
+    tags = [tag.strip().lower() for tag in tags_input.split(",") if tag.strip()]
+    
     available = input("¿Disponible? (s/n): ").strip().lower() == 's'
     
     return {
@@ -58,39 +73,22 @@ def add_menu_item():
         "category": category,
         "ingredients": ingredients,
         "description": description,
-        "available": available
+        "available": available,
+        "tags": tags
     }
 
-def load_existing_menu():
+def load_existing_menu(catalogue: MenuCatalogue):
     """Load existing menu items"""
-    menu_file = "menu_template.json"
-    if os.path.exists(menu_file):
-        with open(menu_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get("menu_items", [])
-    return []
+    return catalogue.items()
 
-def save_menu(menu_items):
-    """Save menu items to file"""
-    menu_file = "menu_template.json"
-    data = {
-        "menu_items": menu_items,
-        "categories": [
-            "Jugos Cold Pressed",
-            "Desayunos", 
-            "Almuerzos",
-            "Bake Goods",
-            "Milks",
-            "Shots",
-            "Postres",
-            "Prana Cakes"
-        ]
-    }
-    
-    with open(menu_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
-    print(f"\n✅ Menú guardado en {menu_file}")
+def save_item(catalogue: MenuCatalogue, item):
+    """Insert (or update, by name) one item in its own transaction"""
+    catalogue.add_item(item)
+
+def save_menu(catalogue: MenuCatalogue):
+    """Export the catalogue to menu_template.json for the bot setup"""
+    catalogue.export_json(MENU_TEMPLATE)
+    print(f"\n✅ Menú guardado en {MENU_TEMPLATE}")
 
 def display_menu(menu_items):
     """Display current menu items"""
@@ -112,13 +110,44 @@ def display_menu(menu_items):
         if item["ingredients"]:
             print(f"     Ingredientes: {', '.join(item['ingredients'])}")
 
+def bulk_import(path, dry_run=False):
+    """Import a whole file into the catalogue; returns the process exit code"""
+    print(f"📥 {'Simulando' if dry_run else 'Importando'} {path}...")
+    with open_catalogue(DEFAULT_CATALOGUE) as catalogue:
+        report = import_file(path, catalogue, dry_run=dry_run)
+        
+        for error in report.errors:
+            print(f"❌ Fila {error.row}: {error.message}")
+        if report.error_count > len(report.errors):
+            print(f"... y {report.error_count - len(report.errors)} errores más")
+        
+        print(f"\n📊 {report.summary()}")
+        if report.committed and (report.added or report.updated):
+            save_menu(catalogue)
+        elif report.committed:
+            print("✅ El catálogo ya estaba al día")
+        elif report.error_count:
+            print("❌ Importación cancelada: corrige los errores y vuelve a intentarlo")
+        else:
+            print("🔍 Simulación: no se guardó ningún cambio")
+    return 1 if report.error_count else 0
+
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Editor del menú de Prana Juice Bar")
+    parser.add_argument('--import', dest='import_path', help="Archivo CSV, JSONL o XLSX para importar")
+    parser.add_argument('--dry-run', action='store_true', help="Mostrar los cambios sin guardarlos")
+    args = parser.parse_args()
+    
+    if args.import_path:
+        sys.exit(bulk_import(args.import_path, dry_run=args.dry_run))
+    
     print("🥤 PRANA JUICE BAR - EDITOR DE MENÚ")
     print("="*50)
     
-    # Load existing menu
-    menu_items = load_existing_menu()
+    # Load existing menu (seeded from menu_template.json on first run)
+    catalogue = open_catalogue(DEFAULT_CATALOGUE)
+    menu_items = load_existing_menu(catalogue)
     
     while True:
         print("\n" + "="*50)
@@ -136,12 +165,13 @@ def main():
         elif choice == "2":
             new_item = add_menu_item()
             if new_item:
-                menu_items.append(new_item)
+                save_item(catalogue, new_item)
+                menu_items = load_existing_menu(catalogue)
                 print(f"\n✅ '{new_item['name']}' añadido al menú!")
         
         elif choice == "3":
             if menu_items:
-                save_menu(menu_items)
+                save_menu(catalogue)
                 print("\n🎯 Ahora puedes continuar con el setup del bot!")
                 print("Ejecuta: python whatsapp_bot_setup.py")
                 break
@@ -154,6 +184,8 @@ def main():
         
         else:
             print("\n❌ Opción inválida. Intenta de nuevo.")
+    
+    catalogue.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
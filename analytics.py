@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Conversation Analytics
+Streams the conversation logs through a generator pipeline into small,
+mergeable aggregates: intent counts, fallback rate, approximate top items and
+searches, and an hourly histogram.
+
+Progress is saved to a checkpoint, so each run only reads records written
+since the previous one.
+
+Usage:
+    python analytics.py report            # update from the checkpoint and print the report
+    python analytics.py report --json     # same, as JSON
+    python analytics.py report --rebuild  # ignore the checkpoint and rescan every log
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from conversation_log import DEFAULT_LOG_PATH
+from fast_path import normalize_message
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT = 'logs/analytics_checkpoint.json'
+
+# Intents that mean the bot did not understand the message
+FALLBACK_INTENTS = {'help'}
+
+# Intents whose message is a free-text menu search
+SEARCH_INTENTS = {'search', 'item_details'}
+
+
+class SpaceSaving:
+    """
+    Approximate top-k counter (Space-Saving algorithm) in constant memory.
+
+    Keeps at most `capacity` keys; counts of frequent keys are exact or
+    over-estimated by at most the smallest tracked count.
+    """
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+
+    def add(self, key: str, count: int = 1):
+        if key in self.counts or len(self.counts) < self.capacity:
+            self.counts[key] = self.counts.get(key, 0) + count
+            return
+        # Replace the smallest key; the newcomer inherits its count
+        smallest = min(self.counts, key=self.counts.get)
+        self.counts[key] = self.counts.pop(smallest) + count
+
+    def merge(self, other: 'SpaceSaving'):
+        for key, count in other.counts.items():
+            self.add(key, count)
+
+    def top(self, n: int = 10) -> List[Tuple[str, int]]:
+        return sorted(self.counts.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+
+    def to_dict(self) -> dict:
+        return {'capacity': self.capacity, 'counts': self.counts}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'SpaceSaving':
+        sketch = cls(data['capacity'])
+        sketch.counts = dict(data['counts'])
+        return sketch
+
+
+class Aggregates:
+    """Incremental, mergeable summary of conversation records"""
+
+    def __init__(self, item_names: Iterable[str] = (), top_capacity: int = 100):
+        self.item_names = sorted({name.lower() for name in item_names}, key=len, reverse=True)
+        self.total = 0
+        self.fallbacks = 0
+        self.latency_total_ms = 0.0
+        self.intents: Counter = Counter()
+        self.hours = [0] * 24
+        self.days: Counter = Counter()
+        self.items = SpaceSaving(top_capacity)
+        self.searches = SpaceSaving(top_capacity)
+
+    def update(self, record: dict):
+        intent = record.get('intent') or 'unknown'
+        message = normalize_message(record.get('message') or '')
+        local = time.localtime(record.get('ts', 0))
+
+        self.total += 1
+        self.intents[intent] += 1
+        if intent in FALLBACK_INTENTS:
+            self.fallbacks += 1
+        self.latency_total_ms += record.get('latency_ms') or 0.0
+        self.hours[local.tm_hour] += 1
+        self.days[time.strftime('%Y-%m-%d', local)] += 1
+
+        if intent in SEARCH_INTENTS and message:
+            self.searches.add(message)
+        for name in self.item_names:
+            if name in message:
+                self.items.add(name)
+                break
+
+    def merge(self, other: 'Aggregates'):
+        self.total += other.total
+        self.fallbacks += other.fallbacks
+        self.latency_total_ms += other.latency_total_ms
+        self.intents.update(other.intents)
+        self.hours = [a + b for a, b in zip(self.hours, other.hours)]
+        self.days.update(other.days)
+        self.items.merge(other.items)
+        self.searches.merge(other.searches)
+
+    def report(self, n: int = 10) -> dict:
+        total = max(self.total, 1)
+        return {
+            'total_messages': self.total,
+            'fallback_rate': round(self.fallbacks / total, 4),
+            'mean_latency_ms': round(self.latency_total_ms / total, 3),
+            'top_intents': self.intents.most_common(n),
+            'top_items': self.items.top(n),
+            'top_searches': self.searches.top(n),
+            'busiest_hours': sorted((h for h in range(24) if self.hours[h]), key=lambda h: -self.hours[h])[:5],
+            'hourly': self.hours,
+            'daily': dict(sorted(self.days.items())),
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            'total': self.total,
+            'fallbacks': self.fallbacks,
+            'latency_total_ms': self.latency_total_ms,
+            'intents': dict(self.intents),
+            'hours': self.hours,
+            'days': dict(self.days),
+            'items': self.items.to_dict(),
+            'searches': self.searches.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, item_names: Iterable[str] = ()) -> 'Aggregates':
+        aggregates = cls(item_names)
+        aggregates.total = data['total']
+        aggregates.fallbacks = data['fallbacks']
+        aggregates.latency_total_ms = data['latency_total_ms']
+        aggregates.intents = Counter(data['intents'])
+        aggregates.hours = list(data['hours'])
+        aggregates.days = Counter(data['days'])
+        aggregates.items = SpaceSaving.from_dict(data['items'])
+        aggregates.searches = SpaceSaving.from_dict(data['searches'])
+        return aggregates
+
+
+def parse_records(lines: Iterable[bytes]) -> Iterator[dict]:
+    """JSON-decode log lines, skipping anything malformed"""
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            yield record
+
+
+def read_segment(path: str, skip_lines: int = 0) -> Iterator[bytes]:
+    """Lines of a rotated (possibly gzipped) segment"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        for number, line in enumerate(f):
+            if number >= skip_lines:
+                yield line
+
+
+def read_active(path: str, state: dict) -> Iterator[bytes]:
+    """Complete lines appended to the active log since `state`; updates it in place"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        f.seek(state['offset'])
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # the writer is mid-batch; pick it up next time
+            state['offset'] += len(line)
+            state['lines'] += 1
+            yield line
+
+
+class LogAnalytics:
+    """Aggregates over the conversation logs, resumable from a checkpoint"""
+
+    def __init__(self, log_path: str = DEFAULT_LOG_PATH, checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT,
+                 item_names: Iterable[str] = ()):
+        self.log_path = log_path
+        self.checkpoint_path = checkpoint_path
+        self.item_names = list(item_names)
+        self._lock = threading.Lock()
+        self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        self.aggregates = Aggregates(self.item_names)
+        self.done_segments: List[str] = []
+        self.active = {'offset': 0, 'lines': 0}
+
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.aggregates = Aggregates.from_dict(data['aggregates'], self.item_names)
+            self.done_segments = data['segments']
+            self.active = data['active']
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable analytics checkpoint: {e}")
+
+    def _save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        data = {'aggregates': self.aggregates.to_dict(), 'segments': self.done_segments, 'active': self.active}
+        tmp_path = f'{self.checkpoint_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def rotated_segments(self) -> List[str]:
+        """Rotated segments of the log, oldest first"""
+        base, ext = os.path.splitext(self.log_path)
+        paths = glob.glob(f'{base}-*{ext}*')
+        return sorted(paths, key=lambda path: (os.path.getmtime(path), path))
+
+    def new_lines(self) -> Iterator[bytes]:
+        """Every log line not yet counted, in write order"""
+        new_segments = [p for p in self.rotated_segments() if os.path.basename(p) not in self.done_segments]
+
+        for index, path in enumerate(new_segments):
+            # The oldest new segment is the file that was active at the last
+            # checkpoint, so the lines already read from it are skipped
+            skip = self.active['lines'] if index == 0 else 0
+            yield from read_segment(path, skip)
+            self.done_segments.append(os.path.basename(path))
+
+        if new_segments:
+            self.active = {'offset': 0, 'lines': 0}
+        yield from read_active(self.log_path, self.active)
+
+    def refresh(self) -> int:
+        """Fold in records written since the last refresh; returns how many"""
+        with self._lock:
+            before = self.aggregates.total
+            for record in parse_records(self.new_lines()):
+                self.aggregates.update(record)
+            self._save_checkpoint()
+            return self.aggregates.total - before
+
+    def report(self, n: int = 10) -> dict:
+        with self._lock:
+            return self.aggregates.report(n)
+
+
+def load_item_names(path: str = 'bot_data/menu_items.json') -> List[str]:
+    """Menu item names used to spot items mentioned in messages"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return [item['name'] for item in json.load(f) if item.get('name')]
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Could not load menu item names: {e}")
+        return []
+
+
+def print_report(report: dict):
+    print("📊 *PRANA CONVERSATION ANALYTICS*")
+    print("=" * 50)
+    print(f"Messages: {report['total_messages']}")
+    print(f"Fallback rate: {report['fallback_rate']:.1%}")
+    print(f"Mean latency: {report['mean_latency_ms']:.2f}ms")
+
+    for title, key in (("🎯 Top intents", 'top_intents'), ("🥤 Top items", 'top_items'),
+                       ("🔍 Top searches", 'top_searches')):
+        print(f"\n{title}:")
+        for name, count in report[key]:
+            print(f"   {count:6d}  {name}")
+
+    print("\n🕒 Messages per hour:")
+    peak = max(report['hourly']) or 1
+    for hour, count in enumerate(report['hourly']):
+        print(f"   {hour:02d}:00 {'█' * round(30 * count / peak)} {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation analytics for Prana WhatsApp Bot")
+    parser.add_argument('command', choices=['report'])
+    parser.add_argument('--log', default=DEFAULT_LOG_PATH, help="Active conversation log")
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT)
+    parser.add_argument('--rebuild', action='store_true', help="Ignore the checkpoint and rescan every log")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    analytics = LogAnalytics(args.log, args.checkpoint, load_item_names())
+    added = analytics.refresh()
+    report = analytics.report(args.top)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"🔄 {added} new records read\n")
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,19 @@
 Prana Juice Bar WhatsApp Bot - Flask Web App
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, abort, request, jsonify, send_file
 from twilio.twiml.messaging_response import MessagingResponse
 from custom_whatsapp_bot import PranaWhatsAppBot
+from conversation_log import ConversationLog, DEFAULT_LOG_PATH
+from analytics import LogAnalytics, load_item_names
+from menu_admin import AdminError, MenuAdmin
+from rate_limit import ALLOW, NOTIFY, RateLimiter
+import hmac
 import logging
 import os
+import time
+from functools import lru_cache, wraps
+from typing import Tuple
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -18,7 +26,64 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# Behind nginx/Apache, let the front server send media files (X-Sendfile)
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
 bot = PranaWhatsAppBot()
+# Set CONVERSATION_LOG_PATH to an empty value to disable the log
+conversation_log_path = os.environ.get('CONVERSATION_LOG_PATH', DEFAULT_LOG_PATH)
+conversation_log = ConversationLog(conversation_log_path) if conversation_log_path else None
+analytics = LogAnalytics(conversation_log_path, item_names=load_item_names()) if conversation_log_path else None
+menu_admin = MenuAdmin(bot)
+# Per-sender token buckets (messages per minute, burst); the global limit is off unless set
+rate_limiter = RateLimiter(
+    per_minute=float(os.environ.get('RATE_LIMIT_PER_MINUTE', 20)),
+    burst=float(os.environ.get('RATE_LIMIT_BURST', 5)),
+    global_per_second=float(os.environ.get('GLOBAL_RATE_LIMIT_PER_SECOND', 0)),
+)
+RATE_LIMITED_REPLY = "⏳ Un momento, estoy respondiendo tus mensajes anteriores."
+
+def admin_required(view):
+    """Require `Authorization: Bearer $ADMIN_TOKEN`; the admin API is off without a token"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = os.environ.get('ADMIN_TOKEN', '')
+        if not token:
+            return jsonify({"error": "admin API disabled"}), 404
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode('utf-8'), f'Bearer {token}'.encode('utf-8')):
+            return jsonify({"error": "unauthorized"}), 401
+        try:
+            return view(*args, **kwargs)
+        except AdminError as e:
+            return jsonify({"error": str(e)}), e.status
+    return wrapper
+
+# Media file names are content hashes, so a cached copy never goes stale
+MEDIA_MAX_AGE = 365 * 24 * 3600
+
+@lru_cache(maxsize=512)
+def build_twiml(response_text: str, media_urls: Tuple[str, ...] = ()) -> bytes:
+    """Build the encoded TwiML body for a reply (cached for repeated replies)"""
+    resp = MessagingResponse()
+    resp.message(response_text)
+    # WhatsApp takes one image per message
+    for url in media_urls:
+        resp.message().media(url)
+    return str(resp).encode('utf-8')
+
+@lru_cache(maxsize=1)
+def build_empty_twiml() -> bytes:
+    """TwiML that sends nothing back"""
+    return str(MessagingResponse()).encode('utf-8')
+
+def media_urls(intent: str) -> Tuple[str, ...]:
+    """Public URLs of the menu photos to attach to a reply"""
+    files = bot.media_for(intent)
+    if not files:
+        return ()
+    # Twilio fetches MediaUrl from outside, so prefer the configured public URL
+    base_url = os.environ.get('PUBLIC_BASE_URL') or request.url_root
+    return tuple(f"{base_url.rstrip('/')}/media/{name}" for name in files)
 
 @app.route('/')
 def home():
@@ -39,16 +104,29 @@ def webhook():
         
         logger.info(f"📱 Message from {from_number}: {incoming_msg}")
         
-        # Process message with our bot
-        response_text = bot.process_message(from_number, incoming_msg)
+        # Shed bursts before any processing: one short reply, then nothing
+        decision = rate_limiter.check(from_number)
+        if decision != ALLOW:
+            logger.warning(f"⏳ Rate limited {from_number} ({decision})")
+            return build_twiml(RATE_LIMITED_REPLY) if decision == NOTIFY else build_empty_twiml()
         
-        # Create Twilio response
-        resp = MessagingResponse()
-        resp.message(response_text)
+        # Process message with our bot (a shared location gets the nearest store)
+        start = time.perf_counter()
+        latitude, longitude = request.values.get('Latitude'), request.values.get('Longitude')
+        if latitude and longitude:
+            response_text, intent = bot.handle_location(from_number, float(latitude), float(longitude))
+        else:
+            response_text, intent = bot.handle_message(from_number, incoming_msg)
+        latency_ms = (time.perf_counter() - start) * 1000
         
         logger.info(f"🤖 Bot response: {response_text[:100]}...")
         
-        return str(resp)
+        # Queued for the background writer, never blocks the reply
+        if conversation_log is not None:
+            conversation_log.log(from_number, incoming_msg, intent, response_text, latency_ms)
+        
+        # Create Twilio response
+        return build_twiml(response_text, media_urls(intent))
         
     except Exception as e:
         logger.error(f"❌ Error processing message: {e}")
@@ -56,6 +134,61 @@ def webhook():
         resp.message("Lo siento, hubo un error. Por favor intenta de nuevo.")
         return str(resp)
 
+@app.route('/media/<name>')
+def media(name):
+    """Menu photo variant from the media store (ETag, Range and sendfile via send_file)"""
+    path = bot.menu_media.path(name)
+    if path is None:
+        abort(404)
+    response = send_file(path, mimetype='image/jpeg', etag=name.split('.')[0],
+                         conditional=True, max_age=MEDIA_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={MEDIA_MAX_AGE}, immutable'
+    return response
+
+@app.route('/analytics')
+@admin_required
+def analytics_report():
+    """Conversation analytics, updated with the records logged since the last call"""
+    if analytics is None:
+        return jsonify({"error": "conversation log disabled"}), 404
+    analytics.refresh()
+    return jsonify(analytics.report())
+
+@app.route('/admin/items', methods=['POST'])
+@admin_required
+def admin_create_item():
+    """Add a menu item"""
+    return jsonify(menu_admin.create(request.get_json(silent=True))), 201
+
+@app.route('/admin/items/<path:name>', methods=['PUT', 'PATCH'])
+@admin_required
+def admin_update_item(name):
+    """Change some fields of a menu item (including its name)"""
+    return jsonify(menu_admin.update(name, request.get_json(silent=True)))
+
+@app.route('/admin/items/<path:name>', methods=['DELETE'])
+@admin_required
+def admin_delete_item(name):
+    """Remove a menu item"""
+    return jsonify(menu_admin.delete(name))
+
+@app.route('/admin/items/<path:name>/availability', methods=['POST'])
+@admin_required
+def admin_item_availability(name):
+    """Set availability ({"available": true/false}) or toggle it (empty body)"""
+    data = request.get_json(silent=True) or {}
+    return jsonify(menu_admin.set_available(name, data.get('available')))
+
+@app.route('/metrics')
+def metrics():
+    """Rate limiter counters in the Prometheus text format"""
+    lines = []
+    for name, value in rate_limiter.metrics().items():
+        kind = 'gauge' if name == 'active_senders' else 'counter'
+        lines.append(f"# TYPE prana_rate_limit_{name} {kind}")
+        lines.append(f"prana_rate_limit_{name} {value}")
+    return '\n'.join(lines) + '\n', 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
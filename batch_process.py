@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Batch Message Processor
+Re-runs logged messages through the bot offline: JSONL in, JSONL out.
+
+Each input line needs "user_id" and "message". Messages are sharded across
+worker processes by user, so every user's messages are handled in order by
+the same bot instance. Queues are bounded, so memory stays flat no matter
+how large the input is.
+
+Usage:
+    python batch_process.py logs/conversations.jsonl -o results.jsonl
+    cat messages.jsonl | python batch_process.py - --workers 4 --bot enhanced
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import queue
+import sys
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Items buffered per worker inbox and in the shared results queue
+DEFAULT_QUEUE_SIZE = 256
+
+# Seconds between liveness checks while waiting on a queue
+POLL_INTERVAL = 1.0
+
+
+def shard_for(user_id: str, workers: int) -> int:
+    """Stable worker index for a user (same user -> same worker)"""
+    return zlib.crc32(user_id.encode('utf-8')) % workers
+
+
+def create_bot(bot_name: str, use_ollama: bool):
+    """Build the bot a worker runs messages through"""
+    if bot_name == 'enhanced':
+        from enhanced_whatsapp_bot import EnhancedPranaWhatsAppBot
+        return EnhancedPranaWhatsAppBot(use_ollama=use_ollama)
+
+    from custom_whatsapp_bot import PranaWhatsAppBot
+    return PranaWhatsAppBot()
+
+
+def worker_main(worker_id: int, inbox, results, bot_name: str, use_ollama: bool):
+    """Process (line, user_id, message) tuples until a None sentinel arrives, then send worker_id"""
+    # The bot modules log at INFO on startup; one copy per worker is just noise
+    logging.disable(logging.INFO)
+    try:
+        bot = create_bot(bot_name, use_ollama)
+        startup_error = None
+    except Exception as e:
+        # Keep draining the inbox so the reader never blocks on a dead worker
+        bot = None
+        startup_error = f"bot failed to start: {e}"
+
+    while True:
+        task = inbox.get()
+        if task is None:
+            break
+
+        line, user_id, message = task
+        start = time.perf_counter()
+        record = {'line': line, 'user_id': user_id, 'message': message}
+        try:
+            if bot is None:
+                raise RuntimeError(startup_error)
+            record['reply'], record['intent'] = bot.handle_message(user_id, message)
+        except Exception as e:
+            record['error'] = str(e)
+        record['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        record['worker'] = worker_id
+        results.put(record)
+
+    results.put(worker_id)
+
+
+def put_while_alive(inbox, process, item) -> bool:
+    """Put into a bounded inbox, giving up if its worker has exited (False)"""
+    while True:
+        try:
+            inbox.put(item, timeout=POLL_INTERVAL)
+            return True
+        except queue.Full:
+            if not process.is_alive():
+                return False
+
+
+def write_results(results, output, processes: list, stats: dict):
+    """
+    Drain the results queue into the output file until every worker has
+    sent its worker_id or exited without sending it (killed, crashed).
+    """
+    finished = set()
+    # Exited workers get one more interval for what they sent to arrive
+    exited = set()
+    while len(finished) < len(processes):
+        try:
+            record = results.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            for worker_id, process in enumerate(processes):
+                if worker_id in finished or process.exitcode is None:
+                    continue
+                if worker_id in exited:
+                    logger.error(f"❌ Worker {worker_id} exited with code {process.exitcode}")
+                    stats['failed_workers'] += 1
+                    finished.add(worker_id)
+                exited.add(worker_id)
+            continue
+        if isinstance(record, int):
+            finished.add(record)
+            continue
+
+        output.write(json.dumps(record, ensure_ascii=False) + '\n')
+        stats['processed'] += 1
+        if 'error' in record:
+            stats['errors'] += 1
+        stats['total_ms'] += record['elapsed_ms']
+        stats['max_ms'] = max(stats['max_ms'], record['elapsed_ms'])
+
+
+def run_batch(input_file, output, workers: int = 2, bot_name: str = 'custom',
+              use_ollama: bool = False, queue_size: int = DEFAULT_QUEUE_SIZE) -> dict:
+    """
+    Stream messages from `input_file` through `workers` bot processes.
+
+    Results are written as they complete: order is preserved per user, not
+    across users. Every record carries its input line number for re-sorting.
+    """
+    ctx = mp.get_context('spawn')
+    inboxes = [ctx.Queue(maxsize=queue_size) for _ in range(workers)]
+    results = ctx.Queue(maxsize=queue_size)
+    processes = [
+        ctx.Process(target=worker_main, args=(i, inboxes[i], results, bot_name, use_ollama), daemon=True)
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    stats = {'read': 0, 'skipped': 0, 'processed': 0, 'errors': 0, 'failed_workers': 0,
+             'total_ms': 0.0, 'max_ms': 0.0}
+    writer = threading.Thread(target=write_results, args=(results, output, processes, stats))
+    writer.start()
+
+    start = time.perf_counter()
+    try:
+        for line_number, line in enumerate(input_file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                user_id, message = str(record['user_id']), str(record['message'])
+            except (ValueError, KeyError, TypeError):
+                stats['skipped'] += 1
+                continue
+
+            stats['read'] += 1
+            # Blocks while that worker's inbox is full, which keeps memory bounded
+            shard = shard_for(user_id, workers)
+            if not put_while_alive(inboxes[shard], processes[shard], (line_number, user_id, message)):
+                raise RuntimeError(f"Worker {shard} exited with code {processes[shard].exitcode}")
+    finally:
+        for inbox, process in zip(inboxes, processes):
+            put_while_alive(inbox, process, None)
+        writer.join()
+        for process in processes:
+            process.join()
+
+    stats['wall_s'] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run logged messages through the Prana bot in batch")
+    parser.add_argument('input', help="JSONL file with user_id/message records ('-' for stdin)")
+    parser.add_argument('-o', '--output', default='-', help="JSONL results file ('-' for stdout)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--bot', choices=['custom', 'enhanced'], default='custom')
+    parser.add_argument('--ollama', action='store_true', help="Let the enhanced bot call Ollama")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE)
+    args = parser.parse_args()
+
+    input_file = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+
+    try:
+        stats = run_batch(input_file, output, max(args.workers, 1), args.bot, args.ollama, args.queue_size)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output is not sys.stdout:
+            output.close()
+
+    processed = max(stats['processed'], 1)
+    print(f"✅ {stats['processed']} messages processed in {stats['wall_s']}s "
+          f"({stats['skipped']} skipped, {stats['errors']} errors)", file=sys.stderr)
+    if stats['failed_workers']:
+        print(f"❌ {stats['failed_workers']} worker(s) exited early; their messages are missing", file=sys.stderr)
+    print(f"⏱️  Per message: mean {stats['total_ms'] / processed:.2f}ms, max {stats['max_ms']:.2f}ms",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
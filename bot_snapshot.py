@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Bot Data Snapshot
+Loads every bot_data/ file together, versions the result by content hash and
+keeps the replies rendered from that data for as long as the snapshot lives
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from inventory import load_inventory
+from menu_model import MenuIndex, MenuItem, load_menu_items, load_menu_structure, load_popularity
+from reply_pages import PAGE_BREAK, Pages, segment
+from store_locator import load_stores
+
+logger = logging.getLogger(__name__)
+
+# Files a snapshot is built from; any change to them produces a new version
+SNAPSHOT_FILES = (
+    'menu_items.json',
+    'menu_knowledge_base.txt',
+    'response_templates.json',
+    'menu_structure.json',
+)
+
+# Files that may be missing (e.g. popularity.json needs the sales export)
+OPTIONAL_SNAPSHOT_FILES = (
+    'popularity.json',
+    'inventory_levels.json',
+    'recipes.json',
+    'stores.json',
+)
+
+
+class ReplyCache:
+    """
+    Replies that do not depend on the incoming message, rendered once per
+    snapshot.
+
+    A new snapshot always gets a new cache, so reloading the data is all it
+    takes to invalidate every stored reply. An item edited in place keeps the
+    cache; only the replies listing that item are discarded.
+    """
+
+    MAX_PAGED_REPLIES = 512
+
+    def __init__(self, version: str):
+        self.version = version
+        self._replies: Dict[Hashable, str] = {}
+        # Paged form of long replies; message-dependent ones (search results)
+        # land here too, so it is capped
+        self._pages: Dict[Tuple[str, int], Pages] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, render: Callable[[], str]) -> str:
+        """Return the cached reply for `key`, rendering it on first use"""
+        reply = self._replies.get(key)
+        if reply is None:
+            self.misses += 1
+            reply = self._replies[key] = render()
+        else:
+            self.hits += 1
+        return reply
+
+    def pages(self, text: str, limit: int) -> Pages:
+        """`text` split into messages of at most `limit` characters"""
+        if len(text) <= limit and PAGE_BREAK not in text:
+            return (text,)
+        key = (text, limit)
+        pages = self._pages.get(key)
+        if pages is None:
+            if len(self._pages) >= self.MAX_PAGED_REPLIES:
+                self._pages.pop(next(iter(self._pages)))
+            pages = self._pages[key] = segment(text, limit)
+        return pages
+
+    def paginate_all(self, limit: int):
+        """Split every stored reply ahead of time"""
+        for reply in list(self._replies.values()):
+            self.pages(reply, limit)
+
+    def discard(self, keys: Iterable[Hashable]):
+        """Drop some stored replies, so the next get() renders them again"""
+        for key in keys:
+            self._replies.pop(key, None)
+
+    def clear(self):
+        """Drop every stored reply (e.g. after item availability changed)"""
+        self._replies.clear()
+        self._pages.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._replies
+
+    def __len__(self) -> int:
+        return len(self._replies)
+
+
+class BotSnapshot:
+    """Immutable view of the bot data files at one point in time"""
+
+    def __init__(self, data_dir: str = 'bot_data'):
+        self.data_dir = data_dir
+        self.file_stats = self._stat_files(data_dir)
+        self.file_digests = {name: self._hash_file(data_dir, name) for name in SNAPSHOT_FILES + OPTIONAL_SNAPSHOT_FILES}
+        self.version = self._version(self.file_digests)
+
+        self.menu_items = load_menu_items(os.path.join(data_dir, 'menu_items.json'))
+        self.menu_index = MenuIndex(self.menu_items)
+        self.menu_structure = load_menu_structure(os.path.join(data_dir, 'menu_structure.json'))
+        self.popularity = load_popularity(os.path.join(data_dir, 'popularity.json'), self.menu_items)
+        self.inventory = load_inventory(self.menu_index, os.path.join(data_dir, 'inventory_levels.json'),
+                                        os.path.join(data_dir, 'recipes.json'))
+        self.stores = load_stores(os.path.join(data_dir, 'stores.json'))
+
+        with open(os.path.join(data_dir, 'menu_knowledge_base.txt'), 'r', encoding='utf-8') as f:
+            self.knowledge_base = f.read()
+
+        with open(os.path.join(data_dir, 'response_templates.json'), 'r', encoding='utf-8') as f:
+            self.templates = json.load(f)
+
+        self.replies = ReplyCache(self.version)
+
+    @staticmethod
+    def _hash_file(data_dir: str, name: str) -> Optional[str]:
+        """Content hash of one snapshot file, None for a missing optional file"""
+        path = os.path.join(data_dir, name)
+        if name in OPTIONAL_SNAPSHOT_FILES and not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    @staticmethod
+    def _version(file_digests: Dict[str, Optional[str]]) -> str:
+        digest = hashlib.sha1()
+        for name in SNAPSHOT_FILES + OPTIONAL_SNAPSHOT_FILES:
+            if file_digests[name] is not None:
+                digest.update(f'{name}:{file_digests[name]}'.encode('utf-8'))
+        return digest.hexdigest()[:12]
+
+    def apply_item_change(self, old: Optional[MenuItem], new: Optional[MenuItem]):
+        """
+        Patch the loaded data for one edited item (old=None adds, new=None
+        removes) instead of reloading every file. Call refresh_version() once
+        the edit has been written to disk.
+        """
+        if old is not None and new is not None:
+            self.menu_items[self.menu_items.index(old)] = new
+        elif old is not None:
+            self.menu_items.remove(old)
+        elif new is not None:
+            self.menu_items.append(new)
+
+        self.menu_index.replace(old, new)
+        self.inventory.replace_item(old, new)
+        self.popularity.replace(old, new)
+
+        # Same edit in menu_structure.json's category lists, keeping positions
+        if old is not None:
+            entries = self.menu_structure.get(old.category, [])
+            row = next((i for i, entry in enumerate(entries) if entry.name_lower == old.name_lower), None)
+            if row is not None:
+                if new is not None and new.category == old.category:
+                    entries[row] = new
+                    return
+                del entries[row]
+        if new is not None:
+            self.menu_structure.setdefault(new.category, []).append(new)
+
+    def refresh_version(self):
+        """
+        Re-version after this process wrote the files itself, so it does not
+        reload them. Only the files whose stats changed are hashed again, and
+        the reply cache is kept (apply_item_change callers discard the
+        replies that changed).
+        """
+        names = SNAPSHOT_FILES + OPTIONAL_SNAPSHOT_FILES
+        file_stats = self._stat_files(self.data_dir)
+        for name, before, after in zip(names, self.file_stats, file_stats):
+            if before != after:
+                self.file_digests[name] = self._hash_file(self.data_dir, name)
+        self.file_stats = file_stats
+        self.version = self.replies.version = self._version(self.file_digests)
+
+    @staticmethod
+    def _stat_files(data_dir: str) -> Tuple[Optional[Tuple[int, int]], ...]:
+        """(mtime, size) for every snapshot file, None for missing files"""
+        stats = []
+        for name in SNAPSHOT_FILES + OPTIONAL_SNAPSHOT_FILES:
+            try:
+                st = os.stat(os.path.join(data_dir, name))
+                stats.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stats.append(None)
+        return tuple(stats)
+
+    def is_stale(self) -> bool:
+        """Check whether any data file changed on disk since this snapshot was taken"""
+        return self._stat_files(self.data_dir) != self.file_stats
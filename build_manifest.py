@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Build Manifest
+Records the hashes of each bot_data/ artifact and of the inputs it was built
+from, so setup scripts only regenerate what actually changed. Every write
+goes to a temp file that is renamed into place, so a running bot never sees
+a half-written file.
+"""
+
+import hashlib
+import json
+import os
+from typing import Callable, Dict, Iterable, List, Optional
+
+DEFAULT_MANIFEST = 'bot_data/build_manifest.json'
+
+
+def hash_file(path: str) -> Optional[str]:
+    """SHA-256 of a file, None if it does not exist"""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_atomic(path: str, content: str):
+    """Write text to `path` via a temp file in the same directory + rename"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f'.{os.path.basename(path)}.{os.getpid()}.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_json_atomic(path: str, data, **kwargs):
+    """Atomic json.dump with the repo's usual formatting"""
+    kwargs.setdefault('ensure_ascii', False)
+    kwargs.setdefault('indent', 2)
+    write_atomic(path, json.dumps(data, **kwargs))
+
+
+class BuildManifest:
+    """
+    Per-artifact record of input hashes and output hash.
+
+    An artifact is stale when it is missing, was edited since it was built,
+    one of its inputs changed, or its builder's version changed.
+    """
+
+    def __init__(self, path: str = DEFAULT_MANIFEST, check: bool = False, force: bool = False):
+        self.path = path
+        self.check = check
+        self.force = force
+        self.built: List[str] = []
+        self.skipped: List[str] = []
+        self._hashes: Dict[str, Optional[str]] = {}
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.artifacts = json.load(f).get('artifacts', {})
+        except (OSError, ValueError):
+            self.artifacts = {}
+
+    def _hash(self, path: str) -> Optional[str]:
+        # Inputs like menu_template.json feed several artifacts; hash them once
+        if path not in self._hashes:
+            self._hashes[path] = hash_file(path)
+        return self._hashes[path]
+
+    def input_hashes(self, inputs: Iterable[str]) -> Dict[str, Optional[str]]:
+        return {path: self._hash(path) for path in inputs}
+
+    def is_stale(self, output: str, inputs: Iterable[str], version: str = '1') -> bool:
+        entry = self.artifacts.get(output)
+        if self.force or entry is None or entry.get('version') != version:
+            return True
+        if hash_file(output) is None or hash_file(output) != entry.get('output'):
+            return True
+        return entry.get('inputs') != self.input_hashes(inputs)
+
+    def build(self, output: str, inputs: Iterable[str], render: Callable[[], Optional[str]],
+              version: str = '1') -> bool:
+        """
+        Regenerate `output` if stale. `render` returns the file content, or
+        None to skip the artifact (e.g. no data for it). In check mode
+        nothing is written; the artifact is only listed in `built`.
+        """
+        inputs = list(inputs)
+        if not self.is_stale(output, inputs, version):
+            self.skipped.append(output)
+            return False
+        if self.check:
+            self.built.append(output)
+            return True
+
+        content = render()
+        if content is None:
+            return False
+        write_atomic(output, content)
+        self.artifacts[output] = {
+            'version': version,
+            'inputs': self.input_hashes(inputs),
+            'output': hash_file(output),
+        }
+        self.built.append(output)
+        return True
+
+    def save(self):
+        if not self.check:
+            write_json_atomic(self.path, {'artifacts': self.artifacts}, indent=2, sort_keys=True)
+
+    def summary(self) -> str:
+        verb = "Would rebuild" if self.check else "Rebuilt"
+        lines = [f"{verb} {len(self.built)} artifact(s), {len(self.skipped)} up to date"]
+        lines += [f"   🔄 {path}" for path in self.built]
+        return '\n'.join(lines)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Conversation Log
+Append-only JSONL log of every exchange (message, intent, reply, latency).
+
+Records are queued in memory and written by a background thread in batches,
+so logging never blocks the webhook. The active file is rotated by size or
+age; rotated segments are optionally gzipped. The fast path and the intent
+classifier read these files back (logs/conversations*.jsonl*).
+
+Several processes (gunicorn workers, the Flask reloader) may append to the
+same file. Writes hold a shared flock on a lock file next to the log and
+rotation holds it exclusively, so only one process rotates a segment and no
+batch lands in a segment that is being gzipped and removed.
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process is assumed
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_PATH = 'logs/conversations.jsonl'
+
+
+class ConversationLog:
+    """Buffered, rotating JSONL writer running on a daemon thread"""
+
+    def __init__(self, path: str = DEFAULT_LOG_PATH, max_bytes: int = 10 * 1024 * 1024,
+                 max_age: float = 24 * 3600, flush_interval: float = 1.0, batch_size: int = 200,
+                 queue_size: int = 10000, compress: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.compress = compress
+
+        self.dropped = 0
+        self.written = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lock_path = os.path.join(directory, '.' + os.path.basename(path) + '.lock')
+        self._lock_file = open(lock_path, 'a')
+        self._open_segment()
+
+        self._thread = threading.Thread(target=self._run, name='conversation-log', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, user_id: str, message: str, intent: str, reply: str, latency_ms: float) -> bool:
+        """
+        Queue one exchange for writing. Never blocks: if the buffer is full
+        the record is dropped and counted in `dropped`.
+        """
+        record = {
+            'ts': round(time.time(), 3),
+            'user_id': user_id,
+            'message': message,
+            'intent': intent,
+            'reply': reply,
+            'latency_ms': round(latency_ms, 3),
+        }
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Flush everything still buffered and stop the writer thread"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _open_segment(self):
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+        self._opened_at = time.monotonic()
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            stopping = self._stop.is_set()
+            try:
+                timeout = 0 if stopping else max(deadline - time.monotonic(), 0.01)
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline or stopping:
+                if batch:
+                    self._write(batch)
+                    batch = []
+                self._rotate_if_needed()
+                deadline = time.monotonic() + self.flush_interval
+
+            if stopping and self._queue.empty() and not batch:
+                break
+
+        self._file.close()
+        self._lock_file.close()
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _segment_moved(self) -> bool:
+        """True when another process rotated the file this one has open"""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except OSError:
+            return True
+
+    def _write(self, batch):
+        data = ''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n' for record in batch)
+        with self._locked(exclusive=False):
+            if self._segment_moved():
+                self._file.close()
+                self._open_segment()
+            try:
+                self._file.write(data)
+                self._file.flush()
+            except OSError as e:
+                logger.error(f"❌ Could not write conversation log: {e}")
+                return
+            # Other processes append to the same segment too
+            self._size = self._file.tell()
+        self.written += len(batch)
+
+    def _rotate_if_needed(self):
+        too_big = self._size >= self.max_bytes
+        too_old = self._size > 0 and time.monotonic() - self._opened_at >= self.max_age
+        if not (too_big or too_old):
+            return
+
+        with self._locked(exclusive=True):
+            if self._segment_moved():
+                # Another process already rotated this segment
+                self._file.close()
+                self._open_segment()
+                return
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        base, ext = os.path.splitext(self.path)
+        rotated = f"{base}-{time.strftime('%Y%m%d-%H%M%S')}{ext}"
+        suffix = 1
+        while os.path.exists(rotated) or os.path.exists(rotated + '.gz'):
+            rotated = f"{base}-{time.strftime('%Y%m%d-%H%M%S')}-{suffix}{ext}"
+            suffix += 1
+
+        try:
+            os.replace(self.path, rotated)
+            if self.compress:
+                with open(rotated, 'rb') as src, gzip.open(rotated + '.gz', 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(rotated)
+        except OSError as e:
+            logger.error(f"❌ Could not rotate conversation log: {e}")
+
+        self._open_segment()
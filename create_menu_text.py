@@ -1,31 +1,39 @@
 #!/usr/bin/env python3
 """
 Convert JSON menu data to text format for Botpress Knowledge Base
+
+Usage:
+    python create_menu_text.py            # rebuild if menu_template.json changed
+    python create_menu_text.py --check    # only report whether it would be rebuilt
+    python create_menu_text.py --force    # rebuild even if up to date
 """
 
+import argparse
 import json
 import os
+import sys
 
-def create_menu_text_file():
-    """Create a text file with all menu items for Botpress Knowledge Base"""
-    
-    # Load menu data
-    menu_file = "menu_template.json"
-    if not os.path.exists(menu_file):
-        print("❌ menu_template.json not found. Please run add_menu_items.py first.")
-        return
-    
-    with open(menu_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        menu_items = data.get("menu_items", [])
-    
-    # Group items by category
+from build_manifest import BuildManifest, DEFAULT_MANIFEST
+
+MENU_FILE = "menu_template.json"
+OUTPUT_FILE = "bot_data/menu_knowledge_base.txt"
+
+# Bump when the text layout below changes so the file is rebuilt
+TEXT_VERSION = '1'
+
+def group_by_category(menu_items):
+    """Group items by category, keeping menu order"""
     categories = {}
     for item in menu_items:
         category = item.get("category", "Otros")
         if category not in categories:
             categories[category] = []
         categories[category].append(item)
+    return categories
+
+def render_menu_text(menu_items):
+    """Knowledge base text for a list of menu items"""
+    categories = group_by_category(menu_items)
     
     # Create text content
     text_content = "PRANA JUICE BAR - MENÚ COMPLETO\n\n"
@@ -96,15 +104,44 @@ Sí, tenemos jugos específicos para recuperación muscular y energía pre-entre
 Los jugos cold pressed se extraen sin generar calor, preservando más nutrientes y enzimas.
 """
     
-    # Save to file
-    output_file = "bot_data/menu_knowledge_base.txt"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(text_content)
+    return text_content
+
+def create_menu_text_file(check=False, force=False, manifest_path=DEFAULT_MANIFEST):
+    """
+    Create a text file with all menu items for Botpress Knowledge Base.
+    Skipped when menu_template.json is unchanged since the last build.
+    Returns True if the file was (or, with check, would be) rebuilt.
+    """
+    
+    if not os.path.exists(MENU_FILE):
+        print("❌ menu_template.json not found. Please run add_menu_items.py first.")
+        return False
+    
+    with open(MENU_FILE, 'r', encoding='utf-8') as f:
+        menu_items = json.load(f).get("menu_items", [])
+    
+    manifest = BuildManifest(manifest_path, check=check, force=force)
+    rebuilt = manifest.build(OUTPUT_FILE, [MENU_FILE], lambda: render_menu_text(menu_items), TEXT_VERSION)
+    manifest.save()
     
-    print(f"✅ Menu text file created: {output_file}")
+    if check:
+        print(f"🔄 {OUTPUT_FILE} would be rebuilt" if rebuilt else f"✅ {OUTPUT_FILE} is up to date")
+        return rebuilt
+    if not rebuilt:
+        print(f"✅ {OUTPUT_FILE} is up to date")
+        return False
+    
+    print(f"✅ Menu text file created: {OUTPUT_FILE}")
     print(f"📋 Total items: {len(menu_items)}")
-    print(f"📂 Categories: {len(categories)}")
+    print(f"📂 Categories: {len(group_by_category(menu_items))}")
     print("\n🎯 Now you can upload this file to Botpress Knowledge Base!")
+    return True
 
 if __name__ == "__main__":
-    create_menu_text_file() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the Botpress knowledge base text from the menu")
+    parser.add_argument('--check', action='store_true', help="Report whether the file would be rebuilt, write nothing")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the menu is unchanged")
+    args = parser.parse_args()
+    
+    rebuilt = create_menu_text_file(check=args.check, force=args.force)
+    sys.exit(1 if args.check and rebuilt else 0) 
\ No newline at end of file
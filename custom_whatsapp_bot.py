@@ -7,46 +7,249 @@ A custom WhatsApp bot using existing knowledge base and menu data
 import json
 import re
 import random
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
-from datetime import datetime
+import time
+from functools import partial
+
+from bot_snapshot import BotSnapshot
+from dialogue import PRANA_FLOWS, DialogueSessions, Match, compile_flows, match
+from fast_path import build_fast_path, intent_name, mine_top_messages, normalize_message, refresh_fast_path, router_phrases
+from menu_catalogue import DEFAULT_CATALOGUE, CatalogueReader
+from menu_media import MenuMedia
+from menu_model import MenuItem
+from order_cart import MAX_QUANTITY, QUANTITY_START_RE, Cart, OrderExtractor, OrderLine, fold
+from reply_pages import CHANNEL_LIMITS, DEFAULT_CHANNEL, MORE_WORDS, PAGE_BREAK, PageCursors
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class PranaWhatsAppBot:
+    # Seconds between checks of bot_data/ for changed files
+    RELOAD_CHECK_INTERVAL = 2.0
+    
+    # "2", "opción 2", "la 2": picks from the list the user is looking at
+    NUMBER_RE = re.compile(r'^(?:(?:opci[oó]n|n[uú]mero|la|el)\s+)?(\d{1,2})$')
+    # "quiero un citrus", "me das un green day"
+    ORDER_RE = re.compile(r'\b(quiero|quisiera|pedir|ordenar|dame|me das|me da)\b')
+    
+    # Longer replies are sent in pages ("más" shows the next one)
+    MAX_MESSAGE_LENGTH = CHANNEL_LIMITS[DEFAULT_CHANNEL]
+    CATEGORY_PAGE_ITEMS = 10
+    SEARCH_PAGE_ITEMS = 5
+    
+    # Replies that also send the menu photos
+    MEDIA_INTENTS = ('menu_categories', 'full_menu')
+    
+    # Cached FAQ replies that list menu items, by handler and what they list;
+    # an item edit re-renders only the ones listing its category or its tags
+    ITEM_LIST_REPLIES = {
+        'shots': ('category', 'shots'), 'juices': ('category', 'jugos cold pressed'),
+        'smoothies': ('category', 'milks'), 'breakfast': ('category', 'desayunos'),
+        'lunch': ('category', 'almuerzos'), 'desserts': ('category', 'postres'),
+        'cold_drinks': ('tag', 'cold'), 'energy_drinks': ('tag', 'energy'), 'detox_drinks': ('tag', 'detox'),
+        'recommendations': ('popularity', None),
+    }
+    
+    # Messages the fast path leaves to the recognizers
+    FAST_PATH_SKIP_INTENTS = ('unknown',)
+    # Recognized messages whose match carries menu items
+    ITEM_INTENTS = ('search', 'item', 'order')
+    
+    GREETING_WORDS = ['hola', 'buenos dias', 'buenas', 'buenas tardes', 'buenas noches', 'hey', 'hi', 'hello', 'que tal', 'bueno dias']
+    GOODBYE_WORDS = [
+        'no', 'eso es todo', 'eso es', 'nada más', 'nada mas', 'gracias', 'hasta luego',
+        'hasta la vista', 'adiós', 'adios', 'chao', 'bye', 'goodbye', 'that\'s all',
+        'no más', 'no mas', 'ya está', 'ya esta', 'listo', 'terminado', 'mas nada'
+    ]
+    POSITIVE_WORDS = [
+        'si', 'sí', 'yes', 'claro', 'por supuesto', 'ok', 'okay', 'vale', 'bueno',
+        'perfecto', 'excelente', 'genial', 'me gustaría', 'me gustaria'
+    ]
+    MENU_WORDS = ['menu', 'menú', 'carta', 'que tienen', 'que ofrecen', 'que venden']
+    
     def __init__(self):
         """Initialize the bot with all data and knowledge base"""
         self.load_data()
         self.setup_responses()
-        self.conversation_history = {}
+        self.setup_dialogue()
+        self.warm_reply_cache()
+        self.top_messages = mine_top_messages()
+        self.build_fast_path()
+        self.sessions = DialogueSessions(self.dialogue.initial)
+        self.page_cursors = PageCursors()
         
     def load_data(self):
         """Load all bot data from files"""
         try:
-            # Load menu items
-            with open('bot_data/menu_items.json', 'r', encoding='utf-8') as f:
-                self.menu_items = json.load(f)
-            
-            # Load knowledge base
-            with open('bot_data/menu_knowledge_base.txt', 'r', encoding='utf-8') as f:
-                self.knowledge_base = f.read()
+            snapshot = BotSnapshot('bot_data')
             
-            # Load response templates
-            with open('bot_data/response_templates.json', 'r', encoding='utf-8') as f:
-                self.templates = json.load(f)
+            self.snapshot = snapshot
+            self.menu_items = snapshot.menu_items
+            self.menu_index = snapshot.menu_index
+            self.knowledge_base = snapshot.knowledge_base
+            self.templates = snapshot.templates
+            self.menu_structure = snapshot.menu_structure
+            self.popularity = snapshot.popularity
+            self.inventory = snapshot.inventory
+            self.stores = snapshot.stores
+            self.order_extractor = OrderExtractor(snapshot.menu_items)
+            self.menu_search = self.load_menu_search(snapshot)
+            self.catalogue = self.load_catalogue()
+            self.menu_media = MenuMedia()
+            self.last_reload_check = time.monotonic()
                 
-            # Load menu structure
-            with open('bot_data/menu_structure.json', 'r', encoding='utf-8') as f:
-                self.menu_structure = json.load(f)
-                
-            logger.info("✅ All bot data loaded successfully")
+            logger.info(f"✅ All bot data loaded successfully (snapshot {snapshot.version})")
             
         except Exception as e:
             logger.error(f"❌ Error loading data: {e}")
             raise
     
+    def load_menu_search(self, snapshot: BotSnapshot):
+        """Semantic search index for the snapshot's menu, or None if unavailable"""
+        try:
+            from menu_search import MenuSearchIndex
+        except ImportError:
+            logger.error("❌ numpy not installed. Semantic menu search disabled.")
+            return None
+        
+        try:
+            return MenuSearchIndex.for_snapshot(snapshot)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not build menu search index: {e}")
+            return None
+    
+    def load_catalogue(self) -> Optional[CatalogueReader]:
+        """Read-only full-text search over the menu catalogue, or None if there is none"""
+        try:
+            return CatalogueReader(DEFAULT_CATALOGUE)
+        except FileNotFoundError:
+            return None
+    
+    def media_for(self, intent: str) -> List[str]:
+        """Stored menu photo files to send along with a reply of this intent"""
+        if intent in self.MEDIA_INTENTS:
+            return self.menu_media.files()
+        return []
+    
+    def update_inventory(self, changes: Dict[str, float]) -> List[MenuItem]:
+        """Apply stock changes; replies are re-rendered only if an item's availability flipped"""
+        flipped = self.inventory.update_stock(changes)
+        if flipped:
+            logger.info(f"📦 Availability changed for: {', '.join(item.name for item in flipped)}")
+            self.snapshot.replies.clear()
+            self.warm_reply_cache()
+            # Pre-recognized search and item matches list the items in stock
+            self.build_fast_path()
+        return flipped
+    
+    def reload_if_changed(self) -> bool:
+        """Reload bot data if any file in bot_data/ changed on disk"""
+        now = time.monotonic()
+        if now - self.last_reload_check < self.RELOAD_CHECK_INTERVAL:
+            return False
+        self.last_reload_check = now
+        
+        if not self.snapshot.is_stale():
+            return False
+        
+        logger.info("🔄 Bot data changed on disk, reloading...")
+        return self.reload()
+    
+    def reload(self) -> bool:
+        """Reload every bot_data/ file now"""
+        try:
+            self.load_data()
+        except Exception:
+            # Keep serving the previous snapshot until the files are valid again
+            return False
+        # Store name patterns come from stores.json
+        self.setup_responses()
+        self.warm_reply_cache()
+        self.build_fast_path()
+        return True
+    
+    def apply_menu_change(self, old: Optional[MenuItem], new: Optional[MenuItem]):
+        """
+        Patch the indexes for one item edited through the admin API (old=None
+        adds, new=None removes), after the files were rewritten on disk
+        """
+        items = [item for item in (old, new) if item is not None]
+        stale_replies = self.item_reply_keys(items)
+        
+        self.snapshot.apply_item_change(old, new)
+        self.snapshot.refresh_version()
+        if self.menu_search:
+            self.menu_search.replace(old, new)
+        if not self.order_extractor.replace(old, new):
+            self.order_extractor = OrderExtractor(self.menu_items)
+        
+        # Only the replies and fast path entries that can list these items
+        self.snapshot.replies.discard(stale_replies)
+        self.warm_reply_cache()
+        self.fast_path = refresh_fast_path(self.fast_path, self.dialogue.recognize, self.fast_path_phrases(items),
+                                           skip_intents=self.FAST_PATH_SKIP_INTENTS)
+        logger.info(f"✏️ Menu updated in place (snapshot {self.snapshot.version})")
+    
+    def item_reply_keys(self, items: List[MenuItem]) -> list:
+        """Reply cache keys of the message-independent replies that list any of `items`"""
+        lists = {('category', item.category_id) for item in items}
+        lists.update(('tag', tag) for item in items for tag in item.tags)
+        if any(item.name_lower in self.popularity.rank for item in items):
+            lists.add(('popularity', None))
+        
+        keys = [pattern for pattern, handler in self.qa_patterns.items()
+                if self.ITEM_LIST_REPLIES.get(intent_name(handler)) in lists]
+        keys += [('category', category) for category in self.categories if ('category', category) in lists]
+        # An edit can add a category or empty one
+        keys.append('menu_categories')
+        return [(key, True) for key in keys]
+    
+    def fast_path_phrases(self, items: List[MenuItem]) -> List[str]:
+        """
+        Fast path phrases whose recognized match could change with `items`:
+        the ones sharing a word with them, and every search, item and order match
+        """
+        text = fold(' '.join(
+            ' '.join((item.name_lower, item.ingredients_lower, item.description.lower(), item.category_id)
+                     + item.tags + item.aliases)
+            for item in items))
+        item_words = {word for word in re.findall(r'\w+', text) if len(word) >= 4}
+        
+        phrases = [key for key, found in self.fast_path.items() if found.intent in self.ITEM_INTENTS]
+        for phrase in router_phrases(self) + self.top_messages:
+            words = fold(normalize_message(phrase))
+            # Search falls back to substrings of item names and ingredients
+            if any(word in text for word in words.split()) or any(word in words for word in item_words):
+                phrases.append(phrase)
+        return phrases
+    
+    def cached_reply(self, key, handler, follow_up: bool = True) -> str:
+        """Serve a reply that does not depend on the message from the snapshot cache"""
+        if follow_up:
+            return self.snapshot.replies.get((key, True), lambda: self.add_follow_up_question(handler()))
+        return self.snapshot.replies.get((key, False), handler)
+    
+    def warm_reply_cache(self):
+        """Render every message-independent reply for the current snapshot"""
+        for pattern, handler in self.qa_patterns.items():
+            self.cached_reply(pattern, handler)
+        for category in self.categories:
+            self.cached_reply(('category', category), lambda category=category: self.get_items_by_category(category))
+        self.cached_reply('welcome', self.get_welcome_message, follow_up=False)
+        self.cached_reply('positive', self.get_positive_message, follow_up=False)
+        self.cached_reply('goodbye', self.get_goodbye_message, follow_up=False)
+        self.cached_reply('menu_categories', self.get_menu_categories)
+        self.cached_reply('help', self.get_help_message)
+        self.snapshot.replies.paginate_all(self.MAX_MESSAGE_LENGTH)
+    
+    def build_fast_path(self):
+        """Pre-recognize router phrases and the most frequent logged messages"""
+        self.fast_path = build_fast_path(self.dialogue.recognize, router_phrases(self) + self.top_messages,
+                                         skip_intents=self.FAST_PATH_SKIP_INTENTS)
+        logger.info(f"⚡ Fast path ready with {len(self.fast_path)} exact messages")
+    
     def setup_responses(self):
         """Setup response patterns and categories"""
         self.categories = {
@@ -74,10 +277,11 @@ class PranaWhatsAppBot:
             r'detox|limpiar|desintoxicar': self.get_detox_drinks,
             r'precio|cuanto.*cuesta|costo': self.get_prices,
             r'(hora|horario|horarios|cierran|abren|cierre|apertura)': self.get_hours,
-            # Location patterns - specific locations first
-            r'(prana.*castellana|castellana|ubicacion.*castellana|donde.*castellana)': lambda: self.get_specific_location('castellana'),
-            r'(prana.*palos.*grandes|palos.*grandes|ubicacion.*palos.*grandes|donde.*palos.*grandes)': lambda: self.get_specific_location('palos_grandes'),
-            r'(castellana|palos.*grandes)': lambda: self.get_specific_location('castellana'),
+            # Location patterns - specific stores (names from stores.json) first
+            **{
+                '(' + '|'.join(map(re.escape, store.aliases)) + ')': partial(self.get_specific_location, store.id)
+                for store in self.stores.stores if store.aliases
+            },
             # General location patterns
             r'direccion|ubicacion|donde.*estan': self.get_location,
             r'menu.*completo|todo.*menu': self.get_full_menu,
@@ -94,94 +298,210 @@ class PranaWhatsAppBot:
             r'(sed|tomar|bebida|bebidas|algo.*tomar|quiero.*tomar)': self.get_drink_suggestions,
             r'(gripe|resfriado|enfermo|enferma|malestar|dolor|dolor de cabeza|dolor de estomago|dolor de estómago|nausea|vomito|vómito)': self.get_health_recommendations
         }
+        
+        # Compiled once; each FAQ match serves its reply from the snapshot cache
+        self.qa_matches = [
+            (re.compile(pattern, re.IGNORECASE),
+             match(intent_name(handler), partial(self.cached_reply, pattern, handler), kind='faq'))
+            for pattern, handler in self.qa_patterns.items()
+        ]
+    
+    def setup_dialogue(self):
+        """Compile the conversation flows (dialogue.PRANA_FLOWS) into per-state transition tables"""
+        recognizers = {
+            'cart': self.recognize_cart,
+            'faq': self.recognize_faq,
+            'order': self.recognize_order,
+            'positive': lambda message: match('positive') if self.is_positive_response(message) else None,
+            'goodbye': lambda message: match('goodbye') if self.is_goodbye(message) else None,
+            'greeting': lambda message: match('greeting') if self.is_greeting(message) else None,
+            'menu': lambda message: match('menu') if self.is_menu_request(message) else None,
+            'number': self.recognize_number,
+            'category': self.recognize_category,
+            'search': self.recognize_search,
+            'item': self.recognize_item,
+        }
+        actions = {
+            'faq': lambda reply, context: (reply(), None),
+            'welcome': self.static_action('welcome', self.get_welcome_message, follow_up=False),
+            'positive': self.static_action('positive', self.get_positive_message, follow_up=False),
+            'goodbye': self.static_action('goodbye', self.get_goodbye_message, follow_up=False),
+            'menu_categories': self.static_action('menu_categories', self.get_menu_categories),
+            'help': self.static_action('help', self.get_help_message),
+            'category': self.show_category,
+            'category_number': self.show_category_number,
+            'search': lambda found, context: (self.add_follow_up_question(found[0]), found[1]),
+            'list_item': self.show_list_item,
+            'item_details': lambda item, context: (self.add_follow_up_question(self.format_item_details(item)),
+                                                   item.name_lower),
+            'order_start': lambda lines, context: self.update_cart(lines, None),
+            'order_add': self.update_cart,
+            'order_confirm': self.confirm_order,
+            'order_cancel': self.cancel_order,
+            'store_number': self.show_store_number,
+        }
+        self.dialogue = compile_flows(PRANA_FLOWS, recognizers, actions)
+        logger.info(f"🗺️ Dialogue compiled: {len(self.dialogue.states)} states")
     
     def process_message(self, user_id: str, message: str) -> str:
         """Process incoming message and return appropriate response"""
+        return self.handle_message(user_id, message)[0]
+    
+    def handle_message(self, user_id: str, message: str) -> Tuple[str, str]:
+        """Process incoming message and return (response, intent)"""
         message = message.lower().strip()
         
-        # Store in conversation history
-        if user_id not in self.conversation_history:
-            self.conversation_history[user_id] = []
-        self.conversation_history[user_id].append({
-            'message': message,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        # Check for QA patterns (FAQ: hours, location, etc.) FIRST - even for first messages
-        for pattern, handler in self.qa_patterns.items():
-            if re.search(pattern, message, re.IGNORECASE):
-                response = handler()
-                return self.add_follow_up_question(response)
-        
-        # Always start with greeting for new conversations (if not a QA pattern)
-        if len(self.conversation_history[user_id]) <= 1:
-            return self.get_welcome_message()
-        
-        # Check for positive responses (yes, si, claro, etc.)
-        if self.is_positive_response(message):
-            return "¡Perfecto! ¿En qué puedo ayudarte? Puedes preguntarme por nuestro menú, horarios, precios, o cualquier cosa que necesites."
-        
-        # Check for goodbye/farewell messages
-        if self.is_goodbye(message):
-            return self.get_goodbye_message()
-        
-        # Check for greetings (for returning users)
-        if self.is_greeting(message):
-            return self.get_welcome_message()
-        
-        # Check for menu requests
-        if self.is_menu_request(message):
-            response = self.get_menu_categories()
-            return self.add_follow_up_question(response)
-        
-        # Check for specific category requests
-        category_response = self.get_category_items(message)
-        if category_response:
-            return self.add_follow_up_question(category_response)
-        
-        # Check for specific item searches
-        item_response = self.search_menu_items(message)
-        if item_response:
-            return self.add_follow_up_question(item_response)
-        
-        # Check for specific item details
-        item_detail = self.get_item_details(message)
-        if item_detail:
-            return self.add_follow_up_question(item_detail)
-        
-        # Default response
-        response = self.get_help_message()
-        return self.add_follow_up_question(response)
+        # "más" continues the user's last paged reply
+        if message in MORE_WORDS:
+            page = self.page_cursors.next(user_id)
+            if page is not None:
+                return page, 'more'
+        
+        response, intent = self.respond(user_id, message)
+        pages = self.snapshot.replies.pages(response, self.MAX_MESSAGE_LENGTH)
+        return self.page_cursors.start(user_id, pages), intent
+    
+    def respond(self, user_id: str, message: str) -> Tuple[str, str]:
+        """Full (unpaged) reply and intent for a normalized message"""
+        self.reload_if_changed()
+        
+        state, context = self.sessions.get(user_id)
+        found = self.classify(message)
+        reply, action, state, context = self.dialogue.step(state, context, found)
+        self.sessions.set(user_id, state, context)
+        
+        # FAQ replies are labelled by their handler (hours, location, ...)
+        return reply, found.intent if action == 'faq' else action
+    
+    def classify(self, message: str) -> Match:
+        """What a normalized message asks for, independent of the conversation state"""
+        # Exact matches for the most frequent messages skip the recognizers
+        found = self.fast_path.get(message)
+        return found if found is not None else self.dialogue.recognize(message)
+    
+    def recognize_faq(self, message: str) -> Optional[Match]:
+        for regex, found in self.qa_matches:
+            if regex.search(message):
+                return found
+        return None
+    
+    def recognize_cart(self, message: str) -> Optional[Match]:
+        """Messages that open with a quantity of an item ("2 citrus y un ginger shot")"""
+        if not QUANTITY_START_RE.match(fold(message)):
+            return None
+        lines = self.order_extractor.extract(message)
+        return match('order', lines) if lines and lines[0].explicit else None
+    
+    def recognize_order(self, message: str) -> Optional[Match]:
+        """Items asked for with an order verb ("quiero un citrus", "me das 2 n4")"""
+        if not self.ORDER_RE.search(message):
+            return None
+        lines = self.order_extractor.extract(message)
+        return match('order', lines) if lines else None
+    
+    def recognize_number(self, message: str) -> Optional[Match]:
+        number = self.NUMBER_RE.match(message)
+        return match('number', int(number.group(1))) if number else None
+    
+    def recognize_category(self, message: str) -> Optional[Match]:
+        category = self.match_category(message)
+        return match('category', category) if category else None
+    
+    def recognize_search(self, message: str) -> Optional[Match]:
+        items = self.find_menu_items(message)
+        if not items:
+            return None
+        return match('search', (self.format_search_results(items), tuple(item.name_lower for item in items)))
+    
+    def recognize_item(self, message: str) -> Optional[Match]:
+        item = self.find_item(message)
+        return match('item', item) if item else None
+    
+    def static_action(self, key: str, handler, follow_up: bool = True):
+        """Dialogue action serving a message-independent reply from the snapshot cache"""
+        return lambda slot, context: (self.cached_reply(key, handler, follow_up), None)
+    
+    def show_category(self, category: str, context=None):
+        reply = self.cached_reply(('category', category), partial(self.get_items_by_category, category))
+        # The listed items, so "2" can pick one of them next
+        return reply, tuple(item.name_lower for item in self.inventory.category(category))
+    
+    def show_category_number(self, number: int, context=None):
+        """Number typed after the category list (the same order as get_menu_categories)"""
+        categories = list(self.menu_structure)
+        if not 1 <= number <= len(categories):
+            return None
+        return self.show_category(categories[number - 1].lower())
+    
+    def show_list_item(self, number: int, names: Optional[Tuple[str, ...]]):
+        """Number typed while a category or search result list is open"""
+        if not names or not 1 <= number <= len(names):
+            return None
+        item = self.menu_index.by_name.get(names[number - 1])
+        if item is None:
+            return None
+        return self.add_follow_up_question(self.format_item_details(item)), names
+    
+    def update_cart(self, lines: List[OrderLine], cart: Optional[Cart]):
+        """Add the available items of an order message to the cart and show its summary"""
+        available = [line for line in lines if self.inventory.is_available(line.item)]
+        response = ''.join(f"😔 *{line.item.name.upper()}* está agotado por hoy.\n\n"
+                           for line in lines if line not in available)
+        cart = cart or Cart()
+        response += ''.join(f"⚠️ Puedo anotar hasta {MAX_QUANTITY} *{item.name.upper()}* por pedido.\n\n"
+                            for item in cart.over_limit(available))
+        cart = cart.add(available)
+        if not cart.lines:
+            return response + "¿Te gustaría ver otra opción? Escribe 'menu' para ver categorías.", None
+        response += cart.summary(self.menu_index.by_name)
+        response += "\n\n¿Confirmas tu pedido? (si/no)\nTambién puedes añadir más productos."
+        return response, cart
+    
+    def confirm_order(self, slot, cart: Optional[Cart]):
+        if not cart:
+            return None
+        confirmation = self.templates['order_confirmation']
+        return f"✅ {confirmation[0]}\n\n{cart.summary(self.menu_index.by_name)}\n\n" \
+               + "\n".join(confirmation[1:]), None
+    
+    def cancel_order(self, slot, cart: Optional[Cart]):
+        if not cart:
+            return None
+        return "👌 Pedido cancelado. ¿Hay algo más en lo que pueda ayudarte?", None
+    
+    def show_store_number(self, number: int, context=None):
+        """Number typed after the list of locations (stores.json order)"""
+        stores = self.stores.stores
+        if not 1 <= number <= len(stores):
+            return None
+        return self.add_follow_up_question(self.stores.replies[stores[number - 1].id]), None
     
     def is_goodbye(self, message: str) -> bool:
         """Check if message is a goodbye/farewell"""
-        goodbye_words = [
-            'no', 'eso es todo', 'eso es', 'nada más', 'nada mas', 'gracias', 'hasta luego',
-            'hasta la vista', 'adiós', 'adios', 'chao', 'bye', 'goodbye', 'that\'s all',
-            'no más', 'no mas', 'ya está', 'ya esta', 'listo', 'terminado', 'mas nada'
-        ]
         # Use word boundaries to avoid partial matches
         message_words = message.split()
-        return any(word in message_words for word in goodbye_words)
+        return any(word in message_words for word in self.GOODBYE_WORDS)
     
     def add_follow_up_question(self, response: str) -> str:
         """Add follow-up question to any response"""
         follow_up = "\n\n¿Hay algo más en lo que pueda ayudarte?"
         return response + follow_up
     
+    def get_positive_message(self) -> str:
+        """Get reply for positive responses (yes, si, claro, etc.)"""
+        return "¡Perfecto! ¿En qué puedo ayudarte? Puedes preguntarme por nuestro menú, horarios, precios, o cualquier cosa que necesites."
+    
     def get_goodbye_message(self) -> str:
         """Get goodbye message"""
         return "¡Gracias por visitar Prana Juice Bar! 🌿\n\n¡Esperamos verte pronto! ¡Que tengas un día saludable! 🥤"
     
     def is_greeting(self, message: str) -> bool:
         """Check if message is a greeting"""
-        greetings = ['hola', 'buenos dias', 'buenas', 'buenas tardes', 'buenas noches', 'hey', 'hi', 'hello', 'que tal', 'bueno dias']
-        return any(greeting in message for greeting in greetings)
+        return any(greeting in message for greeting in self.GREETING_WORDS)
     
     def is_menu_request(self, message: str) -> bool:
         """Check if user is asking for menu"""
-        menu_words = ['menu', 'carta', 'que tienen', 'que ofrecen', 'que venden']
-        return any(word in message for word in menu_words)
+        return any(word in message for word in self.MENU_WORDS)
     
     def get_welcome_message(self) -> str:
         """Get personalized welcome message with website link"""
@@ -224,269 +544,199 @@ class PranaWhatsAppBot:
     
     def get_category_items(self, message: str) -> Optional[str]:
         """Get items from a specific category"""
+        category = self.match_category(message)
+        if category:
+            return self.get_items_by_category(category)
+        return None
+    
+    def match_category(self, message: str) -> Optional[str]:
+        """Find the category a message asks for, if any"""
         message_lower = message.lower().strip()
         
-        # Check for number inputs (1-9)
-        number_mapping = {
-            '1': 'jugos cold pressed',
-            '2': 'shots', 
-            '3': 'desayunos',
-            '4': 'almuerzos',
-            '5': 'bake goods',
-            '6': 'postres',
-            '7': 'prana cakes',
-            '8': 'milks',
-            '9': 'extras'
-        }
-        
-        # Check if user typed a number
-        for number, category in number_mapping.items():
-            if number in message_lower:
-                return self.get_items_by_category(category)
-        
+        # Numbers are handled by the dialogue state (see show_category_number)
         # Check for exact category matches first (case insensitive)
         for category, keywords in self.categories.items():
             # Check if the message contains the category name
             if category.lower() in message_lower:
-                return self.get_items_by_category(category)
+                return category
             
             # Check for keyword matches
             if any(keyword.lower() in message_lower for keyword in keywords):
-                return self.get_items_by_category(category)
+                return category
         
         # Special handling for common variations
         if 'milk' in message_lower or 'milks' in message_lower or 'leche' in message_lower:
-            return self.get_items_by_category('milks')
+            return 'milks'
         
         if 'extra' in message_lower or 'extras' in message_lower or 'topping' in message_lower:
-            return self.get_items_by_category('extras')
+            return 'extras'
             
         return None
     
     def get_items_by_category(self, category: str) -> str:
         """Get all items from a category"""
-        # Normalize category name for comparison
-        category_lower = category.lower()
-        
-        items = []
-        for item in self.menu_items:
-            item_category = item.get('category', '').lower()
-            if item_category == category_lower:
-                items.append(item)
+        items = self.inventory.category(category)
         
         if not items:
             return f"No encontré items en la categoría '{category}'. ¿Podrías ser más específico?"
         
         response = f"🍽️ *{category.upper()}*\n\n"
         
-        for item in items[:10]:  # Limit to 10 items
-            price = item.get('price', 'N/A')
-            name = item.get('name', 'Sin nombre')
-            response += f"✅ {name} - ${price}\n"
+        for i, item in enumerate(items):
+            if i and i % self.CATEGORY_PAGE_ITEMS == 0:
+                response += PAGE_BREAK
+            response += f"{item.list_line}\n"
         
-        if len(items) > 10:
-            response += f"\n... y {len(items) - 10} más. ¿Te interesa algún item específico?"
+        if len(items) > self.CATEGORY_PAGE_ITEMS:
+            response += "\n¿Te interesa algún item específico?"
         
         return response
     
     def search_menu_items(self, message: str) -> Optional[str]:
         """Search for specific menu items"""
-        found_items = []
-        
-        for item in self.menu_items:
-            name = item.get('name', '').lower()
-            ingredients = item.get('ingredients', [])
-            
-            # Handle ingredients as list or string
-            if isinstance(ingredients, list):
-                ingredients_text = ', '.join(ingredients).lower()
-            else:
-                ingredients_text = str(ingredients).lower()
-            
-            if any(word in name or word in ingredients_text for word in message.split()):
-                found_items.append(item)
-        
-        if found_items:
-            response = "🔍 *ITEMS ENCONTRADOS:*\n\n"
-            for item in found_items[:5]:  # Limit to 5 results
-                name = item.get('name', 'Sin nombre')
-                price = item.get('price', 'N/A')
-                category = item.get('category', 'Sin categoría')
-                response += f"✅ {name} - ${price} ({category})\n"
-            
-            if len(found_items) > 5:
-                response += f"\n... y {len(found_items) - 5} más. ¿Cuál te interesa?"
-            
-            return response
+        found_items = self.find_menu_items(message)
+        return self.format_search_results(found_items) if found_items else None
+    
+    def find_menu_items(self, message: str) -> List[MenuItem]:
+        """Available items matching a message, best match first"""
+        # Semantic matches first ("algo ligero con frutas rojas"), then full-text, then plain substrings
+        found_items = [item for item, _ in self.menu_search.search(message)] if self.menu_search else []
+        found_items = self.inventory.filter(found_items)
+        
+        if not found_items and self.catalogue:
+            # Full-text matches from the catalogue, limited to items in this snapshot
+            found_items = self.inventory.filter(self.menu_index.named(self.catalogue.search(message)))
+        
+        if not found_items:
+            words = message.split()
+            for item in self.inventory.filter(self.menu_items):
+                name = item.name_lower
+                ingredients_text = item.ingredients_lower
+                if any(word in name or word in ingredients_text for word in words):
+                    found_items.append(item)
+            # Best sellers first (menu order when there is no sales data)
+            found_items = self.popularity.sort(found_items)
+        
+        return found_items
+    
+    def format_search_results(self, found_items: List[MenuItem]) -> str:
+        response = "🔍 *ITEMS ENCONTRADOS:*\n\n"
+        for i, item in enumerate(found_items):
+            if i and i % self.SEARCH_PAGE_ITEMS == 0:
+                response += PAGE_BREAK
+            response += f"{item.list_line} ({item.category})\n"
+        
+        if len(found_items) > self.SEARCH_PAGE_ITEMS:
+            response += "\n¿Cuál te interesa?"
         
-        return None
+        return response
     
     def get_item_details(self, message: str) -> Optional[str]:
         """Get detailed information about a specific item"""
+        item = self.find_item(message)
+        return self.format_item_details(item) if item else None
+    
+    def find_item(self, message: str) -> Optional[MenuItem]:
+        """First menu item whose name appears in the message"""
+        message_lower = message.lower()
         for item in self.menu_items:
-            name = item.get('name', '').lower()
-            if name in message.lower():
-                return self.format_item_details(item)
+            if item.name_lower in message_lower:
+                return item
         return None
     
-    def format_item_details(self, item: Dict) -> str:
+    def format_item_details(self, item: MenuItem) -> str:
         """Format item details nicely"""
-        name = item.get('name', 'Sin nombre')
-        price = item.get('price', 'N/A')
-        ingredients = item.get('ingredients', [])
-        description = item.get('description', 'Sin descripción')
-        category = item.get('category', 'Sin categoría')
-        
-        # Handle ingredients as list or string
-        if isinstance(ingredients, list):
-            ingredients_text = ', '.join(ingredients)
-        else:
-            ingredients_text = str(ingredients)
+        response = f"🍽️ *{item.name.upper()}*\n\n"
+        response += f"💰 *Precio:* {item.price_label}\n"
+        response += f"📂 *Categoría:* {item.category}\n"
+        response += f"🥗 *Ingredientes:* {item.ingredients_text}\n"
         
-        response = f"🍽️ *{name.upper()}*\n\n"
-        response += f"💰 *Precio:* ${price}\n"
-        response += f"📂 *Categoría:* {category}\n"
-        response += f"🥗 *Ingredientes:* {ingredients_text}\n"
-        
-        if description and description != 'Sin descripción':
-            response += f"📝 *Descripción:* {description}\n"
+        if item.description and item.description != 'Sin descripción':
+            response += f"📝 *Descripción:* {item.description}\n"
         
         return response
     
     # Specific response handlers
     def get_shots(self) -> str:
         """Get all shots"""
-        shots = [item for item in self.menu_items if 'shot' in item.get('category', '').lower()]
+        shots = self.inventory.category('shots')
         response = "💉 *NUESTROS SHOTS:*\n\n"
         
         for shot in shots:
-            name = shot.get('name', 'Sin nombre')
-            price = shot.get('price', 'N/A')
-            ingredients = shot.get('ingredients', [])
-            
-            # Handle ingredients as list or string
-            if isinstance(ingredients, list):
-                ingredients_text = ', '.join(ingredients)
-            else:
-                ingredients_text = str(ingredients)
-            
-            response += f"✅ {name} - ${price}\n"
-            if ingredients_text:
-                response += f"   🥗 {ingredients_text}\n"
+            response += f"{shot.list_line}\n"
+            if shot.ingredients_text:
+                response += f"   🥗 {shot.ingredients_text}\n"
             response += "\n"
         
         return response
     
     def get_juices(self) -> str:
         """Get all juices"""
-        juices = [item for item in self.menu_items if 'jugos cold pressed' in item.get('category', '').lower()]
+        juices = self.inventory.category('jugos cold pressed')
         response = "🥤 *NUESTROS JUGOS:*\n\n"
         
         for juice in juices:
-            name = juice.get('name', 'Sin nombre')
-            price = juice.get('price', 'N/A')
-            response += f"✅ {name} - ${price}\n"
+            response += f"{juice.list_line}\n"
         
         return response
     
     def get_smoothies(self) -> str:
         """Get all smoothies"""
-        smoothies = [item for item in self.menu_items if 'milks' in item.get('category', '').lower()]
+        smoothies = self.inventory.category('milks')
         response = "🥛 *NUESTROS BATIDOS:*\n\n"
         
         for smoothie in smoothies:
-            name = smoothie.get('name', 'Sin nombre')
-            price = smoothie.get('price', 'N/A')
-            response += f"✅ {name} - ${price}\n"
+            response += f"{smoothie.list_line}\n"
         
         return response
     
     def get_breakfast(self) -> str:
         """Get breakfast items"""
-        breakfast = [item for item in self.menu_items if 'desayuno' in item.get('category', '').lower()]
+        breakfast = self.inventory.category('desayunos')
         response = "🌅 *NUESTROS DESAYUNOS:*\n\n"
         
         for item in breakfast:
-            name = item.get('name', 'Sin nombre')
-            price = item.get('price', 'N/A')
-            response += f"✅ {name} - ${price}\n"
+            response += f"{item.list_line}\n"
         
         return response
     
     def get_lunch(self) -> str:
         """Get lunch items"""
-        lunch = [item for item in self.menu_items if 'almuerzo' in item.get('category', '').lower()]
+        lunch = self.inventory.category('almuerzos')
         response = "🍽️ *NUESTROS ALMUERZOS:*\n\n"
         
         for item in lunch:
-            name = item.get('name', 'Sin nombre')
-            price = item.get('price', 'N/A')
-            response += f"✅ {name} - ${price}\n"
+            response += f"{item.list_line}\n"
         
         return response
     
     def get_desserts(self) -> str:
         """Get dessert items"""
-        desserts = [item for item in self.menu_items if 'postre' in item.get('category', '').lower()]
+        desserts = self.inventory.category('postres')
         response = "🍰 *NUESTROS POSTRES:*\n\n"
         
         for dessert in desserts:
-            name = dessert.get('name', 'Sin nombre')
-            price = dessert.get('price', 'N/A')
-            response += f"✅ {name} - ${price}\n"
+            response += f"{dessert.list_line}\n"
         
         return response
     
     def get_cold_drinks(self) -> str:
         """Get cold/refreshing drinks"""
-        cold_drinks = [
-            'citrus', 'cool melon', 'pina blizz', 'n4', 'green day', 'ez-green',
-            'red roots', 'dalai lama', 'jugo de zanahoria', 'jugo celery'
-        ]
-        
-        response = "🥤 *BEBIDAS REFRESCANTES:*\n\n"
-        for drink_name in cold_drinks:
-            for item in self.menu_items:
-                if drink_name.lower() in item.get('name', '').lower():
-                    name = item.get('name', 'Sin nombre')
-                    price = item.get('price', 'N/A')
-                    response += f"✅ {name} - ${price}\n"
-                    break
-        
-        return response
+        return self.get_items_by_tag('cold', "🥤 *BEBIDAS REFRESCANTES:*\n\n")
     
     def get_energy_drinks(self) -> str:
         """Get energy drinks"""
-        energy_drinks = [
-            'flu shot', 'ginger shot', 'power maca', 'orange baby',
-            'pina blizz', 'green day', 'red roots', 'dalai lama'
-        ]
-        
-        response = "⚡ *BEBIDAS ENERGIZANTES:*\n\n"
-        for drink_name in energy_drinks:
-            for item in self.menu_items:
-                if drink_name.lower() in item.get('name', '').lower():
-                    name = item.get('name', 'Sin nombre')
-                    price = item.get('price', 'N/A')
-                    response += f"✅ {name} - ${price}\n"
-                    break
-        
-        return response
+        return self.get_items_by_tag('energy', "⚡ *BEBIDAS ENERGIZANTES:*\n\n")
     
     def get_detox_drinks(self) -> str:
         """Get detox drinks"""
-        detox_drinks = [
-            'n4', 'green day', 'ez-green', 'red roots', 'jugo de zanahoria', 'jugo celery'
-        ]
-        
-        response = "🌿 *BEBIDAS DETOX:*\n\n"
-        for drink_name in detox_drinks:
-            for item in self.menu_items:
-                if drink_name.lower() in item.get('name', '').lower():
-                    name = item.get('name', 'Sin nombre')
-                    price = item.get('price', 'N/A')
-                    response += f"✅ {name} - ${price}\n"
-                    break
+        return self.get_items_by_tag('detox', "🌿 *BEBIDAS DETOX:*\n\n")
+    
+    def get_items_by_tag(self, tag: str, header: str) -> str:
+        """List every item tagged with `tag` in menu_items.json"""
+        response = header
+        for item in self.inventory.tagged(tag):
+            response += f"{item.list_line}\n"
         
         return response
     
@@ -511,32 +761,20 @@ class PranaWhatsAppBot:
     
     def get_specific_location(self, location_name: str = None) -> str:
         """Get specific location information"""
-        locations = {
-            'castellana': {
-                'name': 'PRANA LA CASTELLANA',
-                'address': 'Avenida Mohedano, Caracas 1060, Chacao, Distrito Capital',
-                'gps': 'https://maps.google.com/?q=10.4870,-66.8512',
-                'hours': '7:00 AM - 11:00 PM'
-            },
-            'palos_grandes': {
-                'name': 'PRANA LOS PALOS GRANDES',
-                'address': 'Transversal 3 entre 3ra y 4ta, Los Palos Grandes, Caracas, Distrito Capital',
-                'gps': 'https://maps.google.com/?q=10.4806,-66.9036',
-                'hours': '7:00 AM - 11:00 PM'
-            }
-        }
-        
-        if location_name and location_name.lower() in locations:
-            loc = locations[location_name.lower()]
-            return f"📍 *{loc['name']}*\n\n" \
-                   f"🏪 {loc['address']}\n" \
-                   f"🕐 Horarios: {loc['hours']}\n" \
-                   f"📱 {loc['gps']}\n\n" \
-                   f"💡 Haz clic en el enlace para obtener direcciones GPS"
+        # Rendered once per snapshot by the store registry
+        if location_name and location_name.lower() in self.stores.replies:
+            return self.stores.replies[location_name.lower()]
         
         # Return all locations if no specific location requested
         return self.get_location()
     
+    def handle_location(self, user_id: str, latitude: float, longitude: float) -> Tuple[str, str]:
+        """Reply to a shared WhatsApp location with the nearest open store"""
+        reply = self.stores.nearest_reply(latitude, longitude)
+        if reply is None:
+            return self.add_follow_up_question(self.get_location()), 'location'
+        return self.add_follow_up_question(reply), 'nearest_store'
+    
     def get_full_menu(self) -> str:
         """Get complete menu"""
         return "📋 *MENÚ COMPLETO PRANA JUICE BAR*\n\n" + self.knowledge_base
@@ -546,14 +784,20 @@ class PranaWhatsAppBot:
         return "🥗 Para ver los ingredientes de un item específico, escribe el nombre del producto."
     
     def get_recommendations(self) -> str:
-        """Get recommendations"""
-        recommendations = [
-            "🥤 *CITRUS* - Perfecto para refrescarse",
-            "💉 *GINGER SHOT* - Energía natural",
-            "🌿 *GREEN DAY* - Detox completo",
-            "🍰 *CHEESECAKE DE MORA* - Postre favorito",
-            "🌅 *BOWL DE CHIA* - Desayuno saludable"
-        ]
+        """Get recommendations (best sellers when sales data is available)"""
+        if self.popularity:
+            recommendations = [
+                f"{self.get_category_emoji(item.category)} *{item.name.upper()}* - {item.price_label}"
+                for item in self.popularity.recommended(5, self.inventory.is_available)
+            ]
+        else:
+            recommendations = [
+                "🥤 *CITRUS* - Perfecto para refrescarse",
+                "💉 *GINGER SHOT* - Energía natural",
+                "🌿 *GREEN DAY* - Detox completo",
+                "🍰 *CHEESECAKE DE MORA* - Postre favorito",
+                "🌅 *BOWL DE CHIA* - Desayuno saludable"
+            ]
         
         response = "⭐ *NUESTRAS RECOMENDACIONES:*\n\n"
         for rec in recommendations:
@@ -574,11 +818,7 @@ class PranaWhatsAppBot:
     
     def is_positive_response(self, message: str) -> bool:
         """Check if message is a positive response"""
-        positive_words = [
-            'si', 'sí', 'yes', 'claro', 'por supuesto', 'ok', 'okay', 'vale', 'bueno',
-            'perfecto', 'excelente', 'genial', 'me gustaría', 'me gustaria'
-        ]
-        return any(word in message for word in positive_words)
+        return any(word in message for word in self.POSITIVE_WORDS)
     
     def get_volume_info(self) -> str:
         """Get volume/size information for drinks"""
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Dialogue State Machine
+Conversation flows are declared as transition rows
+
+    (from_state, intent, action, to_state)
+
+and compiled once into one dict per state, so handling a message is a
+single lookup however many flows exist. Recognizers (message -> Match) are
+state-independent and run in the declared order; what a match *means* (a
+"2" after the category list vs. after a list of items, "si" after an order
+summary vs. anywhere else) is decided by the user's current state.
+
+Row rules:
+- from_state '*' applies to every state that does not catch all intents
+  itself; a row for a specific state overrides it.
+- intent '*' is the state's fallback. A specific state with an '*' row is
+  modal: only its own rows apply (e.g. 'new' greets whatever is said,
+  except for the rows listed for it).
+- to_state None keeps the current state.
+- An intent is looked up by its name, then by its kind (every FAQ match has
+  kind 'faq'), then '*'.
+- An action returns (reply, context), or None to decline the match (a list
+  number that is out of range); the state's '*' row answers instead.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+ANY = '*'
+
+
+class Match(NamedTuple):
+    """What a message was recognized as, before looking at the user's state"""
+    intent: str
+    kind: str
+    slot: Any = None
+
+
+def match(intent: str, slot: Any = None, kind: Optional[str] = None) -> Match:
+    return Match(intent, kind or intent, slot)
+
+
+class Transition(NamedTuple):
+    action: str
+    target: Optional[int]  # state index, None = stay
+
+
+# (reply, context for the next state), or None to decline
+ActionResult = Optional[Tuple[str, Any]]
+
+PRANA_FLOWS = {
+    'initial': 'new',
+    'recognizers': ['cart', 'faq', 'order', 'positive', 'goodbye', 'greeting', 'menu', 'number',
+                    'category', 'search', 'item'],
+    'flows': {
+        'conversation': [
+            # First message: greet, unless it is a direct question
+            ('new', ANY, 'welcome', 'idle'),
+            ('new', 'faq', 'faq', 'idle'),
+            ('new', 'location', 'faq', 'location'),
+            (ANY, 'faq', 'faq', 'idle'),
+            (ANY, 'greeting', 'welcome', 'idle'),
+            (ANY, 'positive', 'positive', 'idle'),
+            (ANY, 'goodbye', 'goodbye', 'idle'),
+            (ANY, 'number', 'category_number', 'category'),
+            (ANY, ANY, 'help', 'idle'),
+        ],
+        'browse': [
+            (ANY, 'menu', 'menu_categories', 'browse'),
+            (ANY, 'category', 'category', 'category'),
+            (ANY, 'search', 'search', 'results'),
+            # A number picks from the list the user is looking at, which
+            # stays open for the next pick
+            ('category', 'number', 'list_item', None),
+            ('results', 'number', 'list_item', None),
+        ],
+        'item': [
+            (ANY, 'item', 'item_details', 'item'),
+        ],
+        'order': [
+            (ANY, 'order', 'order_start', 'order'),
+            # More items while the cart is open go into the same cart
+            ('order', 'order', 'order_add', None),
+            ('order', 'positive', 'order_confirm', 'idle'),
+            ('order', 'goodbye', 'order_cancel', 'idle'),
+        ],
+        'location': [
+            (ANY, 'location', 'faq', 'location'),
+            ('location', 'number', 'store_number', 'idle'),
+        ],
+    },
+}
+
+
+class DialogueMachine:
+    """Compiled transition table: table[state][intent] -> Transition"""
+
+    def __init__(self, states: List[str], table: List[Dict[str, Transition]], initial: int,
+                 recognizers: List[Callable[[str], Optional[Match]]], actions: Dict[str, Callable[..., ActionResult]]):
+        self.states = states
+        self.table = table
+        self.initial = initial
+        self.recognizers = recognizers
+        self.actions = actions
+
+    def recognize(self, message: str) -> Match:
+        for recognizer in self.recognizers:
+            found = recognizer(message)
+            if found is not None:
+                return found
+        return match('unknown')
+
+    def transition(self, state: int, found: Match) -> Transition:
+        row = self.table[state]
+        return row.get(found.intent) or row.get(found.kind) or row[ANY]
+
+    def step(self, state: int, context: Any, found: Match) -> Tuple[str, str, int, Any]:
+        """(reply, action, next state, next context) for a recognized message"""
+        transition = self.transition(state, found)
+        result = self.actions[transition.action](found.slot, context)
+        if result is None:
+            transition = self.table[state][ANY]
+            result = self.actions[transition.action](None, context)
+        reply, next_context = result
+        target = state if transition.target is None else transition.target
+        return reply, transition.action, target, next_context
+
+
+def compile_flows(spec: dict, recognizers: Dict[str, Callable[[str], Optional[Match]]],
+                  actions: Dict[str, Callable[..., ActionResult]]) -> DialogueMachine:
+    """Check a flow spec against the available recognizers/actions and build its tables"""
+    rows = [row for flow in spec['flows'].values() for row in flow]
+
+    states: List[str] = [spec['initial']]
+    for source, _, _, target in rows:
+        for state in (source, target):
+            if state not in (ANY, None) and state not in states:
+                states.append(state)
+    index = {state: i for i, state in enumerate(states)}
+
+    for _, _, action, _ in rows:
+        if action not in actions:
+            raise ValueError(f"Dialogue spec uses unknown action {action!r}")
+    missing = [name for name in spec['recognizers'] if name not in recognizers]
+    if missing:
+        raise ValueError(f"Dialogue spec uses unknown recognizers {missing}")
+
+    def place(table: Dict[str, Transition], intent: str, action: str, target: Optional[str], where: str):
+        transition = Transition(action, None if target is None else index[target])
+        if table.get(intent, transition) != transition:
+            raise ValueError(f"Conflicting transitions for {intent!r} in {where}")
+        table[intent] = transition
+
+    shared: Dict[str, Transition] = {}
+    for source, intent, action, target in rows:
+        if source == ANY:
+            place(shared, intent, action, target, "'*'")
+    if ANY not in shared:
+        raise ValueError("Dialogue spec needs a ('*', '*', ...) fallback")
+
+    table = []
+    for state in states:
+        own = [row for row in rows if row[0] == state]
+        modal = any(intent == ANY for _, intent, _, _ in own)
+        transitions = {} if modal else dict(shared)
+        specific: Dict[str, Transition] = {}
+        for _, intent, action, target in own:
+            place(specific, intent, action, target, repr(state))
+        transitions.update(specific)
+        table.append(transitions)
+
+    return DialogueMachine(states, table, index[spec['initial']],
+                           [recognizers[name] for name in spec['recognizers']], actions)
+
+
+class DialogueSessions:
+    """
+    Per-user (state index, context), least recently active first. Idle
+    sessions expire, and the oldest are dropped beyond max_sessions.
+    """
+
+    def __init__(self, initial: int = 0, max_sessions: int = 100000, ttl: float = 12 * 3600):
+        self.initial = initial
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: 'OrderedDict[str, Tuple[int, Any, float]]' = OrderedDict()
+
+    def get(self, user_id: str) -> Tuple[int, Any]:
+        session = self._sessions.get(user_id)
+        if session is None or time.monotonic() - session[2] > self.ttl:
+            return self.initial, None
+        return session[0], session[1]
+
+    def set(self, user_id: str, state: int, context: Any = None):
+        self._sessions[user_id] = (state, context, time.monotonic())
+        self._sessions.move_to_end(user_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
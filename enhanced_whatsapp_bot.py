@@ -11,13 +11,59 @@ import time
 from typing import Dict, List, Optional, Tuple
 import logging
 from datetime import datetime
+from functools import partial
 import requests
 
+from bot_snapshot import BotSnapshot
+from fast_path import Route, build_fast_path, intent_name, mine_top_messages, refresh_fast_path, router_phrases
+from menu_catalogue import DEFAULT_CATALOGUE, CatalogueReader
+from menu_media import MenuMedia
+from menu_model import MenuItem
+from reply_pages import CHANNEL_LIMITS, DEFAULT_CHANNEL, MORE_WORDS, PAGE_BREAK, PageCursors
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class EnhancedPranaWhatsAppBot:
+    # Seconds between checks of bot_data/ for changed files
+    RELOAD_CHECK_INTERVAL = 2.0
+    
+    GREETING_WORDS = ['hola', 'buenos dias', 'buenas', 'buenas tardes', 'buenas noches', 'hey', 'hi', 'hello', 'que tal', 'bueno dias']
+    GOODBYE_WORDS = [
+        'no', 'eso es todo', 'eso es', 'nada más', 'nada mas', 'gracias', 'hasta luego',
+        'hasta la vista', 'adiós', 'adios', 'chao', 'bye', 'goodbye', 'that\'s all',
+        'no más', 'no mas', 'ya está', 'ya esta', 'listo', 'terminado'
+    ]
+    POSITIVE_WORDS = ['si', 'sí', 'claro', 'ok', 'okay', 'perfecto', 'excelente', 'bueno', 'vale', 'yes', 'yeah', 'yep']
+    MENU_WORDS = ['menu', 'menú', 'carta', 'que tienen', 'que ofrecen', 'que venden']
+    
+    # Messages kept per user (the LLM context uses the last 3)
+    HISTORY_LIMIT = 10
+    
+    # Longer replies are sent in pages ("más" shows the next one)
+    MAX_MESSAGE_LENGTH = CHANNEL_LIMITS[DEFAULT_CHANNEL]
+    SEARCH_PAGE_ITEMS = 5
+    
+    # Replies that also send the menu photos
+    MEDIA_INTENTS = ('menu_categories', 'full_menu')
+    
+    # Cached FAQ replies that list menu items, by handler and what they list;
+    # an item edit re-renders only the ones listing its category or its tags
+    ITEM_LIST_REPLIES = {
+        'shots': ('category', 'shots'), 'juices': ('category', 'jugos cold pressed'),
+        'smoothies': ('category', 'milks'), 'breakfast': ('category', 'desayunos'),
+        'lunch': ('category', 'almuerzos'), 'desserts': ('category', 'postres'),
+        'cold_drinks': ('tag', 'cold'), 'energy_drinks': ('tag', 'energy'), 'detox_drinks': ('tag', 'detox'),
+        'recommendations': ('popularity', None),
+    }
+    
+    # Dynamic outcomes left out of the fast path so the LLM still sees those messages
+    FAST_PATH_SKIP_INTENTS = ('help', 'search', 'item_details')
+    
+    # Intent classifier predictions below this confidence are left to the LLM
+    INTENT_CONFIDENCE_THRESHOLD = 0.6
+    
     def __init__(self, use_ollama: bool = True, ollama_model: str = "llama2", ollama_url: str = "http://localhost:11434"):
         """
         Initialize the enhanced bot with Ollama integration
@@ -35,7 +81,12 @@ class EnhancedPranaWhatsAppBot:
         # Load original bot data
         self.load_data()
         self.setup_responses()
+        self.warm_reply_cache()
+        self.top_messages = mine_top_messages()
+        self.build_fast_path()
+        self.intent_classifier = self.load_intent_classifier()
         self.conversation_history = {}
+        self.page_cursors = PageCursors()
         
         # Test Ollama availability
         if self.use_ollama:
@@ -68,28 +119,175 @@ class EnhancedPranaWhatsAppBot:
     def load_data(self):
         """Load all bot data from files"""
         try:
-            # Load menu items
-            with open('bot_data/menu_items.json', 'r', encoding='utf-8') as f:
-                self.menu_items = json.load(f)
-            
-            # Load knowledge base
-            with open('bot_data/menu_knowledge_base.txt', 'r', encoding='utf-8') as f:
-                self.knowledge_base = f.read()
+            snapshot = BotSnapshot('bot_data')
             
-            # Load response templates
-            with open('bot_data/response_templates.json', 'r', encoding='utf-8') as f:
-                self.templates = json.load(f)
+            self.snapshot = snapshot
+            self.menu_items = snapshot.menu_items
+            self.menu_index = snapshot.menu_index
+            self.knowledge_base = snapshot.knowledge_base
+            self.templates = snapshot.templates
+            self.menu_structure = snapshot.menu_structure
+            self.popularity = snapshot.popularity
+            self.inventory = snapshot.inventory
+            self.menu_search = self.load_menu_search(snapshot)
+            self.catalogue = self.load_catalogue()
+            self.menu_media = MenuMedia()
+            self.last_reload_check = time.monotonic()
                 
-            # Load menu structure
-            with open('bot_data/menu_structure.json', 'r', encoding='utf-8') as f:
-                self.menu_structure = json.load(f)
-                
-            logger.info("✅ All bot data loaded successfully")
+            logger.info(f"✅ All bot data loaded successfully (snapshot {snapshot.version})")
             
         except Exception as e:
             logger.error(f"❌ Error loading data: {e}")
             raise
     
+    def load_menu_search(self, snapshot: BotSnapshot):
+        """Semantic search index for the snapshot's menu, or None if unavailable"""
+        try:
+            from menu_search import MenuSearchIndex
+        except ImportError:
+            logger.error("❌ numpy not installed. Semantic menu search disabled.")
+            return None
+        
+        try:
+            return MenuSearchIndex.for_snapshot(snapshot)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not build menu search index: {e}")
+            return None
+    
+    def load_catalogue(self) -> Optional[CatalogueReader]:
+        """Read-only full-text search over the menu catalogue, or None if there is none"""
+        try:
+            return CatalogueReader(DEFAULT_CATALOGUE)
+        except FileNotFoundError:
+            return None
+    
+    def media_for(self, intent: str) -> List[str]:
+        """Stored menu photo files to send along with a reply of this intent"""
+        if intent in self.MEDIA_INTENTS:
+            return self.menu_media.files()
+        return []
+    
+    def update_inventory(self, changes: Dict[str, float]) -> List[MenuItem]:
+        """Apply stock changes; replies are re-rendered only if an item's availability flipped"""
+        flipped = self.inventory.update_stock(changes)
+        if flipped:
+            logger.info(f"📦 Availability changed for: {', '.join(item.name for item in flipped)}")
+            self.snapshot.replies.clear()
+            self.warm_reply_cache()
+            # Pre-recognized search and item matches list the items in stock
+            self.build_fast_path()
+        return flipped
+    
+    def reload_if_changed(self) -> bool:
+        """Reload bot data if any file in bot_data/ changed on disk"""
+        now = time.monotonic()
+        if now - self.last_reload_check < self.RELOAD_CHECK_INTERVAL:
+            return False
+        self.last_reload_check = now
+        
+        if not self.snapshot.is_stale():
+            return False
+        
+        logger.info("🔄 Bot data changed on disk, reloading...")
+        return self.reload()
+    
+    def reload(self) -> bool:
+        """Reload every bot_data/ file now"""
+        try:
+            self.load_data()
+        except Exception:
+            # Keep serving the previous snapshot until the files are valid again
+            return False
+        self.warm_reply_cache()
+        self.build_fast_path()
+        return True
+    
+    def apply_menu_change(self, old: Optional[MenuItem], new: Optional[MenuItem]):
+        """
+        Patch the indexes for one item edited through the admin API (old=None
+        adds, new=None removes), after the files were rewritten on disk
+        """
+        stale_replies = self.item_reply_keys([item for item in (old, new) if item is not None])
+        categories = list(self.menu_structure)
+        
+        self.snapshot.apply_item_change(old, new)
+        self.snapshot.refresh_version()
+        if self.menu_search:
+            self.menu_search.replace(old, new)
+        
+        # Only the replies that can list these items
+        self.snapshot.replies.discard(stale_replies)
+        self.warm_reply_cache()
+        # Item searches stay out of the fast path; "1"-"9" pick categories by position
+        if list(self.menu_structure) != categories:
+            self.fast_path = refresh_fast_path(self.fast_path, self.resolve_message,
+                                               [str(number) for number in range(1, 10)],
+                                               skip_intents=self.FAST_PATH_SKIP_INTENTS)
+        logger.info(f"✏️ Menu updated in place (snapshot {self.snapshot.version})")
+    
+    def item_reply_keys(self, items: List[MenuItem]) -> list:
+        """Reply cache keys of the message-independent replies that list any of `items`"""
+        lists = {('category', item.category_id) for item in items}
+        lists.update(('tag', tag) for item in items for tag in item.tags)
+        if any(item.name_lower in self.popularity.rank for item in items):
+            lists.add(('popularity', None))
+        
+        keys = [pattern for pattern, handler in self.qa_patterns.items()
+                if self.ITEM_LIST_REPLIES.get(intent_name(handler)) in lists]
+        keys += [('category', category) for category in self.menu_structure
+                 if ('category', category.lower()) in lists]
+        # An edit can add a category or empty one
+        keys.append('menu_categories')
+        return [(key, True) for key in keys]
+    
+    def cached_reply(self, key, handler, follow_up: bool = True) -> str:
+        """Serve a reply that does not depend on the message from the snapshot cache"""
+        if follow_up:
+            return self.snapshot.replies.get((key, True), lambda: self.add_follow_up_question(handler()))
+        return self.snapshot.replies.get((key, False), handler)
+    
+    def warm_reply_cache(self):
+        """Render every message-independent reply for the current snapshot"""
+        for pattern, handler in self.qa_patterns.items():
+            self.cached_reply(pattern, handler)
+        for category in self.menu_structure:
+            self.cached_reply(('category', category), lambda category=category: self.get_items_by_category(category))
+        self.cached_reply('welcome', self.get_welcome_message, follow_up=False)
+        self.cached_reply('positive', self.get_positive_message, follow_up=False)
+        self.cached_reply('goodbye', self.get_goodbye_message, follow_up=False)
+        self.cached_reply('menu_categories', self.get_menu_categories)
+        self.cached_reply('help', self.get_help_message)
+        self.snapshot.replies.paginate_all(self.MAX_MESSAGE_LENGTH)
+    
+    def build_fast_path(self):
+        """Pre-resolve router phrases and the most frequent logged messages"""
+        self.fast_path = build_fast_path(
+            self.resolve_message,
+            router_phrases(self) + self.top_messages,
+            skip_intents=self.FAST_PATH_SKIP_INTENTS
+        )
+        logger.info(f"⚡ Fast path ready with {len(self.fast_path)} exact messages")
+    
+    def load_intent_classifier(self, model_path: str = 'bot_data/intent_model.npz'):
+        """Load the trained intent classifier, or None if it is not available"""
+        try:
+            from intent_classifier import IntentClassifier
+        except ImportError:
+            logger.error("❌ numpy not installed. Intent classifier disabled.")
+            return None
+        
+        try:
+            classifier = IntentClassifier.load(model_path)
+        except FileNotFoundError:
+            logger.info(f"ℹ️ No intent model at {model_path}. Run: python intent_classifier.py train")
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load intent model: {e}")
+            return None
+        
+        logger.info(f"✅ Intent classifier loaded ({len(classifier.labels)} intents)")
+        return classifier
+    
     def setup_responses(self):
         """Setup response patterns and categories"""
         self.categories = {
@@ -122,47 +320,92 @@ class EnhancedPranaWhatsAppBot:
             r'ingredientes.*(\w+)': self.get_ingredients,
             r'recomendacion|recomienda|sugerencia': self.get_recommendations
         }
+        
+        # Compiled once; each FAQ route serves its reply from the snapshot cache
+        self.qa_routes = [
+            (re.compile(pattern, re.IGNORECASE), Route(intent_name(handler), partial(self.cached_reply, pattern, handler)))
+            for pattern, handler in self.qa_patterns.items()
+        ]
+        
+        self.static_routes = {
+            'welcome': Route('welcome', partial(self.cached_reply, 'welcome', self.get_welcome_message, False)),
+            'positive': Route('positive', partial(self.cached_reply, 'positive', self.get_positive_message, False)),
+            'goodbye': Route('goodbye', partial(self.cached_reply, 'goodbye', self.get_goodbye_message, False)),
+            'menu_categories': Route('menu_categories', partial(self.cached_reply, 'menu_categories', self.get_menu_categories)),
+            'help': Route('help', partial(self.cached_reply, 'help', self.get_help_message)),
+        }
+        
+        # Routes the intent classifier can answer with, by intent name
+        self.intent_routes = {route.intent: route for _, route in self.qa_routes}
+        self.intent_routes.update(self.static_routes)
+        del self.intent_routes['help']
     
     def process_message(self, user_id: str, message: str) -> str:
         """Process incoming message and return appropriate response"""
+        return self.handle_message(user_id, message)[0]
+    
+    def handle_message(self, user_id: str, message: str) -> Tuple[str, str]:
+        """Process incoming message and return (response, intent)"""
         message = message.lower().strip()
         
+        # "más" continues the user's last paged reply
+        if message in MORE_WORDS:
+            page = self.page_cursors.next(user_id)
+            if page is not None:
+                return page, 'more'
+        
+        response, intent = self.respond(user_id, message)
+        pages = self.snapshot.replies.pages(response, self.MAX_MESSAGE_LENGTH)
+        return self.page_cursors.start(user_id, pages), intent
+    
+    def respond(self, user_id: str, message: str) -> Tuple[str, str]:
+        """Full (unpaged) reply and intent for a normalized message"""
+        self.reload_if_changed()
+        
         # Store in conversation history
         if user_id not in self.conversation_history:
             self.conversation_history[user_id] = []
-        self.conversation_history[user_id].append({
+        history = self.conversation_history[user_id]
+        history.append({
             'message': message,
             'timestamp': datetime.now().isoformat()
         })
+        if len(history) > self.HISTORY_LIMIT:
+            del history[:-self.HISTORY_LIMIT]
         
         # Always start with greeting for new conversations
-        if len(self.conversation_history[user_id]) <= 1:
-            return self.get_welcome_message()
-        
-        # Check for positive responses (yes, si, claro, etc.)
-        if self.is_positive_response(message):
-            return "¡Perfecto! ¿En qué puedo ayudarte? Puedes preguntarme por nuestro menú, horarios, precios, o cualquier cosa que necesites."
-        
-        # Check for goodbye/farewell messages
-        if self.is_goodbye(message):
-            return self.get_goodbye_message()
-        
-        # Check for greetings (for returning users)
-        if self.is_greeting(message):
-            return self.get_welcome_message()
-        
-        # Try Ollama first if available
+        if len(history) <= 1:
+            route = self.static_routes['welcome']
+            return route.reply(), route.intent
+        
+        # Exact matches for the most frequent messages skip the cascade
+        route = self.fast_path.get(message)
+        if route is not None:
+            return route.reply(), route.intent
+        
+        # Positive responses, goodbyes and greetings never need the LLM
+        route = self.resolve_conversational(message)
+        if route is not None:
+            return route.reply(), route.intent
+        
+        # Keyword rules, then the local classifier, before paying for an LLM call
+        route = self.resolve_patterns(message) or self.classify_intent(message)
+        if route is not None:
+            return route.reply(), route.intent
+        
+        # Try Ollama for everything the rules and the classifier are unsure about
         if self.ollama_available and self.use_ollama:
             try:
                 llm_response = self.get_ollama_response(user_id, message)
                 if llm_response:
-                    return self.add_follow_up_question(llm_response)
+                    return self.add_follow_up_question(llm_response), 'llm'
             except Exception as e:
                 logger.warning(f"⚠️ Ollama response failed: {e}")
                 logger.info("🔄 Falling back to rule-based system")
         
-        # Fallback to rule-based system
-        return self.process_with_rules(user_id, message)
+        # Fallback to menu item lookup (the keyword rules already missed)
+        route = self.resolve_lookup(message)
+        return route.reply(), route.intent
     
     def get_ollama_response(self, user_id: str, message: str) -> Optional[str]:
         """Get response from Ollama LLM"""
@@ -220,7 +463,7 @@ class EnhancedPranaWhatsAppBot:
         # Add menu structure
         context_parts.append("\nESTRUCTURA DEL MENÚ:")
         for category, items in self.menu_structure.items():
-            context_parts.append(f"- {category}: {', '.join(items)}")
+            context_parts.append(f"- {category}: {', '.join(item.name for item in items)}")
         
         # Add recent conversation history (last 3 messages)
         if user_id in self.conversation_history:
@@ -268,65 +511,102 @@ RESPUESTA:"""
     
     def process_with_rules(self, user_id: str, message: str) -> str:
         """Process message using the original rule-based system"""
+        return self.resolve_rules(message).reply()
+    
+    def classify_intent(self, message: str) -> Optional[Route]:
+        """Route for the classifier's prediction, if it is confident enough"""
+        if self.intent_classifier is None:
+            return None
+        
+        intent, confidence = self.intent_classifier.predict(message)
+        if intent is None or confidence < self.INTENT_CONFIDENCE_THRESHOLD:
+            return None
+        return self.intent_routes.get(intent)
+    
+    def resolve_message(self, message: str) -> Route:
+        """Match a normalized message against every rule, without calling the LLM"""
+        return self.resolve_conversational(message) or self.resolve_rules(message)
+    
+    def resolve_conversational(self, message: str) -> Optional[Route]:
+        """Match positive responses, goodbyes and greetings"""
+        # Check for positive responses (yes, si, claro, etc.)
+        if self.is_positive_response(message):
+            return self.static_routes['positive']
+        
+        # Check for goodbye/farewell messages
+        if self.is_goodbye(message):
+            return self.static_routes['goodbye']
+        
+        # Check for greetings (for returning users)
+        if self.is_greeting(message):
+            return self.static_routes['welcome']
+        
+        return None
+    
+    def resolve_rules(self, message: str) -> Route:
+        """Match a normalized message against the original rule-based system"""
+        return self.resolve_patterns(message) or self.resolve_lookup(message)
+    
+    def resolve_patterns(self, message: str) -> Optional[Route]:
+        """Match FAQ patterns, menu requests and category keywords"""
         # Check for QA patterns (FAQ: hours, location, etc.) FIRST
-        for pattern, handler in self.qa_patterns.items():
-            if re.search(pattern, message, re.IGNORECASE):
-                response = handler()
-                return self.add_follow_up_question(response)
+        for regex, route in self.qa_routes:
+            if regex.search(message):
+                return route
         
         # Check for menu requests
         if self.is_menu_request(message):
-            response = self.get_menu_categories()
-            return self.add_follow_up_question(response)
+            return self.static_routes['menu_categories']
         
         # Check for specific category requests
-        category_response = self.get_category_items(message)
-        if category_response:
-            return self.add_follow_up_question(category_response)
+        category = self.match_category(message)
+        if category:
+            return Route('category', partial(self.cached_reply, ('category', category),
+                                             partial(self.get_items_by_category, category)))
         
+        return None
+    
+    def resolve_lookup(self, message: str) -> Route:
+        """Look up menu items named in the message, falling back to help"""
         # Check for specific item searches
         item_response = self.search_menu_items(message)
         if item_response:
-            return self.add_follow_up_question(item_response)
+            return Route('search', partial(self.add_follow_up_question, item_response))
         
         # Check for specific item details
         item_detail = self.get_item_details(message)
         if item_detail:
-            return self.add_follow_up_question(item_detail)
+            return Route('item_details', partial(self.add_follow_up_question, item_detail))
         
         # Default response
-        response = self.get_help_message()
-        return self.add_follow_up_question(response)
+        return self.static_routes['help']
     
     # All the original methods from the base bot
     def is_goodbye(self, message: str) -> bool:
         """Check if message is a goodbye/farewell"""
-        goodbye_words = [
-            'no', 'eso es todo', 'eso es', 'nada más', 'nada mas', 'gracias', 'hasta luego',
-            'hasta la vista', 'adiós', 'adios', 'chao', 'bye', 'goodbye', 'that\'s all',
-            'no más', 'no mas', 'ya está', 'ya esta', 'listo', 'terminado'
-        ]
         message_words = message.split()
-        return any(word in message_words for word in goodbye_words)
+        return any(word in message_words for word in self.GOODBYE_WORDS)
     
     def add_follow_up_question(self, response: str) -> str:
         """Add follow-up question to any response"""
         follow_up = "\n\n¿Hay algo más en lo que pueda ayudarte?"
         return response + follow_up
     
+    def get_positive_message(self) -> str:
+        """Get reply for positive responses (yes, si, claro, etc.)"""
+        return "¡Perfecto! ¿En qué puedo ayudarte? Puedes preguntarme por nuestro menú, horarios, precios, o cualquier cosa que necesites."
+    
     def get_goodbye_message(self) -> str:
         """Get goodbye message"""
         return "¡Gracias por visitar Prana Juice Bar! 🌿\n\n¡Esperamos verte pronto! ¡Que tengas un día saludable! 🥤"
     
     def is_greeting(self, message: str) -> bool:
         """Check if message is a greeting"""
-        greetings = ['hola', 'buenos dias', 'buenas', 'buenas tardes', 'buenas noches', 'hey', 'hi', 'hello', 'que tal', 'bueno dias']
-        return any(greeting in message for greeting in greetings)
+        return any(greeting in message for greeting in self.GREETING_WORDS)
     
     def is_menu_request(self, message: str) -> bool:
         """Check if user is asking for menu"""
-        menu_words = ['menu', 'carta', 'que tienen', 'que ofrecen', 'que venden']
-        return any(word in message for word in menu_words)
+        return any(word in message for word in self.MENU_WORDS)
     
     def get_welcome_message(self) -> str:
         """Get personalized welcome message"""
@@ -362,9 +642,16 @@ RESPUESTA:"""
     
     def get_category_items(self, message: str) -> Optional[str]:
         """Get items for a specific category"""
+        category = self.match_category(message)
+        if category:
+            return self.get_items_by_category(category)
+        return None
+    
+    def match_category(self, message: str) -> Optional[str]:
+        """Find the category a message asks for, if any"""
         for category, keywords in self.categories.items():
             if any(keyword in message for keyword in keywords):
-                return self.get_items_by_category(category)
+                return category
         
         # Check for numeric category selection
         if re.search(r'\b[1-9]\b', message):
@@ -372,8 +659,7 @@ RESPUESTA:"""
             try:
                 num = int(re.search(r'\b([1-9])\b', message).group(1))
                 if 1 <= num <= len(categories):
-                    category = categories[num - 1]
-                    return self.get_items_by_category(category)
+                    return categories[num - 1]
             except:
                 pass
         
@@ -384,47 +670,53 @@ RESPUESTA:"""
         if category not in self.menu_structure:
             return "Lo siento, no encontré esa categoría. ¿Podrías ser más específico?"
         
-        items = self.menu_structure[category]
+        items = self.inventory.filter(self.menu_structure[category])
         response = f"🍽️ *{category.upper()}:*\n\n"
         
         for item in items:
-            # Handle both string items and object items
-            if isinstance(item, str):
-                # Simple string item
-                response += f"• *{item}*\n\n"
-            elif isinstance(item, dict):
-                # Full item object
-                name = item.get('name', 'Sin nombre')
-                price = item.get('price', 'Precio no disponible')
-                description = item.get('description', '')
-                ingredients = item.get('ingredients', [])
-                
-                response += f"• *{name}* - ${price}\n"
-                if description:
-                    response += f"  {description}\n"
-                if ingredients:
-                    response += f"  🥗 Ingredientes: {', '.join(ingredients)}\n"
-                response += "\n"
+            # Entries listed by name only in menu_structure.json have no price
+            if item.price is None:
+                response += f"• *{item.name}*\n\n"
+                continue
+            
+            response += f"{item.bullet_line}\n"
+            if item.description:
+                response += f"  {item.description}\n"
+            if item.ingredients:
+                response += f"  🥗 Ingredientes: {item.ingredients_text}\n"
+            response += "\n"
         
         return response
     
     def search_menu_items(self, message: str) -> Optional[str]:
         """Search for specific menu items"""
-        found_items = []
-        
-        for item in self.menu_items:
-            item_name = item['name'].lower()
-            if item_name in message or any(word in item_name for word in message.split()):
-                found_items.append(item)
+        # Semantic matches first ("algo ligero con frutas rojas"), then full-text, then plain substrings
+        found_items = [item for item, _ in self.menu_search.search(message)] if self.menu_search else []
+        found_items = self.inventory.filter(found_items)
+        
+        if not found_items and self.catalogue:
+            # Full-text matches from the catalogue, limited to items in this snapshot
+            found_items = self.inventory.filter(self.menu_index.named(self.catalogue.search(message)))
+        
+        if not found_items:
+            words = message.split()
+            for item in self.inventory.filter(self.menu_items):
+                item_name = item.name_lower
+                if item_name in message or any(word in item_name for word in words):
+                    found_items.append(item)
+            # Best sellers first (menu order when there is no sales data)
+            found_items = self.popularity.sort(found_items)
         
         if found_items:
             response = "🔍 *ITEMS ENCONTRADOS:*\n\n"
-            for item in found_items[:5]:  # Limit to 5 results
-                response += f"• *{item['name']}* - ${item.get('price', 'N/A')}\n"
-                response += f"  {item.get('description', 'Sin descripción')}\n\n"
+            for i, item in enumerate(found_items):
+                if i and i % self.SEARCH_PAGE_ITEMS == 0:
+                    response += PAGE_BREAK
+                response += f"{item.bullet_line}\n"
+                response += f"  {item.description}\n\n"
             
-            if len(found_items) > 5:
-                response += f"... y {len(found_items) - 5} más. ¿Puedes ser más específico?"
+            if len(found_items) > self.SEARCH_PAGE_ITEMS:
+                response += "¿Cuál te interesa?"
             
             return response
         
@@ -433,133 +725,123 @@ RESPUESTA:"""
     def get_item_details(self, message: str) -> Optional[str]:
         """Get detailed information about a specific item"""
         for item in self.menu_items:
-            if item['name'].lower() in message:
+            if item.name_lower in message:
                 return self.format_item_details(item)
         return None
     
-    def format_item_details(self, item: Dict) -> str:
+    def format_item_details(self, item: MenuItem) -> str:
         """Format item details"""
-        response = f"🍽️ *{item['name']}*\n\n"
+        response = f"🍽️ *{item.name}*\n\n"
         
-        if 'price' in item:
-            response += f"💰 *Precio:* ${item['price']}\n\n"
+        if item.price is not None:
+            response += f"💰 *Precio:* {item.price_label}\n\n"
         
-        if 'description' in item:
-            response += f"📝 *Descripción:* {item['description']}\n\n"
+        if item.description:
+            response += f"📝 *Descripción:* {item.description}\n\n"
         
-        if 'ingredients' in item and item['ingredients']:
-            response += f"🥗 *Ingredientes:* {item['ingredients']}\n"
+        if item.ingredients:
+            response += f"🥗 *Ingredientes:* {item.ingredients_text}\n"
         
-        if 'category' in item:
-            response += f"📂 *Categoría:* {item['category']}\n\n"
+        response += f"📂 *Categoría:* {item.category}\n\n"
         
         return response
     
     def get_shots(self) -> str:
         """Get shots information"""
-        shots = [item for item in self.menu_items if 'shot' in item['name'].lower()]
+        shots = self.inventory.category('shots')
         response = "💉 *NUESTROS SHOTS:*\n\n"
         
         for shot in shots:
-            response += f"• *{shot['name']}* - ${shot.get('price', 'N/A')}\n"
-            response += f"  {shot.get('description', 'Sin descripción')}\n\n"
+            response += f"{shot.bullet_line}\n"
+            response += f"  {shot.description}\n\n"
         
         return response
     
     def get_juices(self) -> str:
         """Get juices information"""
-        juices = [item for item in self.menu_items if any(word in item['name'].lower() for word in ['jugo', 'zumo', 'citrus', 'immunity'])]
+        juices = self.inventory.category('jugos cold pressed')
         response = "🥤 *NUESTROS JUGOS COLD PRESSED:*\n\n"
         
         for juice in juices:
-            response += f"• *{juice['name']}* - ${juice.get('price', 'N/A')}\n"
-            response += f"  {juice.get('description', 'Sin descripción')}\n\n"
+            response += f"{juice.bullet_line}\n"
+            response += f"  {juice.description}\n\n"
         
         return response
     
     def get_smoothies(self) -> str:
         """Get smoothies information"""
-        smoothies = [item for item in self.menu_items if any(word in item['name'].lower() for word in ['batido', 'milky way', 'go nuts'])]
+        smoothies = self.inventory.category('milks')
         response = "🥛 *NUESTROS BATIDOS:*\n\n"
         
         for smoothie in smoothies:
-            response += f"• *{smoothie['name']}* - ${smoothie.get('price', 'N/A')}\n"
-            response += f"  {smoothie.get('description', 'Sin descripción')}\n\n"
+            response += f"{smoothie.bullet_line}\n"
+            response += f"  {smoothie.description}\n\n"
         
         return response
     
     def get_breakfast(self) -> str:
         """Get breakfast information"""
-        breakfast = [item for item in self.menu_items if any(word in item['name'].lower() for word in ['desayuno', 'breakfast', 'bowl de chia', 'pancakes', 'tostada'])]
+        breakfast = self.inventory.category('desayunos')
         response = "🌅 *NUESTROS DESAYUNOS:*\n\n"
         
         for item in breakfast:
-            response += f"• *{item['name']}* - ${item.get('price', 'N/A')}\n"
-            response += f"  {item.get('description', 'Sin descripción')}\n\n"
+            response += f"{item.bullet_line}\n"
+            response += f"  {item.description}\n\n"
         
         return response
     
     def get_lunch(self) -> str:
         """Get lunch information"""
-        lunch = [item for item in self.menu_items if any(word in item['name'].lower() for word in ['almuerzo', 'lunch', 'bowl', 'wrap', 'panini', 'ensalada'])]
+        lunch = self.inventory.category('almuerzos')
         response = "🍽️ *NUESTROS ALMUERZOS:*\n\n"
         
         for item in lunch:
-            response += f"• *{item['name']}* - ${item.get('price', 'N/A')}\n"
-            response += f"  {item.get('description', 'Sin descripción')}\n\n"
+            response += f"{item.bullet_line}\n"
+            response += f"  {item.description}\n\n"
         
         return response
     
     def get_desserts(self) -> str:
         """Get desserts information"""
-        desserts = [item for item in self.menu_items if any(word in item['name'].lower() for word in ['postre', 'dessert', 'trufa', 'cheesecake', 'cookies'])]
+        desserts = self.inventory.category('postres')
         response = "🍰 *NUESTROS POSTRES:*\n\n"
         
         for dessert in desserts:
-            response += f"• *{dessert['name']}* - ${dessert.get('price', 'N/A')}\n"
-            response += f"  {dessert.get('description', 'Sin descripción')}\n\n"
+            response += f"{dessert.bullet_line}\n"
+            response += f"  {dessert.description}\n\n"
         
         return response
     
     def get_cold_drinks(self) -> str:
         """Get cold drinks recommendations"""
-        cold_drinks = []
-        for item in self.menu_items:
-            if any(word in item['name'].lower() for word in ['jugo', 'zumo', 'batido', 'milky way', 'go nuts']):
-                cold_drinks.append(item)
+        cold_drinks = self.inventory.tagged('cold')
         
         response = "🥤 *BEBIDAS REFRESCANTES:*\n\n"
         for drink in cold_drinks[:5]:
-            response += f"• *{drink['name']}* - ${drink.get('price', 'N/A')}\n"
-            response += f"  {drink.get('description', 'Sin descripción')}\n\n"
+            response += f"{drink.bullet_line}\n"
+            response += f"  {drink.description}\n\n"
         
         return response
     
     def get_energy_drinks(self) -> str:
         """Get energy drinks recommendations"""
-        energy_drinks = []
-        for item in self.menu_items:
-            if any(word in item['name'].lower() for word in ['shot', 'power', 'energizante', 'maca']):
-                energy_drinks.append(item)
+        energy_drinks = self.inventory.tagged('energy')
         
         response = "⚡ *BEBIDAS ENERGIZANTES:*\n\n"
         for drink in energy_drinks:
-            response += f"• *{drink['name']}* - ${drink.get('price', 'N/A')}\n"
-            response += f"  {drink.get('description', 'Sin descripción')}\n\n"
+            response += f"{drink.bullet_line}\n"
+            response += f"  {drink.description}\n\n"
         
         return response
     
     def get_detox_drinks(self) -> str:
         """Get detox drinks recommendations"""
-        detox_drinks = []
-        for item in self.menu_items:
-            if any(word in item['name'].lower() for word in ['detox', 'limpiar', 'immunity', 'ginger']):
-                detox_drinks.append(item)
+        detox_drinks = self.inventory.tagged('detox')
         
         response = "🌿 *BEBIDAS DETOX:*\n\n"
         for drink in detox_drinks:
-            response += f"• *{drink['name']}* - ${drink.get('price', 'N/A')}\n"
-            response += f"  {drink.get('description', 'Sin descripción')}\n\n"
+            response += f"{drink.bullet_line}\n"
+            response += f"  {drink.description}\n\n"
         
         return response
     
@@ -584,13 +866,19 @@ RESPUESTA:"""
         return "🥗 *INGREDIENTES:*\n\nTodos nuestros productos están hechos con ingredientes frescos y naturales. ¿Hay algún ingrediente específico que te interese conocer?"
     
     def get_recommendations(self) -> str:
-        """Get recommendations"""
-        recommendations = [
-            "🥤 *Citrus Immunity* - Perfecto para fortalecer tu sistema inmune",
-            "💉 *Ginger Shot* - Ideal para la digestión y energía",
-            "🌅 *Bowl de Chia* - Desayuno nutritivo y delicioso",
-            "🍽️ *Berry Blend* - Desayuno saludable y refrescante"
-        ]
+        """Get recommendations (best sellers when sales data is available)"""
+        if self.popularity:
+            recommendations = [
+                f"{self.get_category_emoji(item.category)} *{item.name.upper()}* - {item.price_label}"
+                for item in self.popularity.recommended(5, self.inventory.is_available)
+            ]
+        else:
+            recommendations = [
+                "🥤 *Citrus Immunity* - Perfecto para fortalecer tu sistema inmune",
+                "💉 *Ginger Shot* - Ideal para la digestión y energía",
+                "🌅 *Bowl de Chia* - Desayuno nutritivo y delicioso",
+                "🍽️ *Berry Blend* - Desayuno saludable y refrescante"
+            ]
         
         response = "🌟 *RECOMENDACIONES DE PRANA:*\n\n"
         for rec in recommendations:
@@ -614,9 +902,8 @@ Solo pregúntame lo que necesites. ¿Qué te gustaría saber?"""
     
     def is_positive_response(self, message: str) -> bool:
         """Check if message is a positive response"""
-        positive_words = ['si', 'sí', 'claro', 'ok', 'okay', 'perfecto', 'excelente', 'bueno', 'vale', 'yes', 'yeah', 'yep']
         message_words = message.split()
-        return any(word in message_words for word in positive_words)
+        return any(word in message_words for word in self.POSITIVE_WORDS)
 
 def main():
     """Test the enhanced bot"""
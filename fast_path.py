@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Exact-match fast path for Prana WhatsApp Bot
+Maps the most frequent normalized messages straight to their resolved route,
+so "hola", "menu", "1"-"9", "horarios"... skip the pattern cascade
+"""
+
+import glob
+import gzip
+import json
+import logging
+import re
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Where conversation logs are expected; rotated segments may be gzipped
+DEFAULT_LOG_GLOB = 'logs/conversations*.jsonl*'
+
+# How many of the most frequent logged messages are added to the table
+DEFAULT_TOP_N = 200
+
+# Regex alternatives that are plain text (safe to use as exact phrases)
+_LITERAL_RE = re.compile(r"^[\w áéíóúñü'-]+$")
+
+
+class Route(NamedTuple):
+    """Outcome of matching a message against the router"""
+    intent: str
+    reply: Callable[[], str]
+
+
+def normalize_message(message: str) -> str:
+    """Same normalization process_message applies before routing"""
+    return message.lower().strip()
+
+
+def intent_name(handler: Callable) -> str:
+    """Intent label for a handler: get_hours -> 'hours'"""
+    func = getattr(handler, 'func', handler)  # unwrap functools.partial
+    name = getattr(func, '__name__', 'unknown')
+    return name[4:] if name.startswith('get_') else name
+
+
+def pattern_literals(pattern: str) -> List[str]:
+    """Plain-text alternatives of a router regex, e.g. '(hora|horario)' -> ['hora', 'horario']"""
+    literals = []
+    for alternative in pattern.strip('()').split('|'):
+        alternative = alternative.strip('()')
+        if alternative and _LITERAL_RE.match(alternative):
+            literals.append(alternative)
+    return literals
+
+
+def router_phrases(bot) -> List[str]:
+    """Collect exact phrases from a bot's router definitions"""
+    phrases = [str(number) for number in range(1, 10)]
+
+    for pattern in getattr(bot, 'qa_patterns', {}):
+        phrases.extend(pattern_literals(pattern))
+
+    for category, keywords in getattr(bot, 'categories', {}).items():
+        phrases.append(category)
+        phrases.extend(keywords)
+
+    for attr in ('GREETING_WORDS', 'GOODBYE_WORDS', 'POSITIVE_WORDS', 'MENU_WORDS'):
+        phrases.extend(getattr(bot, attr, ()))
+
+    return phrases
+
+
+def iter_logged_messages(paths: Iterable[str]) -> Iterable[str]:
+    """Yield the inbound message of every record in JSONL conversation logs"""
+    for path in paths:
+        opener = gzip.open if path.endswith('.gz') else open
+        try:
+            with opener(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        message = json.loads(line).get('message')
+                    except (ValueError, AttributeError):
+                        continue
+                    if message:
+                        yield message
+        except OSError as e:
+            logger.warning(f"⚠️ Could not read conversation log {path}: {e}")
+
+
+def mine_top_messages(log_glob: str = DEFAULT_LOG_GLOB, top_n: int = DEFAULT_TOP_N) -> List[str]:
+    """Most frequent normalized messages found in the conversation logs"""
+    counts = Counter(normalize_message(message) for message in iter_logged_messages(sorted(glob.glob(log_glob))))
+    return [message for message, _ in counts.most_common(top_n)]
+
+
+def build_fast_path(resolve: Callable[[str], Optional[Route]], phrases: Iterable[str],
+                    skip_intents: Iterable[str] = ('help',)) -> Dict[str, Route]:
+    """
+    Resolve every phrase once and keep the results in a dict.
+
+    Routes whose intent is in `skip_intents` are left out so those messages
+    keep going through the full cascade (e.g. the help fallback).
+    """
+    skip_intents = set(skip_intents)
+    table: Dict[str, Route] = {}
+
+    for phrase in phrases:
+        key = normalize_message(phrase)
+        if not key or key in table:
+            continue
+        route = resolve(key)
+        if route is not None and route.intent not in skip_intents:
+            table[key] = route
+
+    return table
+
+
+def refresh_fast_path(table: Dict[str, Route], resolve: Callable[[str], Optional[Route]], phrases: Iterable[str],
+                      skip_intents: Iterable[str] = ('help',)) -> Dict[str, Route]:
+    """
+    Copy of `table` with only `phrases` resolved again, e.g. the ones that
+    name an edited menu item. Returned as a new dict so request threads keep
+    reading a complete table.
+    """
+    skip_intents = set(skip_intents)
+    table = dict(table)
+
+    for key in {normalize_message(phrase) for phrase in phrases} - {''}:
+        route = resolve(key)
+        if route is not None and route.intent not in skip_intents:
+            table[key] = route
+        else:
+            table.pop(key, None)
+
+    return table
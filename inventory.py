@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Inventory Availability
+Links menu items to inventory articles through their ingredients, so an item
+is hidden as soon as one of its ingredients runs out.
+
+    item -> ingredients -> inventory articles       (recipes)
+    article -> ingredients -> items                 (reverse index)
+
+Stock updates walk the reverse index, so only the items that use a changed
+article are re-checked.
+"""
+
+import json
+import logging
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from menu_model import MenuIndex, MenuItem
+
+logger = logging.getLogger(__name__)
+
+
+def ingredient_key(name: str) -> str:
+    """Lowercase, accent-free, single-spaced: 'Piña ' -> 'pina'"""
+    name = unicodedata.normalize('NFKD', str(name).lower())
+    name = ''.join(ch for ch in name if not unicodedata.combining(ch))
+    return ' '.join(re.findall(r'[a-z0-9]+', name))
+
+
+class InventoryIndex:
+    """
+    Availability of menu items given ingredient stock.
+
+    Ingredients that match no inventory article are untracked and never make
+    an item unavailable, so a partial inventory only hides what it knows about.
+    """
+
+    def __init__(self, menu_index: MenuIndex, stock: Optional[Dict[str, float]] = None,
+                 recipes: Optional[Dict[str, List[str]]] = None):
+        self.menu_index = menu_index
+        self.stock: Dict[str, float] = {ingredient_key(name): float(qty) for name, qty in (stock or {}).items()}
+        self.recipe_overrides = {name.lower(): ingredients for name, ingredients in (recipes or {}).items()}
+
+        # Article word sets, to match "manzana verde" against "MANZANA VERDE KG"
+        self.article_words = {article: set(article.split()) for article in self.stock}
+
+        self.recipes: Dict[str, Tuple[str, ...]] = {}
+        self.articles: Dict[str, Tuple[str, ...]] = {}
+        self.items_by_ingredient: Dict[str, List[MenuItem]] = {}
+        self.ingredients_by_article: Dict[str, Set[str]] = {}
+
+        for item in menu_index.items:
+            self._link(item)
+
+        self.unavailable: Set[str] = {item.name_lower for item in menu_index.items if not self._compute(item)}
+        self._views: Dict[Tuple[str, str], Tuple[MenuItem, ...]] = {}
+
+    def _link(self, item: MenuItem):
+        """Add an item to the recipe and ingredient indexes"""
+        ingredients = self.recipe_overrides.get(item.name_lower, item.ingredients)
+        keys = tuple(dict.fromkeys(key for key in map(ingredient_key, ingredients) if key))
+        self.recipes[item.name_lower] = keys
+        for key in keys:
+            self.items_by_ingredient.setdefault(key, []).append(item)
+            if key not in self.articles:
+                words = set(key.split())
+                self.articles[key] = tuple(a for a, a_words in self.article_words.items() if words <= a_words)
+                for article in self.articles[key]:
+                    self.ingredients_by_article.setdefault(article, set()).add(key)
+
+    def _unlink(self, item: MenuItem):
+        for key in self.recipes.pop(item.name_lower, ()):
+            users = self.items_by_ingredient.get(key, [])
+            users[:] = [other for other in users if other is not item]
+        self.unavailable.discard(item.name_lower)
+
+    def _in_stock(self, ingredient: str) -> bool:
+        articles = self.articles.get(ingredient, ())
+        return not articles or any(self.stock[article] > 0 for article in articles)
+
+    def _compute(self, item: MenuItem) -> bool:
+        return item.available and all(self._in_stock(key) for key in self.recipes.get(item.name_lower, ()))
+
+    def is_available(self, item: MenuItem) -> bool:
+        return item.name_lower not in self.unavailable
+
+    def filter(self, items: Iterable[MenuItem]) -> List[MenuItem]:
+        """Keep the available items, in the given order"""
+        return [item for item in items if item.name_lower not in self.unavailable]
+
+    def category(self, category: str) -> Tuple[MenuItem, ...]:
+        """Available items in a category (cached until its availability changes)"""
+        key = ('category', category.lower())
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = tuple(self.filter(self.menu_index.category(category)))
+        return view
+
+    def tagged(self, tag: str) -> Tuple[MenuItem, ...]:
+        """Available items carrying a tag (cached until its availability changes)"""
+        key = ('tag', tag.lower())
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = tuple(self.filter(self.menu_index.tagged(tag)))
+        return view
+
+    def update_stock(self, changes: Dict[str, float]) -> List[MenuItem]:
+        """
+        Apply new article quantities and re-check only the items using them.
+        Returns the items whose availability flipped.
+        """
+        affected: Dict[str, MenuItem] = {}
+        for name, quantity in changes.items():
+            article = ingredient_key(name)
+            if article not in self.stock:
+                # New articles are only picked up by a full rebuild
+                continue
+            self.stock[article] = float(quantity)
+            for ingredient in self.ingredients_by_article.get(article, ()):
+                for item in self.items_by_ingredient[ingredient]:
+                    affected[item.name_lower] = item
+
+        flipped = []
+        for name, item in affected.items():
+            available = self._compute(item)
+            if available == (name in self.unavailable):
+                flipped.append(item)
+                if available:
+                    self.unavailable.discard(name)
+                else:
+                    self.unavailable.add(name)
+
+        for item in flipped:
+            self._invalidate(item)
+
+        return flipped
+
+    def _invalidate(self, item: MenuItem):
+        self._views.pop(('category', item.category_id), None)
+        for tag in item.tags:
+            self._views.pop(('tag', tag), None)
+
+    def replace_item(self, old: Optional[MenuItem], new: Optional[MenuItem]):
+        """
+        Re-index one edited item (old=None adds, new=None removes). Call after
+        MenuIndex.replace(); only the views the two items appear in are dropped.
+        """
+        if old is not None:
+            self._unlink(old)
+            self._invalidate(old)
+        if new is not None:
+            self._link(new)
+            if not self._compute(new):
+                self.unavailable.add(new.name_lower)
+            self._invalidate(new)
+
+
+def load_json(path: str) -> Optional[dict]:
+    """Read an optional JSON file (None if it does not exist)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_inventory(menu_index: MenuIndex, levels_path: str, recipes_path: str) -> InventoryIndex:
+    """Build the index from inventory_levels.json and recipes.json (both optional)"""
+    return InventoryIndex(menu_index, load_json(levels_path), load_json(recipes_path))
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Menu Admin
+Live menu edits (create, update, delete, toggle availability) for the admin
+API in app.py.
+
+Each edit is written to the menu catalogue and patched into
+bot_data/menu_items.json and menu_structure.json (atomic rewrites under a
+file lock, so concurrent workers don't lose each other's edits). The worker
+that made the edit patches its in-memory indexes for that one item; every
+other worker sees the changed files through the snapshot staleness check and
+reloads.
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from build_manifest import write_json_atomic
+from menu_catalogue import DEFAULT_CATALOGUE, MENU_TEMPLATE, open_catalogue
+from menu_import import column_name, validate_row
+from menu_model import MenuItem
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LOCK_FILE = '.menu_admin.lock'
+
+
+class AdminError(Exception):
+    """A rejected edit; `status` is the HTTP status to answer with"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def structure_entry(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Entry of menu_structure.json for an item (same shape whatsapp_bot_setup.py writes)"""
+    return {
+        'name': item['name'],
+        'price': item.get('price'),
+        'available': item.get('available', True),
+        'description': item.get('description', ''),
+        'ingredients': item.get('ingredients', []),
+    }
+
+
+class MenuAdmin:
+    """Applies admin edits to the catalogue, the bot_data/ files and a live bot"""
+
+    def __init__(self, bot, data_dir: str = 'bot_data', catalogue_path: Optional[str] = DEFAULT_CATALOGUE,
+                 template_path: str = MENU_TEMPLATE):
+        self.bot = bot
+        self.data_dir = data_dir
+        self.catalogue_path = catalogue_path
+        self.template_path = template_path
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            with open(os.path.join(self.data_dir, LOCK_FILE), 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.data_dir, name)
+
+    @staticmethod
+    def _validate(data: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(data, dict):
+            raise AdminError("expected a JSON object")
+        fields, errors = validate_row({column_name(key): value for key, value in data.items()})
+        if errors:
+            raise AdminError('; '.join(errors))
+        return fields
+
+    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        fields = self._validate(data)
+        if 'category' not in fields:
+            raise AdminError("new item needs a category")
+        return self._edit(None, lambda old: {'available': True, 'ingredients': [], 'description': '', **fields})
+
+    def update(self, name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge the given fields into an item; fields not given are kept"""
+        if not isinstance(data, dict):
+            raise AdminError("expected a JSON object")
+        fields = self._validate({'name': name, **data})
+        if 'name' not in data:
+            # Keep the stored spelling of the name
+            del fields['name']
+        return self._edit(name, lambda old: {**old, **fields})
+
+    def set_available(self, name: str, available: Any = None) -> Dict[str, Any]:
+        """Set availability, or flip it when `available` is None"""
+        if available is None:
+            return self._edit(name, lambda old: {**old, 'available': not old.get('available', True)})
+        value = self._validate({'name': name, 'available': available}).get('available')
+        if value is None:
+            raise AdminError(f"invalid available value {available!r}")
+        return self._edit(name, lambda old: {**old, 'available': value})
+
+    def delete(self, name: str) -> Dict[str, Any]:
+        removed = {}
+
+        def drop(old):
+            removed.update(old)
+            return None
+
+        self._edit(name, drop)
+        return removed
+
+    def _edit(self, name: Optional[str], change: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]):
+        """
+        Read-modify-write one item under the lock. `name` None creates an item;
+        `change` maps the current item dict to the new one (None deletes).
+        """
+        with self._locked():
+            # Another worker edited the files since this bot loaded them: the
+            # in-memory indexes can't be patched, they are reloaded instead
+            behind = self.bot.snapshot.is_stale()
+
+            items: List[Dict[str, Any]] = self._read('menu_items.json')
+            structure: Dict[str, List[Dict[str, Any]]] = self._read('menu_structure.json')
+            names = {str(item.get('name', '')).lower(): row for row, item in enumerate(items)}
+
+            if name is None:
+                old, row = None, None
+            else:
+                row = names.get(name.lower())
+                if row is None:
+                    raise AdminError(f"no menu item named {name!r}", status=404)
+                old = items[row]
+
+            new = change(dict(old or {}))
+            if new is not None:
+                clash = names.get(new['name'].lower())
+                if clash is not None and clash != row:
+                    raise AdminError(f"an item named {new['name']!r} already exists", status=409)
+
+            self._save_catalogue(old, new)
+            self._patch_files(items, structure, row, old, new)
+
+            if behind:
+                self.bot.reload()
+            else:
+                old_item = self.bot.menu_index.by_name.get(old['name'].lower()) if old else None
+                self.bot.apply_menu_change(old_item, MenuItem.from_dict(new) if new else None)
+
+        action = 'created' if old is None else 'deleted' if new is None else 'updated'
+        logger.info(f"✏️ Menu item {action}: {(new or old)['name']}")
+        return new
+
+    def _read(self, name: str):
+        with open(self._path(name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _patch_files(self, items: List[Dict[str, Any]], structure: Dict[str, List[Dict[str, Any]]],
+                     row: Optional[int], old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        if row is None:
+            items.append(new)
+        elif new is None:
+            del items[row]
+        else:
+            items[row] = new
+
+        # menu_structure.json lists the same items per category
+        position: Optional[Tuple[str, int]] = None
+        if old is not None:
+            entries = structure.get(old.get('category'), [])
+            for index, entry in enumerate(entries):
+                if str(entry.get('name', '')).lower() == old['name'].lower():
+                    del entries[index]
+                    position = (old.get('category'), index)
+                    break
+        if new is not None:
+            if position and position[0] == new.get('category'):
+                structure[position[0]].insert(position[1], structure_entry(new))
+            else:
+                structure.setdefault(new['category'], []).append(structure_entry(new))
+
+        write_json_atomic(self._path('menu_items.json'), items)
+        write_json_atomic(self._path('menu_structure.json'), structure)
+
+    def _save_catalogue(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """Mirror the edit into the catalogue (the menu's source of truth) and its template export"""
+        if not self.catalogue_path:
+            return
+        with open_catalogue(self.catalogue_path, self.template_path) as catalogue:
+            with catalogue.conn:
+                if old is not None and (new is None or new['name'].lower() != old['name'].lower()):
+                    catalogue.conn.execute("DELETE FROM items_fts WHERE rowid IN (SELECT id FROM items WHERE name = ?)",
+                                           (old['name'],))
+                    catalogue.conn.execute("DELETE FROM items WHERE name = ?", (old['name'],))
+                if new is not None:
+                    catalogue.upsert(new)
+            catalogue.export_json(self.template_path)
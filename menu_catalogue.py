@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Menu Catalogue
+SQLite source of truth for the menu: items, categories, ingredients, tags,
+locations and aliases in their own tables, plus an FTS5 index for search.
+
+add_menu_items.py writes through MenuCatalogue (one transaction per change,
+WAL mode so edits and readers don't block each other). The bots read through
+CatalogueReader, a read-only connection per thread running fixed SQL, so
+sqlite's statement cache keeps each query prepared. menu_template.json is
+exported from here and stays the input of the bot_data/ build.
+
+Usage:
+    python menu_catalogue.py import [menu_template.json]   # load or merge a JSON menu
+    python menu_catalogue.py export [menu_template.json]   # write the JSON menu
+    python menu_catalogue.py search "frutos rojos"         # full-text search
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from build_manifest import write_json_atomic
+from menu_model import STOPWORDS, price_to_cents
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOGUE = 'menu_catalogue.db'
+MENU_TEMPLATE = 'menu_template.json'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    position INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    price_cents INTEGER,
+    description TEXT NOT NULL DEFAULT '',
+    available INTEGER NOT NULL DEFAULT 1,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_category ON items(category_id, position);
+CREATE INDEX IF NOT EXISTS items_position ON items(position);
+CREATE TABLE IF NOT EXISTS ingredients (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS item_ingredients (
+    item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+    ingredient_id INTEGER NOT NULL REFERENCES ingredients(id),
+    position INTEGER NOT NULL,
+    label TEXT NOT NULL,  -- as written on this item ("Jengibre" / "jengibre")
+    PRIMARY KEY (item_id, ingredient_id)
+);
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS item_tags (
+    item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+    tag_id INTEGER NOT NULL REFERENCES tags(id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (item_id, tag_id)
+);
+CREATE INDEX IF NOT EXISTS item_tags_tag ON item_tags(tag_id);
+CREATE TABLE IF NOT EXISTS item_aliases (
+    item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+    alias TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (item_id, alias)
+);
+CREATE TABLE IF NOT EXISTS locations (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS item_locations (
+    item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+    location_id INTEGER NOT NULL REFERENCES locations(id),
+    PRIMARY KEY (item_id, location_id)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    name, category, ingredients, tags, description,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Column weights for bm25(): a hit in the name counts most
+FTS_WEIGHTS = (10.0, 2.0, 4.0, 3.0, 1.0)
+
+ITEM_COLUMNS = """
+    SELECT i.id, i.name, c.name, i.price_cents, i.description, i.available,
+           (SELECT json_group_array(name) FROM (
+                SELECT ig.label AS name FROM item_ingredients ig
+                WHERE ig.item_id = i.id ORDER BY ig.position)),
+           (SELECT json_group_array(name) FROM (
+                SELECT t.name FROM item_tags it JOIN tags t ON t.id = it.tag_id
+                WHERE it.item_id = i.id ORDER BY it.position)),
+           (SELECT json_group_array(name) FROM (
+                SELECT l.name FROM item_locations il JOIN locations l ON l.id = il.location_id
+                WHERE il.item_id = i.id ORDER BY l.name)),
+           (SELECT json_group_array(alias) FROM (
+                SELECT alias FROM item_aliases WHERE item_id = i.id ORDER BY position))
+    FROM items i JOIN categories c ON c.id = i.category_id
+"""
+
+SQL_ALL_ITEMS = ITEM_COLUMNS + " ORDER BY i.position"
+SQL_ITEM_BY_NAME = ITEM_COLUMNS + " WHERE i.name = ?"
+SQL_ITEMS_IN_CATEGORY = ITEM_COLUMNS + " WHERE c.name = ? ORDER BY i.position"
+SQL_ITEMS_TAGGED = ITEM_COLUMNS + """
+    WHERE i.id IN (SELECT it.item_id FROM item_tags it JOIN tags t ON t.id = it.tag_id WHERE t.name = ?)
+    ORDER BY i.position
+"""
+SQL_SEARCH = f"""
+    SELECT i.name FROM items_fts f JOIN items i ON i.id = f.rowid
+    WHERE items_fts MATCH ?
+    ORDER BY bm25(items_fts, {', '.join(map(str, FTS_WEIGHTS))}), i.position
+    LIMIT ?
+"""
+SQL_CATEGORIES = "SELECT name FROM categories ORDER BY position, id"
+
+
+def row_to_dict(row) -> Dict[str, Any]:
+    """Catalogue row -> the item dict used by menu_template.json"""
+    _, name, category, price_cents, description, available, ingredients, tags, locations, aliases = row
+    item = {
+        'name': name,
+        'price': price_cents / 100 if price_cents is not None else None,
+        'category': category,
+        'ingredients': json.loads(ingredients),
+        'description': description,
+        'available': bool(available),
+    }
+    tags = json.loads(tags)
+    if tags:
+        item['tags'] = tags
+    locations = json.loads(locations)
+    if locations:
+        item['locations'] = locations
+    aliases = json.loads(aliases)
+    if aliases:
+        item['aliases'] = aliases
+    return item
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Free text -> FTS5 query matching any meaningful word. Words of four or
+    more letters also match as a prefix ("fresa" finds "fresas").
+    """
+    words = [word for word in re.findall(r'\w+', text.lower()) if word not in STOPWORDS]
+    if not words:
+        return None
+    return ' OR '.join(f'"{word}"*' if len(word) >= 4 else f'"{word}"' for word in dict.fromkeys(words))
+
+
+class MenuCatalogue:
+    """Read-write access to the catalogue; every public write is one transaction"""
+
+    def __init__(self, path: str = DEFAULT_CATALOGUE):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=10.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> 'MenuCatalogue':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _id(self, table: str, name: str) -> int:
+        """Id of a row in a name-keyed lookup table, inserting it if new"""
+        row = self.conn.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()
+        if row:
+            return row[0]
+        if table == 'categories':
+            position = self.conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM categories").fetchone()[0]
+            return self.conn.execute("INSERT INTO categories (name, position) VALUES (?, ?)",
+                                     (name, position)).lastrowid
+        return self.conn.execute(f"INSERT INTO {table} (name) VALUES (?)", (name,)).lastrowid
+
+    def upsert(self, item: Dict[str, Any]) -> int:
+        """Insert or update (by name) one item inside the caller's transaction"""
+        name = str(item['name']).strip()
+        if not name:
+            raise ValueError("Menu item needs a name")
+        category_id = self._id('categories', str(item.get('category') or 'Otros'))
+        fields = (category_id, price_to_cents(item.get('price')), str(item.get('description') or ''),
+                  int(bool(item.get('available', True))))
+
+        row = self.conn.execute("SELECT id FROM items WHERE name = ?", (name,)).fetchone()
+        if row:
+            item_id = row[0]
+            self.conn.execute(
+                "UPDATE items SET category_id = ?, price_cents = ?, description = ?, available = ? WHERE id = ?",
+                fields + (item_id,))
+            for table in ('item_ingredients', 'item_tags', 'item_locations', 'item_aliases'):
+                self.conn.execute(f"DELETE FROM {table} WHERE item_id = ?", (item_id,))
+        else:
+            position = self.conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM items").fetchone()[0]
+            item_id = self.conn.execute(
+                "INSERT INTO items (category_id, price_cents, description, available, name, position) "
+                "VALUES (?, ?, ?, ?, ?, ?)", fields + (name, position)).lastrowid
+
+        ingredients = item.get('ingredients') or []
+        if isinstance(ingredients, str):
+            ingredients = [ingredients]
+        unique: Dict[str, str] = {}
+        for ingredient in map(str.strip, map(str, ingredients)):
+            if ingredient:
+                unique.setdefault(ingredient.lower(), ingredient)
+        ingredients = list(unique.values())
+        tags = list(dict.fromkeys(str(tag).strip().lower() for tag in item.get('tags') or [] if str(tag).strip()))
+        locations = sorted({str(loc).strip() for loc in item.get('locations') or [] if str(loc).strip()})
+        aliases = list(dict.fromkeys(str(alias).strip().lower() for alias in item.get('aliases') or []
+                                     if str(alias).strip()))
+
+        self.conn.executemany(
+            "INSERT INTO item_ingredients (item_id, ingredient_id, position, label) VALUES (?, ?, ?, ?)",
+            [(item_id, self._id('ingredients', ing), pos, ing) for pos, ing in enumerate(ingredients)])
+        self.conn.executemany("INSERT INTO item_tags (item_id, tag_id, position) VALUES (?, ?, ?)",
+                              [(item_id, self._id('tags', tag), pos) for pos, tag in enumerate(tags)])
+        self.conn.executemany("INSERT INTO item_locations (item_id, location_id) VALUES (?, ?)",
+                              [(item_id, self._id('locations', loc)) for loc in locations])
+        self.conn.executemany("INSERT INTO item_aliases (item_id, alias, position) VALUES (?, ?, ?)",
+                              [(item_id, alias, pos) for pos, alias in enumerate(aliases)])
+
+        self.conn.execute("DELETE FROM items_fts WHERE rowid = ?", (item_id,))
+        self.conn.execute(
+            "INSERT INTO items_fts (rowid, name, category, ingredients, tags, description) VALUES (?, ?, ?, ?, ?, ?)",
+            (item_id, name, str(item.get('category') or 'Otros'), ' '.join(ingredients), ' '.join(tags),
+             str(item.get('description') or '')))
+        return item_id
+
+    def add_item(self, item: Dict[str, Any]) -> int:
+        """Insert or update (by name) one item; returns its id"""
+        with self.conn:
+            return self.upsert(item)
+
+    def add_items(self, items: Iterable[Dict[str, Any]]) -> int:
+        """Insert or update many items in a single transaction; returns how many"""
+        count = 0
+        with self.conn:
+            for item in items:
+                self.upsert(item)
+                count += 1
+        return count
+
+    def remove_item(self, name: str) -> bool:
+        with self.conn:
+            row = self.conn.execute("SELECT id FROM items WHERE name = ?", (name,)).fetchone()
+            if not row:
+                return False
+            self.conn.execute("DELETE FROM items_fts WHERE rowid = ?", row)
+            self.conn.execute("DELETE FROM items WHERE id = ?", row)
+            return True
+
+    def add_categories(self, names: Iterable[str]):
+        """Register categories (keeps their order for listings and exports)"""
+        with self.conn:
+            for name in names:
+                self._id('categories', name)
+
+    def item(self, name: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(SQL_ITEM_BY_NAME, (name,)).fetchone()
+        return row_to_dict(row) if row else None
+
+    def items(self) -> List[Dict[str, Any]]:
+        return [row_to_dict(row) for row in self.conn.execute(SQL_ALL_ITEMS)]
+
+    def categories(self) -> List[str]:
+        return [row[0] for row in self.conn.execute(SQL_CATEGORIES)]
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def import_json(self, path: str = MENU_TEMPLATE) -> int:
+        """Merge a menu_template.json-style file into the catalogue"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            data = {'menu_items': data}
+        with self.conn:
+            for name in data.get('categories', []):
+                self._id('categories', name)
+            for item in data.get('menu_items', []):
+                self.upsert(item)
+        return len(data.get('menu_items', []))
+
+    def export_json(self, path: str = MENU_TEMPLATE):
+        """Write menu_template.json (atomically) from the catalogue"""
+        write_json_atomic(path, {'menu_items': self.items(), 'categories': self.categories()})
+
+
+def open_catalogue(path: str = DEFAULT_CATALOGUE, template: str = MENU_TEMPLATE) -> MenuCatalogue:
+    """Open the catalogue, seeding it from menu_template.json on first use"""
+    catalogue = MenuCatalogue(path)
+    if len(catalogue) == 0 and os.path.exists(template):
+        count = catalogue.import_json(template)
+        logger.info(f"✅ Catalogue seeded with {count} items from {template}")
+    return catalogue
+
+
+class CatalogueReader:
+    """
+    Read-only query layer for the bots. Each thread gets its own connection;
+    the SQL strings are module constants, so every query after the first
+    reuses its prepared statement from the connection's statement cache.
+    """
+
+    def __init__(self, path: str = DEFAULT_CATALOGUE):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            uri = f"file:{os.path.abspath(self.path)}?mode=ro"
+            conn = self._local.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        return conn
+
+    def search(self, text: str, limit: int = 10) -> List[str]:
+        """Names of the best full-text matches, best first"""
+        query = fts_query(text)
+        if query is None:
+            return []
+        try:
+            return [row[0] for row in self.conn.execute(SQL_SEARCH, (query, limit))]
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Catalogue search failed: {e}")
+            return []
+
+    def item(self, name: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(SQL_ITEM_BY_NAME, (name,)).fetchone()
+        return row_to_dict(row) if row else None
+
+    def category(self, name: str) -> List[Dict[str, Any]]:
+        return [row_to_dict(row) for row in self.conn.execute(SQL_ITEMS_IN_CATEGORY, (name,))]
+
+    def tagged(self, tag: str) -> List[Dict[str, Any]]:
+        return [row_to_dict(row) for row in self.conn.execute(SQL_ITEMS_TAGGED, (tag.lower(),))]
+
+    def categories(self) -> List[str]:
+        return [row[0] for row in self.conn.execute(SQL_CATEGORIES)]
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Prana menu catalogue")
+    parser.add_argument('command', choices=['import', 'export', 'search'])
+    parser.add_argument('arg', nargs='?', help="JSON file for import/export, query for search")
+    parser.add_argument('--db', default=DEFAULT_CATALOGUE)
+    args = parser.parse_args()
+
+    if args.command == 'search':
+        for name in CatalogueReader(args.db).search(args.arg or ''):
+            print(f"🔍 {name}")
+        return
+
+    with MenuCatalogue(args.db) as catalogue:
+        path = args.arg or MENU_TEMPLATE
+        if args.command == 'import':
+            count = catalogue.import_json(path)
+            print(f"✅ Imported {count} items from {path} ({len(catalogue)} in catalogue)")
+        else:
+            catalogue.export_json(path)
+            print(f"✅ Exported {len(catalogue)} items to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Bulk Menu Import
+Streams menu rows from CSV, JSONL or XLSX into the menu catalogue.
+
+Rows are read one at a time and validated in batches; every error is
+reported with its row number. Valid rows are merged into the catalogue by
+item name (columns missing from the file keep their current value), all in
+one transaction: the import commits only if every row is valid. A dry run
+prints the diff against the catalogue and rolls back.
+
+Columns: name, price, category, ingredients, description, available, tags,
+locations, aliases. List columns are comma or semicolon separated in CSV/XLSX and
+may be JSON arrays in JSONL.
+"""
+
+import csv
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from menu_catalogue import MenuCatalogue
+from menu_model import price_to_cents
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+# Errors kept for the report; the rest are only counted
+MAX_REPORTED_ERRORS = 200
+
+COLUMNS = ('name', 'price', 'category', 'ingredients', 'description', 'available', 'tags', 'locations', 'aliases')
+LIST_COLUMNS = ('ingredients', 'tags', 'locations', 'aliases')
+
+# Spanish headers used by the existing menu files
+COLUMN_ALIASES = {
+    'nombre': 'name', 'producto': 'name', 'precio': 'price', 'categoria': 'category',
+    'categoría': 'category', 'ingredientes': 'ingredients', 'descripcion': 'description',
+    'descripción': 'description', 'disponible': 'available', 'etiquetas': 'tags',
+    'ubicaciones': 'locations', 'sucursales': 'locations', 'alias': 'aliases',
+}
+
+TRUE_WORDS = {'1', 'true', 'yes', 'y', 's', 'si', 'sí', 'x'}
+FALSE_WORDS = {'0', 'false', 'no', 'n'}
+
+
+class RowError(NamedTuple):
+    row: int
+    message: str
+
+
+class ImportReport:
+    """Counts, errors and (for dry runs) diff lines of one import"""
+
+    def __init__(self):
+        self.rows = 0
+        self.added = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.error_count = 0
+        self.errors: List[RowError] = []
+        self.committed = False
+
+    def error(self, row: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(row, message))
+
+    def summary(self) -> str:
+        return (f"{self.rows} rows: {self.added} added, {self.updated} updated, "
+                f"{self.unchanged} unchanged, {self.error_count} errors")
+
+
+def column_name(header: Any) -> str:
+    key = str(header or '').strip().lower()
+    return COLUMN_ALIASES.get(key, key)
+
+
+def iter_csv(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = [column_name(cell) for cell in next(reader, [])]
+        for number, values in enumerate(reader, start=2):
+            if any(value.strip() for value in values):
+                yield number, dict(zip(header, values))
+
+
+def iter_jsonl(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, {'__error__': f"invalid JSON: {e}"}
+                continue
+            if not isinstance(record, dict):
+                yield number, {'__error__': "expected a JSON object"}
+                continue
+            yield number, {column_name(key): value for key, value in record.items()}
+
+
+def iter_xlsx(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        logger.error("❌ openpyxl not installed. Install with: pip install openpyxl")
+        raise
+
+    # read_only streams rows from the sheet XML instead of loading the workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [column_name(cell) for cell in next(rows, ())]
+        for number, values in enumerate(rows, start=2):
+            if any(value not in (None, '') for value in values):
+                yield number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+READERS = {'.csv': iter_csv, '.jsonl': iter_jsonl, '.xlsx': iter_xlsx}
+
+
+def iter_rows(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(row number, raw row) pairs, streamed from the file"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in READERS:
+        raise ValueError(f"Unsupported file type {ext!r} (use {', '.join(READERS)})")
+    return READERS[ext](path)
+
+
+def batched(rows: Iterable, size: int = BATCH_SIZE) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def split_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(part).strip() for part in value if str(part).strip()]
+    return [part.strip() for part in re.split(r'[;,]', str(value)) if part.strip()]
+
+
+def validate_row(raw: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """
+    Clean one raw row into catalogue fields. Only columns present (and
+    non-empty) in the row are returned, so a merge leaves the others alone.
+    """
+    if '__error__' in raw:
+        return None, [raw['__error__']]
+
+    errors = []
+    fields: Dict[str, Any] = {}
+    present = {key: value for key, value in raw.items()
+               if key in COLUMNS and value is not None and str(value).strip() != ''}
+
+    name = str(present.get('name', '')).strip()
+    if not name:
+        errors.append("missing name")
+    elif len(name) > 100:
+        errors.append("name longer than 100 characters")
+    fields['name'] = name
+
+    if 'price' in present:
+        price = present['price']
+        cents = price_to_cents(re.sub(r'[$\s]', '', str(price)).replace(',', '.')
+                               if isinstance(price, str) else price)
+        if cents is None or cents < 0:
+            errors.append(f"invalid price {price!r}")
+        else:
+            fields['price'] = cents / 100
+
+    if 'available' in present:
+        value = present['available']
+        word = str(value).strip().lower()
+        if isinstance(value, bool):
+            fields['available'] = value
+        elif word in TRUE_WORDS:
+            fields['available'] = True
+        elif word in FALSE_WORDS:
+            fields['available'] = False
+        else:
+            errors.append(f"invalid available value {value!r}")
+
+    for column in ('category', 'description'):
+        if column in present:
+            fields[column] = str(present[column]).strip()
+
+    for column in LIST_COLUMNS:
+        if column in present:
+            value = present[column]
+            if isinstance(value, str) and value.strip().startswith('['):
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    errors.append(f"invalid {column} list {value!r}")
+                    continue
+            fields[column] = split_list(value)
+
+    return (None if errors else fields), errors
+
+
+def describe_changes(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    return [f"{key} {old.get(key)!r} -> {new.get(key)!r}"
+            for key in COLUMNS if key != 'name' and old.get(key) != new.get(key)]
+
+
+def import_file(path: str, catalogue: MenuCatalogue, dry_run: bool = False,
+                batch_size: int = BATCH_SIZE, out=print) -> ImportReport:
+    """
+    Validate and merge every row of `path`. Commits only if there were no
+    errors and this is not a dry run; dry runs print one diff line per
+    added or changed item.
+    """
+    report = ImportReport()
+    conn = catalogue.conn
+    conn.execute("BEGIN IMMEDIATE")  # take the write lock for the whole import
+    try:
+        for batch in batched(iter_rows(path), batch_size):
+            validated = []
+            for number, raw in batch:
+                report.rows += 1
+                fields, errors = validate_row(raw)
+                for message in errors:
+                    report.error(number, message)
+                if fields is not None:
+                    validated.append((number, fields))
+
+            # Once any row failed nothing will be committed; keep validating only
+            if report.error_count:
+                continue
+
+            for number, fields in validated:
+                existing = catalogue.item(fields['name'])
+                if existing is None:
+                    if 'category' not in fields:
+                        report.error(number, "new item needs a category")
+                        continue
+                    item = {'available': True, **fields}
+                    report.added += 1
+                    if dry_run:
+                        out(f"+ row {number}: {item['name']} ({item['category']})")
+                else:
+                    # Keep the catalogue's spelling of the name
+                    item = {**existing, **fields, 'name': existing['name']}
+                    changes = describe_changes(existing, item)
+                    if not changes:
+                        report.unchanged += 1
+                        continue
+                    report.updated += 1
+                    if dry_run:
+                        out(f"~ row {number}: {item['name']}: {'; '.join(changes)}")
+                catalogue.upsert(item)
+
+        if report.error_count or dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+            report.committed = True
+    except BaseException:
+        conn.rollback()
+        raise
+    return report
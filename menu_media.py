@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Menu Media
+Builds channel-sized copies of the menu photos once, at setup time, into a
+content-addressed store (file name = hash of the encoded bytes), and loads
+the store's index for the bots and the Flask app.
+
+A file name never changes meaning, so the app can serve variants with a
+strong ETag and a year-long immutable Cache-Control; a re-encoded image
+simply gets a new name. Sources are only re-encoded when their bytes or the
+variant settings change.
+"""
+
+import glob
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from build_manifest import hash_file, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+MENU_IMAGES_DIR = 'menu_images'
+MEDIA_STORE = 'media_store'
+INDEX_FILE = 'index.json'
+
+# Bump when render_variant() changes so every variant is re-encoded
+MEDIA_VERSION = 1
+
+# WhatsApp shows images up to ~1600px and Twilio accepts up to 5 MB; the
+# preview is for the admin UI and link previews
+VARIANTS = {
+    'whatsapp': {'max_side': 1600, 'quality': 82},
+    'preview': {'max_side': 640, 'quality': 70},
+}
+DEFAULT_VARIANT = 'whatsapp'
+
+IMAGE_PATTERNS = ('*.jpg', '*.jpeg', '*.png', '*.webp')
+
+# Names handed out by the store: 24 hex digits of SHA-256 + extension
+MEDIA_NAME_RE = re.compile(r'^[0-9a-f]{24}\.jpg$')
+
+
+def natural_key(path: str) -> list:
+    """menu2.jpg before menu10.jpg"""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', os.path.basename(path).lower())]
+
+
+def variant_key(source_hash: str, settings: Dict[str, Any]) -> str:
+    payload = json.dumps([MEDIA_VERSION, source_hash, settings], sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def render_variant(path: str, max_side: int, quality: int) -> Dict[str, Any]:
+    """Resize (never upscale) and recompress one image as progressive JPEG"""
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+        return {'data': buffer.getvalue(), 'width': image.width, 'height': image.height}
+
+
+def store_bytes(store_dir: str, data: bytes) -> str:
+    """Write `data` under its content hash (no-op if already stored); returns the file name"""
+    name = f"{hashlib.sha256(data).hexdigest()[:24]}.jpg"
+    path = os.path.join(store_dir, name)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return name
+
+
+def load_index(store_dir: str = MEDIA_STORE) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(store_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {'images': {}}
+    return index if index.get('version') == MEDIA_VERSION else {'images': {}}
+
+
+def build_media(images_dir: str = MENU_IMAGES_DIR, store_dir: str = MEDIA_STORE, force: bool = False) -> Dict[str, Any]:
+    """
+    Encode every variant of every image in `images_dir` that is not in the
+    store yet, write the index and drop files no image refers to anymore.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    old_images = load_index(store_dir)['images']
+    sources = sorted({path for pattern in IMAGE_PATTERNS for path in glob.glob(os.path.join(images_dir, pattern))},
+                     key=natural_key)
+
+    images = {}
+    encoded = 0
+    for path in sources:
+        name = os.path.basename(path)
+        source_hash = hash_file(path)
+        previous = old_images.get(name, {}).get('variants', {})
+        variants = {}
+        for variant, settings in VARIANTS.items():
+            key = variant_key(source_hash, settings)
+            entry = previous.get(variant)
+            if (not force and entry and entry.get('key') == key
+                    and os.path.exists(os.path.join(store_dir, entry['file']))):
+                variants[variant] = entry
+                continue
+            try:
+                rendered = render_variant(path, **settings)
+            except ImportError:
+                logger.error("❌ Pillow not installed. Install with: pip install Pillow")
+                raise
+            except OSError as e:
+                logger.warning(f"⚠️ Skipping unreadable image {path}: {e}")
+                break
+            variants[variant] = {
+                'key': key,
+                'file': store_bytes(store_dir, rendered['data']),
+                'width': rendered['width'],
+                'height': rendered['height'],
+                'bytes': len(rendered['data']),
+            }
+            encoded += 1
+        if len(variants) == len(VARIANTS):
+            images[name] = {'source': source_hash, 'variants': variants}
+
+    index = {'version': MEDIA_VERSION, 'images': images}
+    write_json_atomic(os.path.join(store_dir, INDEX_FILE), index)
+
+    referenced = {entry['file'] for image in images.values() for entry in image['variants'].values()}
+    for path in glob.glob(os.path.join(store_dir, '*.jpg')):
+        if os.path.basename(path) not in referenced:
+            os.remove(path)
+
+    logger.info(f"🖼️ Menu media: {len(images)} images, {encoded} variants encoded")
+    return index
+
+
+class MenuMedia:
+    """Read side of the media store: which files to send, and where they are"""
+
+    def __init__(self, store_dir: str = MEDIA_STORE):
+        self.store_dir = os.path.abspath(store_dir)
+        self.images: Dict[str, Any] = load_index(store_dir)['images']
+
+    def __bool__(self) -> bool:
+        return bool(self.images)
+
+    def files(self, variant: str = DEFAULT_VARIANT) -> List[str]:
+        """Stored file names of one variant, in menu page order"""
+        return [image['variants'][variant]['file'] for image in self.images.values()
+                if variant in image['variants']]
+
+    def urls(self, base_url: str = '', variant: str = DEFAULT_VARIANT) -> List[str]:
+        return [f"{base_url.rstrip('/')}/media/{name}" for name in self.files(variant)]
+
+    def path(self, name: str) -> Optional[str]:
+        """Absolute path of a stored file, or None for anything that isn't one"""
+        if not MEDIA_NAME_RE.match(name):
+            return None
+        path = os.path.join(self.store_dir, name)
+        return path if os.path.isfile(path) else None
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the menu image variants")
+    parser.add_argument('--images', default=MENU_IMAGES_DIR)
+    parser.add_argument('--store', default=MEDIA_STORE)
+    parser.add_argument('--force', action='store_true', help="Re-encode every variant")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    index = build_media(args.images, args.store, force=args.force)
+    for name, image in index['images'].items():
+        sizes = ', '.join(f"{variant} {entry['width']}x{entry['height']} {entry['bytes'] // 1024} KB"
+                          for variant, entry in image['variants'].items())
+        print(f"🖼️ {name}: {sizes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Menu Model
+Immutable menu item records with derived fields precomputed at load time
+"""
+
+import bisect
+import json
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Words that say nothing about the item being looked for
+STOPWORDS = {
+    'a', 'al', 'algo', 'alguna', 'alguno', 'con', 'de', 'del', 'el', 'en', 'es', 'esta', 'hay',
+    'la', 'las', 'lo', 'los', 'me', 'mi', 'muy', 'o', 'para', 'por', 'que', 'quiero', 'se',
+    'sin', 'su', 'tienen', 'un', 'una', 'uno', 'y', 'ya',
+}
+
+
+def price_to_cents(price: Any) -> Optional[int]:
+    """Convert a price like 6.5 or "6.50" to integer cents (None if missing)"""
+    if price is None or isinstance(price, bool):
+        return None
+    try:
+        cents = Decimal(str(price)) * 100
+    except Exception:
+        return None
+    return int(cents.to_integral_value(rounding=ROUND_HALF_UP))
+
+
+class MenuItem:
+    """
+    Read-only menu item.
+
+    Built once by the loader so handlers never re-run .get(), .lower() or
+    the list-vs-string ingredients check on the request path.
+    """
+
+    __slots__ = (
+        'name', 'name_lower', 'category', 'category_id', 'price', 'price_cents',
+        'ingredients', 'ingredients_text', 'ingredients_lower', 'description',
+        'available', 'tags', 'aliases', 'price_label', 'list_line', 'bullet_line'
+    )
+
+    def __init__(self, name: str, price: Any, category: str, ingredients: Tuple[str, ...],
+                 description: str, available: bool, tags: Tuple[str, ...] = (), aliases: Tuple[str, ...] = ()):
+        ingredients_text = ', '.join(ingredients)
+        price_label = f"${price if price is not None else 'N/A'}"
+        fields = {
+            'name': name,
+            'name_lower': name.lower(),
+            'category': category,
+            'category_id': category.lower(),
+            'price': price,
+            'price_cents': price_to_cents(price),
+            'ingredients': ingredients,
+            'ingredients_text': ingredients_text,
+            'ingredients_lower': ingredients_text.lower(),
+            'description': description,
+            'available': available,
+            'tags': tags,
+            # Other names customers use when ordering ("jengibre shot")
+            'aliases': aliases,
+            'price_label': price_label,
+            'list_line': f"✅ {name} - {price_label}",
+            'bullet_line': f"• *{name}* - {price_label}",
+        }
+        for attr, value in fields.items():
+            object.__setattr__(self, attr, value)
+
+    def __setattr__(self, attr, value):
+        raise AttributeError(f"MenuItem is read-only (tried to set '{attr}')")
+
+    def __delattr__(self, attr):
+        raise AttributeError(f"MenuItem is read-only (tried to delete '{attr}')")
+
+    def __repr__(self) -> str:
+        return f"MenuItem({self.name!r}, {self.price_label}, {self.category!r})"
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], category: Optional[str] = None) -> 'MenuItem':
+        """Build an item from a menu_items.json / menu_template.json entry"""
+        ingredients = data.get('ingredients', [])
+        # Ingredients come either as a list or as a single free-text string
+        if isinstance(ingredients, (list, tuple)):
+            ingredients = tuple(str(ing) for ing in ingredients)
+        elif ingredients:
+            ingredients = (str(ingredients),)
+        else:
+            ingredients = ()
+
+        return cls(
+            name=str(data.get('name', 'Sin nombre')),
+            price=data.get('price'),
+            category=str(category if category is not None else data.get('category', 'Sin categoría')),
+            ingredients=ingredients,
+            description=str(data.get('description', '') or ''),
+            available=bool(data.get('available', True)),
+            tags=tuple(str(tag).strip().lower() for tag in data.get('tags', []) if str(tag).strip()),
+            aliases=tuple(str(alias).strip().lower() for alias in data.get('aliases', []) if str(alias).strip()),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert back to the JSON shape used by menu_items.json"""
+        data = {
+            'name': self.name,
+            'price': self.price,
+            'category': self.category,
+            'ingredients': list(self.ingredients),
+            'description': self.description,
+            'available': self.available,
+        }
+        if self.tags:
+            data['tags'] = list(self.tags)
+        if self.aliases:
+            data['aliases'] = list(self.aliases)
+        return data
+
+
+class MenuIndex:
+    """
+    Category and tag lookups built once per load.
+
+    Tags come from the "tags" field in menu_items.json, so adding a new tag
+    to the data makes it available here without any code change.
+    """
+
+    def __init__(self, items: List[MenuItem]):
+        self.items = tuple(items)
+
+        self.by_name: Dict[str, MenuItem] = {item.name_lower: item for item in self.items}
+        # Menu position of each item; new items get the next number, so
+        # buckets stay in menu order without renumbering on delete
+        self.position: Dict[str, int] = {item.name_lower: i for i, item in enumerate(self.items)}
+        self._next_position = len(self.items)
+
+        by_category: Dict[str, List[MenuItem]] = {}
+        by_tag: Dict[str, List[MenuItem]] = {}
+        for item in self.items:
+            by_category.setdefault(item.category_id, []).append(item)
+            for tag in item.tags:
+                by_tag.setdefault(tag, []).append(item)
+
+        self.by_category: Dict[str, Tuple[MenuItem, ...]] = {
+            key: tuple(value) for key, value in by_category.items()
+        }
+        self.by_tag: Dict[str, Tuple[MenuItem, ...]] = {
+            key: tuple(value) for key, value in by_tag.items()
+        }
+
+    def category(self, category: str) -> Tuple[MenuItem, ...]:
+        """Items in a category (case insensitive), in menu order"""
+        return self.by_category.get(category.lower(), ())
+
+    def tagged(self, tag: str) -> Tuple[MenuItem, ...]:
+        """Items carrying a tag, in menu order"""
+        return self.by_tag.get(tag.lower(), ())
+
+    @staticmethod
+    def _bucket_remove(buckets: Dict[str, Tuple[MenuItem, ...]], key: str, item: MenuItem):
+        bucket = tuple(other for other in buckets.get(key, ()) if other is not item)
+        if bucket:
+            buckets[key] = bucket
+        else:
+            buckets.pop(key, None)
+
+    @staticmethod
+    def _bucket_insert(buckets: Dict[str, Tuple[MenuItem, ...]], key: str, item: MenuItem,
+                       position: Dict[str, int]):
+        bucket = list(buckets.get(key, ()))
+        positions = [position[other.name_lower] for other in bucket]
+        bucket.insert(bisect.bisect(positions, position[item.name_lower]), item)
+        buckets[key] = tuple(bucket)
+
+    def replace(self, old: Optional[MenuItem], new: Optional[MenuItem]):
+        """
+        Swap one item for another (old=None adds, new=None removes), touching
+        only the category and tag buckets of those two items. An updated item
+        keeps its menu position.
+
+        Request threads read these dicts while an admin edit runs, so the
+        edit works on copies and swaps each one in with a single assignment.
+        """
+        by_name, position = dict(self.by_name), dict(self.position)
+        by_category, by_tag = dict(self.by_category), dict(self.by_tag)
+
+        slot = self._next_position
+        if old is not None:
+            slot = position.pop(old.name_lower)
+            del by_name[old.name_lower]
+            self._bucket_remove(by_category, old.category_id, old)
+            for tag in old.tags:
+                self._bucket_remove(by_tag, tag, old)
+        else:
+            self._next_position += 1
+
+        if new is not None:
+            position[new.name_lower] = slot
+            by_name[new.name_lower] = new
+            self._bucket_insert(by_category, new.category_id, new, position)
+            for tag in new.tags:
+                self._bucket_insert(by_tag, tag, new, position)
+
+        if old is not None and new is not None:
+            items = tuple(new if item is old else item for item in self.items)
+        elif old is not None:
+            items = tuple(item for item in self.items if item is not old)
+        else:
+            items = self.items + ((new,) if new is not None else ())
+
+        self.position, self.by_name, self.by_category, self.by_tag = position, by_name, by_category, by_tag
+        self.items = items
+
+    def named(self, names: Iterable[str]) -> List[MenuItem]:
+        """Items for the given names (case insensitive, unknown names skipped), in that order"""
+        return [self.by_name[key] for key in (name.lower() for name in names) if key in self.by_name]
+
+    def tags(self) -> List[str]:
+        """All known tags"""
+        return sorted(self.by_tag)
+
+
+class Popularity:
+    """
+    Sales ranking from popularity.json (written by whatsapp_bot_setup.py),
+    resolved to menu items once per load so lookups are dict/tuple reads.
+    """
+
+    def __init__(self, data: Dict[str, Any], items: List[MenuItem]):
+        by_name = {item.name_lower: item for item in items}
+        sales = {str(name).lower(): (float(stats.get('units', 0)), float(stats.get('revenue', 0)))
+                 for name, stats in data.get('items', {}).items()}
+
+        # Best sellers first, revenue breaking ties; items without sales keep menu order after them
+        ranked = sorted((item for item in items if item.name_lower in sales),
+                        key=lambda item: tuple(-value for value in sales[item.name_lower]))
+        self.rank: Dict[str, int] = {item.name_lower: i for i, item in enumerate(ranked)}
+        self.top_items: Tuple[MenuItem, ...] = tuple(ranked)
+        self.top_by_category: Dict[str, Tuple[MenuItem, ...]] = {
+            str(category).lower(): tuple(by_name[name.lower()] for name in names if name.lower() in by_name)
+            for category, names in data.get('top_by_category', {}).items()
+        }
+        # Length cap of the category lists (None in files written before it was recorded)
+        self.top_n: Optional[int] = data.get('top_n')
+
+    def __bool__(self) -> bool:
+        return bool(self.top_items)
+
+    def recommended(self, n: int = 5, available: Optional[Callable[[MenuItem], bool]] = None,
+                    exclude_categories: Tuple[str, ...] = ('extras',)) -> List[MenuItem]:
+        """Best-selling items, leaving out add-ons like toppings and anything `available` rejects"""
+        return [
+            item for item in self.top_items
+            if item.category_id not in exclude_categories and (available is None or available(item))
+        ][:n]
+
+    def sort(self, items: List[MenuItem]) -> List[MenuItem]:
+        """Order items best seller first (stable for items without sales)"""
+        unranked = len(self.rank)
+        return sorted(items, key=lambda item: self.rank.get(item.name_lower, unranked))
+
+    def replace(self, old: Optional[MenuItem], new: Optional[MenuItem]):
+        """
+        Point the ranking at an edited item. Sales are keyed by name, so a
+        renamed or removed item drops out of the ranking.
+        """
+        if old is None or old.name_lower not in self.rank:
+            return
+        keep = new is not None and new.name_lower == old.name_lower
+
+        def swap(items: Tuple[MenuItem, ...], keep: bool) -> Tuple[MenuItem, ...]:
+            if keep:
+                return tuple(new if item is old else item for item in items)
+            return tuple(item for item in items if item is not old)
+
+        self.top_items = swap(self.top_items, keep)
+        top_by_category = {
+            category: swap(items, keep and category == new.category_id)
+            for category, items in self.top_by_category.items()
+        }
+        if keep and new.category_id != old.category_id:
+            # Moved: both categories' lists are re-ranked from the overall ranking
+            for category in (old.category_id, new.category_id):
+                top_by_category[category] = tuple(
+                    item for item in self.top_items if item.category_id == category)[:self.top_n]
+        self.top_by_category = top_by_category
+        self.rank = {item.name_lower: i for i, item in enumerate(self.top_items)}
+
+
+def load_popularity(path: str, items: List[MenuItem]) -> Popularity:
+    """Load popularity.json; an empty ranking if the file does not exist"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        data = {}
+    return Popularity(data, items)
+
+
+def load_menu_items(path: str = 'bot_data/menu_items.json') -> List[MenuItem]:
+    """Load menu_items.json as a list of MenuItem records"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [MenuItem.from_dict(item) for item in json.load(f)]
+
+
+def load_menu_structure(path: str = 'bot_data/menu_structure.json') -> Dict[str, List[MenuItem]]:
+    """Load menu_structure.json as category -> MenuItem records"""
+    with open(path, 'r', encoding='utf-8') as f:
+        structure = json.load(f)
+
+    return {
+        category: [
+            MenuItem.from_dict(item if isinstance(item, dict) else {'name': item}, category=category)
+            for item in items
+        ]
+        for category, items in structure.items()
+    }
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Menu OCR
+Runs Tesseract on the menu images in a process pool and caches the results
+by image content hash + OCR settings, so unchanged images are never read
+twice. Preprocessed images (grayscale, downscale, threshold) are cached too.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = '.ocr_cache'
+
+# Bump when preprocess() changes so cached images and text are rebuilt
+PREPROCESS_VERSION = 1
+
+DEFAULT_SETTINGS = {
+    'lang': 'spa',
+    'config': '--psm 6',
+    'max_width': 2000,
+    'threshold': 160,
+}
+
+
+class OcrResult(NamedTuple):
+    path: str
+    text: str
+    cached: bool
+    error: Optional[str] = None
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_key(settings: dict, *extra: str) -> str:
+    """Short stable hash of the settings that affect the output"""
+    payload = json.dumps([PREPROCESS_VERSION, settings, *extra], sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def tesseract_version() -> str:
+    """Installed Tesseract version, part of the cache key"""
+    try:
+        import pytesseract
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return 'unknown'
+
+
+def _atomic_write(path: str, data: bytes):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def preprocess(path: str, content_hash: str, settings: dict, cache_dir: str) -> Image.Image:
+    """Grayscale, downscale to max_width and binarize (cached as PNG)"""
+    prep_settings = {key: settings[key] for key in ('max_width', 'threshold')}
+    cached_path = os.path.join(cache_dir, f'pre-{content_hash[:16]}-{settings_key(prep_settings)}.png')
+    if os.path.exists(cached_path):
+        # Read the pixels now so the file is not left open
+        with Image.open(cached_path) as image:
+            image.load()
+        return image
+
+    with Image.open(path) as image:
+        image = image.convert('L')
+        if image.width > settings['max_width']:
+            height = round(image.height * settings['max_width'] / image.width)
+            image = image.resize((settings['max_width'], height), Image.LANCZOS)
+        threshold = settings['threshold']
+        image = image.point(lambda value: 255 if value > threshold else 0)
+
+    tmp_path = f'{cached_path}.{os.getpid()}.tmp'
+    image.save(tmp_path, format='PNG')
+    os.replace(tmp_path, cached_path)
+    return image
+
+
+def _ocr_worker(path: str, content_hash: str, settings: dict, text_path: str, cache_dir: str) -> OcrResult:
+    """Run in a pool process: preprocess, OCR and store the text"""
+    try:
+        import pytesseract
+
+        image = preprocess(path, content_hash, settings, cache_dir)
+        text = pytesseract.image_to_string(image, lang=settings['lang'], config=settings['config'])
+        _atomic_write(text_path, text.encode('utf-8'))
+        return OcrResult(path, text, cached=False)
+    except Exception as e:
+        return OcrResult(path, '', cached=False, error=str(e))
+
+
+def ocr_images(paths: List[str], settings: Optional[dict] = None, workers: Optional[int] = None,
+               cache_dir: str = DEFAULT_CACHE_DIR) -> Dict[str, OcrResult]:
+    """
+    OCR every image, reusing cached text for images whose content and
+    settings are unchanged. Only the misses are sent to the process pool,
+    so a rebuild with nothing changed does not start any workers.
+    """
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    os.makedirs(cache_dir, exist_ok=True)
+    key = settings_key(settings, tesseract_version())
+
+    results: Dict[str, OcrResult] = {}
+    misses = []
+    for path in paths:
+        content_hash = file_hash(path)
+        text_path = os.path.join(cache_dir, f'ocr-{content_hash[:16]}-{key}.txt')
+        if os.path.exists(text_path):
+            with open(text_path, 'r', encoding='utf-8') as f:
+                results[path] = OcrResult(path, f.read(), cached=True)
+        else:
+            misses.append((path, content_hash, settings, text_path, cache_dir))
+
+    if misses:
+        workers = min(workers or os.cpu_count() or 1, len(misses))
+        logger.info(f"Running OCR on {len(misses)} image(s) with {workers} worker(s)...")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(_ocr_worker, *zip(*misses)):
+                results[result.path] = result
+
+    return {path: results[path] for path in paths}
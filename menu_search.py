@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Semantic Menu Search
+Embeds every menu item once per snapshot into a NumPy matrix, so a query
+costs one matrix-vector product plus a top-k selection.
+
+The default encoder hashes n-grams and needs no downloads. Set
+PRANA_SEARCH_MODEL to a local sentence-transformers model to use real
+embeddings instead (CPU only).
+"""
+
+import glob
+import json
+import logging
+import os
+import re
+import time
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from intent_classifier import extract_features, normalize_text
+from menu_model import STOPWORDS, MenuItem
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = 'search_index'
+# A replaced matrix stays on disk this long: other workers may still be
+# about to load it for the snapshot they have not reloaded yet
+SUPERSEDED_GRACE_SECONDS = 3600
+SYNONYMS_FILE = 'search_synonyms.json'
+
+class HashingEncoder:
+    """Hashed word + character n-gram vectors; works offline with no model"""
+
+    # Shared character n-grams score unrelated words ("palos grandes" vs
+    # "granola"), so a hit also needs a word in common with the item
+    needs_overlap = True
+
+    def __init__(self, dim: int = 1024, synonyms: Optional[dict] = None):
+        self.dim = dim
+        self.name = f'hash{dim}'
+        # Concept -> related words, e.g. "frutas rojas" -> fresa, mora...
+        self.synonyms = {normalize_text(key): ' '.join(words) for key, words in (synonyms or {}).items()}
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        indices, values = extract_features(text, self.dim)
+        np.add.at(vector, indices, values)
+        return vector
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Item vectors, stopwords removed"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = re.findall(r'\w+', normalize_text(text))
+            matrix[row] = self._vector(' '.join(word for word in words if word not in STOPWORDS))
+        return matrix
+
+    def query_words(self, query: str) -> List[str]:
+        """Query words without stopwords, plus the words related to any known concept"""
+        text = normalize_text(query)
+        words = [word for word in re.findall(r'\w+', text) if word not in STOPWORDS]
+        for concept, related in self.synonyms.items():
+            if re.search(rf'\b{re.escape(concept)}\b', text):
+                words += related.split()
+        return words
+
+    def encode_query(self, query: str) -> np.ndarray:
+        """Query vector, with the words related to any known concept appended"""
+        return self._vector(' '.join(self.query_words(query)))
+
+
+class SentenceTransformerEncoder:
+    """Local sentence-transformers model, run on the CPU"""
+
+    needs_overlap = False
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device='cpu')
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = re.sub(r'\W+', '_', os.path.basename(model_name.rstrip('/\\')))
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+
+    def encode_query(self, query: str) -> np.ndarray:
+        return self.encode([query])[0]
+
+
+def load_synonyms(data_dir: str = 'bot_data') -> dict:
+    """Read bot_data/search_synonyms.json if present"""
+    path = os.path.join(data_dir, SYNONYMS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model_name: Optional[str] = None, data_dir: str = 'bot_data'):
+    """Encoder named by PRANA_SEARCH_MODEL, falling back to hashing (loaded once per process)"""
+    model_name = model_name or os.getenv('PRANA_SEARCH_MODEL')
+    if model_name:
+        try:
+            encoder = SentenceTransformerEncoder(model_name)
+            logger.info(f"✅ Search encoder loaded: {model_name}")
+            return encoder
+        except ImportError:
+            logger.error("❌ sentence-transformers not installed. Using hashing encoder.")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load search model {model_name}: {e}. Using hashing encoder.")
+    return HashingEncoder(synonyms=load_synonyms(data_dir))
+
+
+def item_text(item: MenuItem) -> str:
+    """Text embedded for an item: name, category, description, ingredients and tags"""
+    return '. '.join(part for part in (
+        item.name, item.category, item.description, item.ingredients_text, ' '.join(item.tags)
+    ) if part)
+
+
+def item_words(item: MenuItem) -> frozenset:
+    return frozenset(re.findall(r'\w+', normalize_text(item_text(item)))) - STOPWORDS
+
+
+def shares_word(query_words: List[str], words: frozenset) -> bool:
+    """
+    A query word equals an item word, or one starts the other and is at
+    least 4 letters ("jugos" / "jugo"). "tos" does not match "tostada".
+    """
+    for query_word in query_words:
+        if query_word in words:
+            return True
+        if len(query_word) >= 4 and any(
+                word.startswith(query_word) or (len(word) >= 4 and query_word.startswith(word)) for word in words):
+            return True
+    return False
+
+
+class MenuSearchIndex:
+    """Embedding matrix for one snapshot's menu items, rows in menu order"""
+
+    def __init__(self, items: List[MenuItem], matrix: np.ndarray, encoder):
+        self.items = list(items)
+        self.matrix = matrix
+        self.encoder = encoder
+        self.words = [item_words(item) for item in self.items] if encoder.needs_overlap else None
+
+    @staticmethod
+    def path_for(data_dir: str, encoder, version: str) -> str:
+        return os.path.join(data_dir, INDEX_DIR, f'menu-{encoder.name}-{version}.npy')
+
+    @staticmethod
+    def save(path: str, matrix: np.ndarray, encoder):
+        """
+        Write a matrix atomically and remove this encoder's versions that
+        were replaced more than SUPERSEDED_GRACE_SECONDS ago
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, matrix)
+        os.replace(tmp_path, path)
+
+        versions = []
+        for version_path in glob.glob(os.path.join(os.path.dirname(path), f'menu-{encoder.name}-*.npy')):
+            try:
+                versions.append((os.path.getmtime(version_path), version_path))
+            except OSError:
+                pass  # pruned by another worker
+        versions.sort()
+        now = time.time()
+        # Each version was replaced when the next newer one was written
+        for (_, old_path), (replaced_at, _) in zip(versions, versions[1:]):
+            if old_path != path and now - replaced_at > SUPERSEDED_GRACE_SECONDS:
+                try:
+                    os.remove(old_path)
+                except FileNotFoundError:
+                    pass
+
+    @classmethod
+    def for_snapshot(cls, snapshot, encoder=None) -> 'MenuSearchIndex':
+        """
+        Load the matrix saved for this snapshot version (memory-mapped), or
+        build and save it first. Long-replaced versions are removed.
+        """
+        encoder = encoder or get_encoder(data_dir=snapshot.data_dir)
+        path = cls.path_for(snapshot.data_dir, encoder, snapshot.version)
+
+        try:
+            # Copy-on-write: replace() patches rows in this process only
+            matrix = np.load(path, mmap_mode='c')
+        except FileNotFoundError:
+            matrix = encoder.encode([item_text(item) for item in snapshot.menu_items])
+            cls.save(path, matrix, encoder)
+            logger.info(f"🔎 Search index built for snapshot {snapshot.version} ({len(matrix)} items)")
+
+        return cls(snapshot.menu_items, matrix, encoder)
+
+    def replace(self, old: Optional[MenuItem], new: Optional[MenuItem]):
+        """
+        Re-embed one edited item (old=None adds, new=None removes). Only that
+        item's text is encoded, and an update overwrites its row in place.
+        Nothing is saved: the first worker that reloads the edited files
+        builds and saves the matrix for the new version.
+        """
+        row = next((i for i, item in enumerate(self.items) if item is old), None) if old is not None else None
+        if new is not None:
+            vector = self.encoder.encode([item_text(new)])[0]
+            if row is None:
+                self.items.append(new)
+                self.matrix = np.vstack([self.matrix, vector[None, :]])
+                if self.words is not None:
+                    self.words.append(item_words(new))
+            else:
+                self.items[row] = new
+                self.matrix[row] = vector
+                if self.words is not None:
+                    self.words[row] = item_words(new)
+        elif row is not None:
+            del self.items[row]
+            self.matrix = np.delete(self.matrix, row, axis=0)
+            if self.words is not None:
+                del self.words[row]
+
+    def search(self, query: str, k: int = 5, min_score: float = 0.25) -> List[Tuple[MenuItem, float]]:
+        """Top-k items by cosine similarity, best first"""
+        if not self.items:
+            return []
+
+        scores = self.matrix @ self.encoder.encode_query(query)
+        if self.words is not None:
+            query_words = self.encoder.query_words(query)
+            candidates = np.array([i for i in np.flatnonzero(scores >= min_score)
+                                   if shares_word(query_words, self.words[i])], dtype=np.intp)
+        else:
+            candidates = np.flatnonzero(scores >= min_score)
+        if not len(candidates):
+            return []
+
+        k = min(k, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(self.items[i], float(scores[i])) for i in top]
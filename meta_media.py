@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Meta Media Cache
+Sends images over the WhatsApp Cloud API by media id instead of by link:
+each file is uploaded once, and the returned id is stored (with its expiry)
+keyed by the file's content hash in a small JSON file, so restarts and
+other workers reuse it. Workers re-read the file under an flock before each
+write and on a cache miss, so they don't overwrite each other's ids. A
+background thread re-uploads ids shortly before Meta expires them (30 days
+after upload), keeping sends off the upload path.
+"""
+
+import json
+import logging
+import mimetypes
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from build_manifest import hash_file, write_json_atomic
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+GRAPH_URL = 'https://graph.facebook.com/v19.0'
+DEFAULT_CACHE_PATH = os.path.join('media_store', 'meta_media_ids.json')
+
+# Uploaded media stays available for 30 days
+MEDIA_ID_TTL = 30 * 24 * 3600
+# Ids are refreshed when less than this is left
+REFRESH_MARGIN = 2 * 24 * 3600
+REFRESH_INTERVAL = 3600
+
+
+class GraphAPIError(Exception):
+    pass
+
+
+class MetaGraphClient:
+    """Minimal WhatsApp Cloud API client: upload media, send text and images"""
+
+    def __init__(self, access_token: str, phone_number_id: str, graph_url: str = GRAPH_URL, timeout: float = 30):
+        self.phone_number_id = phone_number_id
+        self.graph_url = graph_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Bearer {access_token}'
+
+    @classmethod
+    def from_env(cls) -> Optional['MetaGraphClient']:
+        token = os.getenv('META_ACCESS_TOKEN')
+        phone_number_id = os.getenv('META_PHONE_NUMBER_ID')
+        if not (token and phone_number_id):
+            return None
+        return cls(token, phone_number_id, os.getenv('META_GRAPH_URL', GRAPH_URL))
+
+    def _post(self, endpoint: str, **kwargs) -> Dict[str, Any]:
+        url = f'{self.graph_url}/{self.phone_number_id}/{endpoint}'
+        try:
+            response = self.session.post(url, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise GraphAPIError(f"{endpoint}: {e}") from e
+        if response.status_code >= 400:
+            raise GraphAPIError(f"{endpoint}: HTTP {response.status_code} {response.text[:200]}")
+        return response.json()
+
+    def upload_media(self, path: str) -> str:
+        """Upload a file; returns its media id"""
+        mime = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        with open(path, 'rb') as f:
+            data = self._post('media', data={'messaging_product': 'whatsapp', 'type': mime},
+                              files={'file': (os.path.basename(path), f, mime)})
+        return data['id']
+
+    def send_message(self, to: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return self._post('messages', json={'messaging_product': 'whatsapp', 'recipient_type': 'individual',
+                                            'to': to, **payload})
+
+    def send_text(self, to: str, body: str) -> Dict[str, Any]:
+        return self.send_message(to, {'type': 'text', 'text': {'body': body}})
+
+    def send_image(self, to: str, media_id: str, caption: Optional[str] = None) -> Dict[str, Any]:
+        image = {'id': media_id}
+        if caption:
+            image['caption'] = caption
+        return self.send_message(to, {'type': 'image', 'image': image})
+
+
+class MediaIdCache:
+    """
+    Media ids by content hash, persisted to `path`:
+    {hash: {"id": ..., "expires_at": ..., "path": ...}}
+    """
+
+    def __init__(self, client: MetaGraphClient, path: str = DEFAULT_CACHE_PATH, ttl: float = MEDIA_ID_TTL,
+                 refresh_margin: float = REFRESH_MARGIN):
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+        self.uploads = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def _locked(self):
+        """The in-process lock plus an flock shared with other workers' caches"""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path + '.lock', 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _store(self, digest: str, entry: Optional[Dict[str, Any]]):
+        """Apply one change to the entries on disk and write them; needs _locked()"""
+        self.entries = self._load()
+        if entry is None:
+            self.entries.pop(digest, None)
+        else:
+            self.entries[digest] = entry
+        write_json_atomic(self.path, self.entries)
+
+    def _live(self, digest: str) -> Optional[str]:
+        entry = self.entries.get(digest)
+        if entry and entry['expires_at'] > time.time():
+            return entry['id']
+        return None
+
+    def _upload(self, digest: str, path: str) -> str:
+        """Upload a file and store its id; the network call runs without the lock"""
+        media_id = self.client.upload_media(path)
+        with self._locked():
+            self.uploads += 1
+            self._store(digest, {'id': media_id, 'expires_at': time.time() + self.ttl, 'path': path})
+        logger.info(f"📤 Uploaded {os.path.basename(path)} to Meta (media id {media_id})")
+        return media_id
+
+    def media_id(self, path: str) -> str:
+        """Media id for a file, uploading it only if no live id is cached"""
+        digest = hash_file(path)
+        with self._lock:
+            media_id = self._live(digest)
+        if media_id:
+            return media_id
+        with self._locked():
+            # Another worker may have uploaded it since this one read the file
+            self.entries = self._load()
+            media_id = self._live(digest)
+        return media_id or self._upload(digest, path)
+
+    def refresh_due(self) -> List[str]:
+        """Re-upload ids that expire within the refresh margin; returns the new ids"""
+        deadline = time.time() + self.refresh_margin
+        with self._lock:
+            due = [(digest, entry['path']) for digest, entry in self.entries.items()
+                   if entry['expires_at'] <= deadline]
+        refreshed = []
+        for digest, path in due:
+            if not os.path.exists(path) or hash_file(path) != digest:
+                # The file changed or is gone; the next send uploads the new bytes
+                with self._locked():
+                    self._store(digest, None)
+                continue
+            try:
+                refreshed.append(self._upload(digest, path))
+            except GraphAPIError as e:
+                logger.warning(f"⚠️ Media refresh failed for {path}: {e}")
+        return refreshed
+
+    def start(self, interval: float = REFRESH_INTERVAL):
+        """Refresh expiring ids in a daemon thread every `interval` seconds"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while True:
+                try:
+                    self.refresh_due()
+                except Exception as e:
+                    logger.error(f"❌ Media refresh error: {e}")
+                if self._stop.wait(interval):
+                    return
+
+        self._thread = threading.Thread(target=run, name='meta-media-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Order Cart
+Turns "2 citrus y un ginger shot" into cart lines in one pass over the
+message, and prices carts exactly in integer cents.
+
+Item names, their aliases and the quantity words are compiled into a single
+Aho-Corasick automaton when the menu loads. Scanning a message follows one
+goto/failure transition per character, so extraction is linear in the
+message length however many items the menu has. Matches are resolved
+leftmost-longest on word boundaries ("yogurt con granola" wins over
+"granola"), and a quantity written right before an item applies to it.
+Written numbers of any size are quantities; the cart caps each line at
+MAX_QUANTITY.
+"""
+
+import logging
+import re
+from collections import deque
+from itertools import chain
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from menu_model import MenuItem
+
+logger = logging.getLogger(__name__)
+
+# Highest quantity accepted per line, written or added up
+MAX_QUANTITY = 50
+
+QUANTITY_WORDS = {
+    'un': 1, 'una': 1, 'uno': 1, 'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5,
+    'seis': 6, 'siete': 7, 'ocho': 8, 'nueve': 9, 'diez': 10,
+    'un par de': 2, 'media docena de': 6, 'una docena de': 12,
+}
+
+# Allowed between a quantity and its item: "2 citrus", "2 x citrus", "dos de citrus"
+QUANTITY_GAPS = ('', 'x', 'de')
+
+# A message that opens with a quantity ("2 citrus", "un ginger shot") is an order
+QUANTITY_START_RE = re.compile(r'^\s*(?:\d+|' + '|'.join(sorted(QUANTITY_WORDS, key=len, reverse=True)) + r')\b')
+
+DIGITS_RE = re.compile(r'\d+')
+
+# Same-length folding, so offsets in the folded text stay valid
+_FOLD = str.maketrans('áéíóúüàèìòùñ', 'aeiouuaeioun')
+
+QUANTITY = 'quantity'
+ITEM = 'item'
+
+
+def fold(text: str) -> str:
+    """Lowercase without accents: "Chía" -> "chia", "piña" -> "pina" """
+    return text.lower().translate(_FOLD)
+
+
+def format_cents(cents: int) -> str:
+    return f"${cents // 100}.{cents % 100:02d}"
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over fixed keywords, each with a value.
+
+    output[node] is the keyword ending at that node (if any) and dict_link
+    the next node on the failure chain that ends a keyword, so every keyword
+    ending at a position is found without walking failure links that end none.
+    """
+
+    def __init__(self, keywords: Dict[str, Any]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.output: List[Optional[Tuple[int, Any]]] = [None]
+        for keyword, value in keywords.items():
+            node = 0
+            for char in keyword:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = self.goto[node][char] = len(self.goto)
+                    self.goto.append({})
+                    self.output.append(None)
+                node = next_node
+            self.output[node] = (len(keyword), value)
+
+        self.fail = [0] * len(self.goto)
+        self.dict_link = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                link = self.fail[child]
+                self.dict_link[child] = link if self.output[link] else self.dict_link[link]
+                queue.append(child)
+
+    def __len__(self) -> int:
+        return len(self.goto)
+
+    def node(self, keyword: str) -> Optional[int]:
+        """Node where `keyword` ends, None if it is not a keyword"""
+        node = 0
+        for char in keyword:
+            node = self.goto[node].get(char)
+            if node is None:
+                return None
+        return node if self.output[node] else None
+
+    def scan(self, text: str) -> Iterable[Tuple[int, int, Any]]:
+        """(start, end, value) of every keyword occurrence, by end position"""
+        node = 0
+        for end, char in enumerate(text, start=1):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            found = node if self.output[node] else self.dict_link[node]
+            while found:
+                length, value = self.output[found]
+                yield end - length, end, value
+                found = self.dict_link[found]
+
+
+class OrderLine(NamedTuple):
+    item: MenuItem
+    quantity: int
+    # False when no quantity was written ("quiero un citrus" has one, "citrus" not)
+    explicit: bool
+
+
+class OrderExtractor:
+    """Menu items and their quantities mentioned in a message"""
+
+    def __init__(self, items: Iterable[MenuItem]):
+        keywords: Dict[str, Tuple[str, Any]] = {}
+        for word, number in QUANTITY_WORDS.items():
+            keywords[word] = (QUANTITY, number)
+        for item in items:
+            for name in (item.name_lower,) + item.aliases:
+                # The first item with a name keeps it
+                keywords.setdefault(fold(name), (ITEM, item))
+        self.automaton = KeywordAutomaton(keywords)
+
+    def replace(self, old: Optional[MenuItem], new: Optional[MenuItem]) -> bool:
+        """
+        Point the keywords of an edited item at its new version. Only possible
+        when its name and aliases are unchanged; returns False when the
+        automaton has to be rebuilt instead (added, removed or renamed items).
+        """
+        if old is None or new is None or (old.name_lower, old.aliases) != (new.name_lower, new.aliases):
+            return False
+        for name in (old.name_lower,) + old.aliases:
+            node = self.automaton.node(fold(name))
+            if node is None:
+                continue
+            length, (kind, value) = self.automaton.output[node]
+            # Another item that had the name first keeps it
+            if value is old:
+                self.automaton.output[node] = (length, (ITEM, new))
+        return True
+
+    def matches(self, text: str) -> List[Tuple[int, int, Tuple[str, Any]]]:
+        """Leftmost-longest whole-word keyword and number matches in folded text"""
+        longest: List[int] = [0] * (len(text) + 1)  # start -> end of the longest match there
+        values: Dict[int, Tuple[str, Any]] = {}
+        numbers = ((found.start(), found.end(), (QUANTITY, int(found.group())))
+                   for found in DIGITS_RE.finditer(text) if int(found.group()) > 0)
+        for start, end, value in chain(self.automaton.scan(text), numbers):
+            if end > longest[start] and (start == 0 or not text[start - 1].isalnum()) \
+                    and (end == len(text) or not text[end].isalnum()):
+                longest[start] = end
+                values[start] = value
+
+        found = []
+        position = 0
+        for start in range(len(text)):
+            if start >= position and longest[start]:
+                found.append((start, longest[start], values[start]))
+                position = longest[start]
+        return found
+
+    def extract(self, message: str) -> List[OrderLine]:
+        """Items in the order they appear; repeated items are separate lines"""
+        text = fold(message)
+        lines = []
+        pending: Optional[Tuple[int, int]] = None  # (quantity, end) of the last quantity seen
+        for start, end, (kind, value) in self.matches(text):
+            if kind == QUANTITY:
+                pending = (value, end)
+                continue
+            if pending and text[pending[1]:start].strip() in QUANTITY_GAPS:
+                lines.append(OrderLine(value, pending[0], True))
+            else:
+                lines.append(OrderLine(value, 1, False))
+            pending = None
+        return lines
+
+
+class Cart(NamedTuple):
+    """
+    Items and quantities, stored as the dialogue context of the 'order'
+    state. Only item names are kept; prices come from the current menu.
+    """
+    lines: Tuple[Tuple[str, int], ...] = ()
+
+    def add(self, order_lines: Iterable[OrderLine]) -> 'Cart':
+        quantities = dict(self.lines)
+        for line in order_lines:
+            key = line.item.name_lower
+            quantities[key] = min(MAX_QUANTITY, quantities.get(key, 0) + line.quantity)
+        return Cart(tuple(quantities.items()))
+
+    def over_limit(self, order_lines: Iterable[OrderLine]) -> List[MenuItem]:
+        """Items that `add` would cap at MAX_QUANTITY"""
+        quantities = dict(self.lines)
+        capped = {}
+        for line in order_lines:
+            key = line.item.name_lower
+            quantities[key] = quantities.get(key, 0) + line.quantity
+            if quantities[key] > MAX_QUANTITY:
+                capped[key] = line.item
+        return list(capped.values())
+
+    def priced(self, by_name: Dict[str, MenuItem]) -> Tuple[List[Tuple[MenuItem, int, Optional[int]]], int]:
+        """([(item, quantity, subtotal cents)], total cents); items without a price add nothing"""
+        rows = []
+        total = 0
+        for name, quantity in self.lines:
+            item = by_name.get(name)
+            if item is None:
+                continue
+            subtotal = item.price_cents * quantity if item.price_cents is not None else None
+            total += subtotal or 0
+            rows.append((item, quantity, subtotal))
+        return rows, total
+
+    def summary(self, by_name: Dict[str, MenuItem]) -> str:
+        rows, total = self.priced(by_name)
+        response = "🛒 *TU PEDIDO:*\n\n"
+        for item, quantity, subtotal in rows:
+            price = format_cents(subtotal) if subtotal is not None else "precio por confirmar"
+            response += f"• {quantity} x {item.name} - {price}\n"
+        response += f"\n💰 *Total: {format_cents(total)}*"
+        return response
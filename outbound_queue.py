@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Outbound Queue
+Durable queue for outgoing WhatsApp messages. Sending only inserts a row
+into SQLite; a pool of sender threads delivers the rows in the background,
+so a provider outage delays replies instead of losing them.
+
+- Each worker builds its provider client once and keeps it (the Twilio
+  client holds a keep-alive HTTP session).
+- All workers share one token bucket for the provider's send rate, and a 429
+  from the provider pauses every worker briefly.
+- Transient failures are retried with exponential backoff and jitter.
+  Permanent ones (a 4xx other than 429), and messages out of attempts, are
+  moved to the dead_letters table with their last error.
+- A claimed row is leased: if the process dies mid-send the lease runs out
+  and the row is sent again (at-least-once delivery).
+"""
+
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from rate_limit import TokenBucketLimiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = 'outbound_queue.db'
+
+WORKERS = 4
+# Sends per second across all workers (and the burst above that rate)
+RATE_PER_SECOND = 10.0
+MAX_ATTEMPTS = 6
+BASE_DELAY = 1.0
+MAX_DELAY = 300.0
+# A row claimed longer ago than this is assumed lost with its worker
+LEASE_SECONDS = 120.0
+# Longest a worker sleeps before looking for due rows again
+POLL_INTERVAL = 1.0
+
+# Upper bounds (seconds) of the enqueue-to-sent latency histogram
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbound (
+    id INTEGER PRIMARY KEY,
+    recipient TEXT NOT NULL,
+    body TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    claimed_until REAL NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbound_due ON outbound(next_attempt_at);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id INTEGER PRIMARY KEY,
+    recipient TEXT NOT NULL,
+    body TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    enqueued_at REAL NOT NULL,
+    failed_at REAL NOT NULL,
+    error TEXT
+);
+"""
+
+SQL_CLAIM = """
+    SELECT id, recipient, body, attempts, enqueued_at FROM outbound
+    WHERE next_attempt_at <= ? AND claimed_until <= ?
+    ORDER BY next_attempt_at, id LIMIT 1
+"""
+
+
+class PermanentSendError(Exception):
+    """A send that retrying won't fix (invalid number, rejected content...)"""
+
+
+def whatsapp_address(number: str) -> str:
+    return number if number.startswith('whatsapp:') else f"whatsapp:{number}"
+
+
+class TwilioSender:
+    """One Twilio REST client, reused for every message a worker sends"""
+
+    def __init__(self, account_sid: str, auth_token: str, from_number: str, api_url: Optional[str] = None):
+        from twilio.rest import Client
+
+        self.client = Client(account_sid, auth_token)
+        if api_url:
+            # Only for tests and proxies; the default is https://api.twilio.com
+            self.client.api.base_url = api_url.rstrip('/')
+        self.from_number = whatsapp_address(from_number)
+
+    @classmethod
+    def from_env(cls) -> Optional['TwilioSender']:
+        account_sid = os.getenv('TWILIO_ACCOUNT_SID')
+        auth_token = os.getenv('TWILIO_AUTH_TOKEN')
+        from_number = os.getenv('TWILIO_WHATSAPP_NUMBER')
+        if not all([account_sid, auth_token, from_number]):
+            return None
+        return cls(account_sid, auth_token, from_number, os.getenv('TWILIO_API_URL'))
+
+    def send(self, to: str, body: str) -> str:
+        """Send one message; returns the Twilio message sid"""
+        from twilio.base.exceptions import TwilioRestException
+
+        try:
+            message = self.client.messages.create(from_=self.from_number, body=body, to=whatsapp_address(to))
+        except TwilioRestException as e:
+            if e.status == 429 or e.status >= 500:
+                raise
+            raise PermanentSendError(f"HTTP {e.status} (code {e.code}): {e.msg}") from e
+        return message.sid
+
+
+class OutboundQueue:
+    """
+    SQLite-backed outbound messages and the workers that send them.
+    `sender_factory` is called once per worker and returns an object with
+    send(to, body) -> provider message id.
+    """
+
+    def __init__(self, sender_factory: Callable[[], Any], path: str = DEFAULT_QUEUE_PATH, workers: int = WORKERS,
+                 rate_per_second: float = RATE_PER_SECOND, max_attempts: int = MAX_ATTEMPTS,
+                 base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY, lease: float = LEASE_SECONDS):
+        self.sender_factory = sender_factory
+        self.path = path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease = lease
+
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._rate = TokenBucketLimiter(rate_per_second, max(1.0, rate_per_second))
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+        self.counters: Dict[str, int] = {'enqueued': 0, 'sent': 0, 'retried': 0, 'dead_lettered': 0}
+        self.latency_counts = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """This thread's connection (autocommit; transactions are explicit)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, recipient: str, body: str) -> int:
+        """Store a message for delivery; returns its row id"""
+        now = time.time()
+        row_id = self._conn().execute(
+            "INSERT INTO outbound (recipient, body, enqueued_at, next_attempt_at) VALUES (?, ?, ?, ?)",
+            (recipient, body, now, now)).lastrowid
+        with self._lock:
+            self.counters['enqueued'] += 1
+        self._wake.set()
+        return row_id
+
+    def _claim(self) -> Optional[tuple]:
+        """Lease the next due row to this worker"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(SQL_CLAIM, (now, now)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE outbound SET claimed_until = ?, attempts = attempts + 1 WHERE id = ?",
+                             (now + self.lease, row[0]))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return row
+
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with jitter: half the capped delay plus a random half"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _deliver(self, sender, row: tuple):
+        row_id, recipient, body, attempts, enqueued_at = row
+        attempts += 1
+        try:
+            message_id = sender.send(recipient, body)
+        except PermanentSendError as e:
+            self._dead_letter(row_id, attempts, str(e))
+            return
+        except Exception as e:
+            if getattr(e, 'status', None) == 429:
+                # The provider is throttling this account: every worker waits
+                with self._lock:
+                    self._paused_until = max(self._paused_until, time.monotonic() + self.retry_delay(1))
+            if attempts >= self.max_attempts:
+                self._dead_letter(row_id, attempts, str(e))
+                return
+            delay = self.retry_delay(attempts)
+            self._conn().execute(
+                "UPDATE outbound SET next_attempt_at = ?, claimed_until = 0, last_error = ? WHERE id = ?",
+                (time.time() + delay, str(e)[:500], row_id))
+            with self._lock:
+                self.counters['retried'] += 1
+            logger.warning(f"⚠️ Send to {recipient} failed (attempt {attempts}), retrying in {delay:.1f}s: {e}")
+            return
+
+        self._conn().execute("DELETE FROM outbound WHERE id = ?", (row_id,))
+        latency = time.time() - enqueued_at
+        with self._lock:
+            self.counters['sent'] += 1
+            self.latency_sum += latency
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    self.latency_counts[i] += 1
+                    break
+        logger.info(f"📤 Sent to {recipient} ({message_id}) after {latency:.2f}s")
+
+    def _dead_letter(self, row_id: int, attempts: int, error: str):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                "INSERT INTO dead_letters (id, recipient, body, attempts, enqueued_at, failed_at, error) "
+                "SELECT id, recipient, body, ?, enqueued_at, ?, ? FROM outbound WHERE id = ?",
+                (attempts, time.time(), error[:500], row_id))
+            conn.execute("DELETE FROM outbound WHERE id = ?", (row_id,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        with self._lock:
+            self.counters['dead_lettered'] += 1
+        logger.error(f"❌ Message {row_id} moved to dead letters after {attempts} attempts: {error}")
+
+    def _wait_for_send_slot(self) -> bool:
+        """Block until the shared rate limit allows a send; False when stopping"""
+        while not self._stop.is_set():
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._rate.allow('*', now):
+                        return True
+                    wait = 1 / self._rate.rate
+            self._stop.wait(wait)
+        return False
+
+    def _next_wait(self) -> float:
+        """Seconds until the earliest retry is due (capped at POLL_INTERVAL)"""
+        row = self._conn().execute("SELECT MIN(next_attempt_at) FROM outbound").fetchone()
+        if row[0] is None:
+            return POLL_INTERVAL
+        return min(POLL_INTERVAL, max(0.0, row[0] - time.time()))
+
+    def _run(self):
+        sender = self.sender_factory()
+        while not self._stop.is_set():
+            row = self._claim()
+            if row is None:
+                self._wake.wait(self._next_wait() or POLL_INTERVAL)
+                self._wake.clear()
+                continue
+            if not self._wait_for_send_slot():
+                # Stopping: give the row back untouched
+                self._conn().execute("UPDATE outbound SET claimed_until = 0, attempts = attempts - 1 WHERE id = ?",
+                                     (row[0],))
+                break
+            try:
+                self._deliver(sender, row)
+            except Exception as e:
+                # The database failed, not the send: the lease hands the row to a worker later
+                logger.error(f"❌ Outbound worker error: {e}")
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def start(self):
+        """Start the sender threads (also sends whatever an earlier run left queued)"""
+        if self._threads:
+            return
+        self._stop.clear()
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'outbound-sender-{n}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"📮 Outbound queue started with {self.workers} workers ({self.pending()} queued)")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def pending(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM outbound").fetchone()[0]
+
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent permanently failed messages"""
+        rows = self._conn().execute(
+            "SELECT id, recipient, body, attempts, enqueued_at, failed_at, error FROM dead_letters "
+            "ORDER BY failed_at DESC LIMIT ?", (limit,)).fetchall()
+        columns = ('id', 'recipient', 'body', 'attempts', 'enqueued_at', 'failed_at', 'error')
+        return [dict(zip(columns, row)) for row in rows]
+
+    def metrics(self) -> Dict[str, Any]:
+        conn = self._conn()
+        with self._lock:
+            metrics = dict(self.counters)
+            latency = {'buckets': dict(zip(LATENCY_BUCKETS, self.latency_counts)),
+                       'sum': self.latency_sum, 'count': self.counters['sent']}
+        metrics['queued'] = self.pending()
+        metrics['dead_letters'] = conn.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0]
+        metrics['latency'] = latency
+        return metrics
+
+    def prometheus(self, prefix: str = 'prana_outbound') -> str:
+        """Counters, queue sizes and the delivery latency histogram in the Prometheus text format"""
+        metrics = self.metrics()
+        lines = []
+        for name in ('enqueued', 'sent', 'retried', 'dead_lettered'):
+            lines += [f"# TYPE {prefix}_{name} counter", f"{prefix}_{name} {metrics[name]}"]
+        for name in ('queued', 'dead_letters'):
+            lines += [f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {metrics[name]}"]
+        latency = metrics['latency']
+        lines.append(f"# TYPE {prefix}_delivery_seconds histogram")
+        cumulative = 0
+        for bound, count in latency['buckets'].items():
+            cumulative += count
+            lines.append(f'{prefix}_delivery_seconds_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{prefix}_delivery_seconds_bucket{{le="+Inf"}} {latency["count"]}')
+        lines.append(f"{prefix}_delivery_seconds_sum {latency['sum']:.6f}")
+        lines.append(f"{prefix}_delivery_seconds_count {latency['count']}")
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Rate Limiting
+Token buckets per sender (plus an optional global bucket) checked at the
+webhook before any message processing. A check is O(1); buckets live in an
+LRU-ordered dict, so idle senders are evicted from the front and memory
+stays bounded by max_keys.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# Outcomes of RateLimiter.check()
+ALLOW = 'allow'
+NOTIFY = 'notify'  # over the limit: send the short "un momento" reply once
+DROP = 'drop'      # still over the limit: answer with nothing
+
+
+class TokenBucket:
+    """`rate` tokens per second up to `burst`; one token per message"""
+
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"Token bucket needs a positive rate and a burst of at least 1 "
+                             f"(got rate={rate}, burst={burst})")
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        # A bucket idle this long has refilled completely, i.e. it is the
+        # same as a new one and can be dropped
+        self.idle_after = burst / rate
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self.evicted = 0
+
+    def refill(self, key: str, now: float) -> TokenBucket:
+        """The key's bucket topped up to `now`, without taking a token"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.burst, now)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+            self._buckets.move_to_end(key)
+        self._evict(now)
+        return bucket
+
+    def allow(self, key: str, now: float) -> bool:
+        bucket = self.refill(key, now)
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return True
+        return False
+
+    def _evict(self, now: float):
+        # Least recently used first: stop at the first bucket still refilling
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_keys and now - bucket.updated < self.idle_after:
+                break
+            del self._buckets[key]
+            self.evicted += 1
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RateLimiter:
+    """
+    Per-sender limit with an optional global limit; a rate of 0 turns that
+    limit off. The first rejected message of a burst is answered (NOTIFY),
+    the rest are dropped until the sender is allowed again.
+    """
+
+    def __init__(self, per_minute: float = 20, burst: float = 5, global_per_second: float = 0,
+                 global_burst: Optional[float] = None, max_keys: int = 100000):
+        if per_minute < 0 or global_per_second < 0:
+            raise ValueError(f"Rate limits can't be negative (got per_minute={per_minute}, "
+                             f"global_per_second={global_per_second})")
+        self.max_keys = max_keys
+        self.senders = TokenBucketLimiter(per_minute / 60, burst, max_keys) if per_minute > 0 else None
+        self.global_bucket = (TokenBucketLimiter(global_per_second, global_burst or global_per_second * 2, 1)
+                              if global_per_second > 0 else None)
+        self._notified = set()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {'allowed': 0, 'limited_sender': 0, 'limited_global': 0,
+                                         'notified': 0, 'dropped': 0}
+
+    def check(self, sender: str, now: Optional[float] = None) -> str:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            # Both buckets must have a token before either is charged, so a
+            # message rejected by the global limit costs the sender nothing
+            sender_bucket = self.senders.refill(sender, now) if self.senders is not None else None
+            global_bucket = self.global_bucket.refill('*', now) if self.global_bucket is not None else None
+            if sender_bucket is not None and sender_bucket.tokens < 1:
+                self.counters['limited_sender'] += 1
+            elif global_bucket is not None and global_bucket.tokens < 1:
+                self.counters['limited_global'] += 1
+            else:
+                for bucket in (sender_bucket, global_bucket):
+                    if bucket is not None:
+                        bucket.tokens -= 1
+                self.counters['allowed'] += 1
+                self._notified.discard(sender)
+                return ALLOW
+
+            if sender in self._notified:
+                self.counters['dropped'] += 1
+                return DROP
+            if len(self._notified) >= self.max_keys:
+                self._notified.clear()
+            self._notified.add(sender)
+            self.counters['notified'] += 1
+            return NOTIFY
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            senders = self.senders
+            return {**self.counters, 'active_senders': len(senders) if senders is not None else 0,
+                    'evicted_senders': senders.evicted if senders is not None else 0}
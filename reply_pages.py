@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Reply Paging
+Splits long replies into messages that fit the channel's body limit, cutting
+between sections and items (blank lines, then lines) rather than mid-item,
+and remembers each user's remaining pages so "más" / "siguiente" returns the
+next one without rebuilding the reply.
+"""
+
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+# Body limits per channel: Twilio rejects WhatsApp bodies over 1600
+# characters; the WhatsApp Cloud API allows 4096 per text message
+CHANNEL_LIMITS = {
+    'twilio': 1600,
+    'whatsapp': 4096,
+}
+DEFAULT_CHANNEL = 'twilio'
+
+# Handlers put this between groups of items that should start a new page
+# even when the reply would fit in one message
+PAGE_BREAK = '\f'
+
+# Messages that ask for the next page of the previous reply
+MORE_WORDS = frozenset([
+    'más', 'mas', 'siguiente', 'ver más', 'ver mas', 'continuar', 'sigue', 'next', 'more',
+])
+
+PAGE_FOOTER = "\n\n📄 {page}/{pages} · Escribe *más* para ver el resto."
+
+# Room kept on every page for the footer (page numbers up to 3 digits)
+FOOTER_ROOM = len(PAGE_FOOTER.format(page=999, pages=999)) + 4
+
+Pages = Tuple[str, ...]
+
+
+def split_block(text: str, budget: int) -> List[str]:
+    """Pieces of at most `budget` characters, cut at blank lines, then lines, then spaces"""
+    if len(text) <= budget:
+        return [text]
+    for separator in ('\n\n', '\n', ' '):
+        parts = text.split(separator)
+        if len(parts) > 1:
+            return pack(parts, separator, budget)
+    return [text[start:start + budget] for start in range(0, len(text), budget)]
+
+
+def pack(parts: List[str], separator: str, budget: int) -> List[str]:
+    """Greedily join consecutive parts into pieces of at most `budget` characters"""
+    pieces: List[str] = []
+    current = ''
+    for part in parts:
+        if len(part) > budget:
+            if current:
+                pieces.append(current)
+            *full, current = split_block(part, budget)
+            pieces.extend(full)
+            continue
+        candidate = f'{current}{separator}{part}' if current else part
+        if len(candidate) <= budget:
+            current = candidate
+        else:
+            pieces.append(current)
+            current = part
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def segment(text: str, limit: int = CHANNEL_LIMITS[DEFAULT_CHANNEL]) -> Pages:
+    """
+    Split a reply into messages of at most `limit` characters. Every page but
+    the last ends with a "1/3 · Escribe más" footer; a reply that already
+    fits (and has no PAGE_BREAK) comes back unchanged as a single page.
+    """
+    if len(text) <= limit and PAGE_BREAK not in text:
+        return (text,)
+
+    budget = limit - FOOTER_ROOM
+    pages = [page.strip('\n')
+             for part in text.split(PAGE_BREAK)
+             for page in split_block(part.strip('\n'), budget)]
+    pages = [page for page in pages if page.strip()]
+    if len(pages) <= 1:
+        return (pages[0] if pages else '',)
+
+    total = len(pages)
+    return tuple(page + PAGE_FOOTER.format(page=number, pages=total) if number < total else page
+                 for number, page in enumerate(pages, 1))
+
+
+class PageCursors:
+    """
+    Remaining pages of each user's last reply. Holding the page tuple itself
+    keeps "más" consistent with what the user saw, even across a data reload.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 1800.0):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._cursors: 'OrderedDict[str, Tuple[Pages, int, float]]' = OrderedDict()
+
+    def start(self, user_id: str, pages: Pages) -> str:
+        """Remember the pages after the first one; returns the first"""
+        if len(pages) > 1:
+            self._cursors[user_id] = (pages, 1, time.monotonic())
+            self._cursors.move_to_end(user_id)
+            if len(self._cursors) > self.max_sessions:
+                self._cursors.popitem(last=False)
+        else:
+            self._cursors.pop(user_id, None)
+        return pages[0]
+
+    def next(self, user_id: str) -> Optional[str]:
+        """The user's next page, or None when nothing is left (or it expired)"""
+        cursor = self._cursors.get(user_id)
+        if cursor is None:
+            return None
+        pages, index, started = cursor
+        if time.monotonic() - started > self.ttl:
+            del self._cursors[user_id]
+            return None
+        if index + 1 < len(pages):
+            self._cursors[user_id] = (pages, index + 1, started)
+        else:
+            del self._cursors[user_id]
+        return pages[index]
+
+    def __len__(self) -> int:
+        return len(self._cursors)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Store Locator
+Store registry loaded from bot_data/stores.json: per-store replies rendered
+once, name/alias matching, opening hours and a nearest-store query for
+locations shared over WhatsApp.
+
+Distances are great-circle (haversine) over numpy arrays of all stores; with
+many stores and scipy installed, a KD-tree over unit vectors narrows the
+search to the few closest candidates first.
+"""
+
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+DAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+# Below this many stores the vectorized scan is faster than building a tree
+KD_TREE_MIN_STORES = 500
+# Nearest candidates checked for being open before falling back to a full scan
+KD_TREE_CANDIDATES = 8
+
+
+class Store(NamedTuple):
+    id: str
+    name: str
+    address: str
+    lat: float
+    lon: float
+    aliases: Tuple[str, ...]
+    hours_text: str
+    # weekday (0 = Monday) -> (opens, closes) in minutes after midnight
+    hours: Dict[int, Tuple[int, int]]
+
+    @property
+    def maps_url(self) -> str:
+        return f"https://maps.google.com/?q={self.lat},{self.lon}"
+
+    def is_open(self, now: datetime) -> bool:
+        minute = now.hour * 60 + now.minute
+        today = self.hours.get(now.weekday())
+        if today and (today[0] <= minute < today[1] or (today[1] <= today[0] and minute >= today[0])):
+            return True
+        # Hours that run past midnight belong to the previous day
+        yesterday = self.hours.get((now.weekday() - 1) % 7)
+        return bool(yesterday and yesterday[1] <= yesterday[0] and minute < yesterday[1])
+
+
+def parse_minutes(value: str) -> int:
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def parse_store(data: dict) -> Store:
+    return Store(
+        id=data['id'],
+        name=data['name'],
+        address=data.get('address', ''),
+        lat=float(data['lat']),
+        lon=float(data['lon']),
+        aliases=tuple(alias.lower() for alias in data.get('aliases', [])),
+        hours_text=data.get('hours_text', ''),
+        hours={DAYS.index(day): (parse_minutes(opens), parse_minutes(closes))
+               for day, (opens, closes) in data.get('hours', {}).items()},
+    )
+
+
+def format_store(store: Store) -> str:
+    return f"📍 *{store.name}*\n\n" \
+           f"🏪 {store.address}\n" \
+           f"🕐 Horarios: {store.hours_text}\n" \
+           f"📱 {store.maps_url}\n\n" \
+           f"💡 Haz clic en el enlace para obtener direcciones GPS"
+
+
+def unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Points on the unit sphere; chord distance orders the same as great-circle distance"""
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+class StoreRegistry:
+    def __init__(self, stores: List[Store], timezone: str = 'America/Caracas'):
+        self.stores = tuple(stores)
+        self.by_id = {store.id: store for store in self.stores}
+        self.replies = {store.id: format_store(store) for store in self.stores}
+        self.timezone = timezone
+
+        self._lat = np.radians([store.lat for store in self.stores])
+        self._lon = np.radians([store.lon for store in self.stores])
+        self._cos_lat = np.cos(self._lat)
+        self._open_minute: Optional[Tuple[int, int]] = None
+        self._open_mask = np.zeros(len(self.stores), dtype=bool)
+
+        self._tree = None
+        if len(self.stores) >= KD_TREE_MIN_STORES:
+            try:
+                from scipy.spatial import cKDTree
+                self._tree = cKDTree(unit_vectors(self._lat, self._lon))
+            except ImportError:
+                logger.warning("⚠️ scipy not installed, nearest-store lookups scan every store")
+
+        # Longest alias first, so "los palos grandes" wins over "palos grandes"
+        aliases = sorted(((alias, store) for store in self.stores for alias in store.aliases),
+                         key=lambda pair: -len(pair[0]))
+        self._alias_store = dict(aliases)
+        self._alias_re = re.compile(r'\b(' + '|'.join(re.escape(alias) for alias, _ in aliases) + r')\b') \
+            if aliases else None
+
+    def __bool__(self) -> bool:
+        return bool(self.stores)
+
+    def now(self) -> datetime:
+        try:
+            from zoneinfo import ZoneInfo
+            return datetime.now(ZoneInfo(self.timezone))
+        except (ImportError, KeyError):
+            return datetime.now()
+
+    def open_mask(self, now: datetime) -> np.ndarray:
+        """Which stores are open at `now` (recomputed at most once a minute)"""
+        minute = (now.weekday(), now.hour * 60 + now.minute)
+        if minute != self._open_minute:
+            self._open_mask = np.array([store.is_open(now) for store in self.stores], dtype=bool)
+            self._open_minute = minute
+        return self._open_mask
+
+    def distances_km(self, lat: float, lon: float) -> np.ndarray:
+        """Haversine distance from (lat, lon) to every store"""
+        lat, lon = np.radians(lat), np.radians(lon)
+        a = (np.sin((self._lat - lat) / 2) ** 2
+             + np.cos(lat) * self._cos_lat * np.sin((self._lon - lon) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def nearest(self, lat: float, lon: float, now: Optional[datetime] = None) -> Optional[Tuple[Store, float, bool]]:
+        """(store, km, open) for the closest open store, or the closest one if all are closed"""
+        if not self.stores:
+            return None
+        is_open = self.open_mask(now or self.now())
+
+        if self._tree is not None:
+            k = min(KD_TREE_CANDIDATES, len(self.stores))
+            _, candidates = self._tree.query(unit_vectors(np.radians([lat]), np.radians([lon]))[0], k=k)
+            for index in np.atleast_1d(candidates):
+                if is_open[index]:
+                    store = self.stores[index]
+                    return store, float(self.distances_km(lat, lon)[index]), True
+
+        distances = self.distances_km(lat, lon)
+        if is_open.any():
+            index = int(np.argmin(np.where(is_open, distances, np.inf)))
+        else:
+            index = int(np.argmin(distances))
+        return self.stores[index], float(distances[index]), bool(is_open[index])
+
+    def nearest_reply(self, lat: float, lon: float, now: Optional[datetime] = None) -> Optional[str]:
+        found = self.nearest(lat, lon, now)
+        if found is None:
+            return None
+        store, km, is_open = found
+        if is_open:
+            header = f"🧭 Tu Prana abierto más cercano está a {km:.1f} km:"
+        else:
+            header = f"🧭 Tu Prana más cercano está a {km:.1f} km (ahora está cerrado):"
+        return f"{header}\n\n{self.replies[store.id]}"
+
+    def match(self, message: str) -> Optional[Store]:
+        """Store named in a message ("castellana", "los palos grandes"), if any"""
+        if self._alias_re is None:
+            return None
+        found = self._alias_re.search(message.lower())
+        return self._alias_store[found.group(1)] if found else None
+
+
+def load_stores(path: str = 'bot_data/stores.json') -> StoreRegistry:
+    """Registry from stores.json (empty if the file is missing)"""
+    if not os.path.exists(path):
+        return StoreRegistry([])
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return StoreRegistry([parse_store(store) for store in data.get('stores', [])],
+                         data.get('timezone', 'America/Caracas'))
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Prana Juice Bar Tabular Cache
+Loads the Prana ML inventory spreadsheet and sales CSV with only the columns
+the setup pipeline uses, explicit dtypes and currency strings ("$59.26")
+parsed to floats once. The typed columns are cached as a numpy .npz keyed by
+the source file's content hash, so later runs skip the spreadsheet parser
+entirely and a changed source is re-imported automatically.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = '.data_cache'
+
+# Bump when the parsing below changes so cached tables are re-imported
+CACHE_VERSION = 1
+
+# Column kinds: 'str' text, 'category' low-cardinality text,
+# 'float' plain numbers ("1,234.5"), 'currency' money ("$59.26")
+NUMERIC_KINDS = ('float', 'currency')
+
+
+class TableSpec(NamedTuple):
+    name: str
+    columns: Dict[str, str]
+    chunk_rows: int = 50000
+
+
+INVENTORY_SPEC = TableSpec('inventory', {
+    'Grupo': 'category',
+    'Tipo': 'category',
+    'Codigo': 'str',
+    'Artículo': 'str',
+    'Unidad': 'category',
+    'Cantidad Total': 'float',
+    'Último Costo': 'currency',
+    'Costo Promedio': 'currency',
+})
+
+SALES_SPEC = TableSpec('sales', {
+    'descripción': 'str',
+    'cantidad': 'float',
+    'precio unitario': 'currency',
+    'total vendido': 'currency',
+})
+
+
+def parse_numeric(values: pd.Series) -> pd.Series:
+    """'$1,234.50' / '1,234.5' / 12 -> float64 (unparseable -> NaN)"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype('float64')
+    cleaned = values.astype('string').str.replace(r'[$,\s]', '', regex=True)
+    return pd.to_numeric(cleaned, errors='coerce').astype('float64')
+
+
+def convert_chunk(chunk: pd.DataFrame, spec: TableSpec) -> pd.DataFrame:
+    """Apply the spec's dtypes to a chunk of raw string columns"""
+    converted = {}
+    for column, kind in spec.columns.items():
+        if column not in chunk.columns:
+            continue
+        if kind in NUMERIC_KINDS:
+            converted[column] = parse_numeric(chunk[column])
+        else:
+            # category is applied once over all chunks, so codes agree
+            converted[column] = chunk[column].astype('object').where(chunk[column].notna(), None)
+    return pd.DataFrame(converted, index=chunk.index)
+
+
+def _read_header(path: str) -> list:
+    if path.endswith('.csv'):
+        return list(pd.read_csv(path, nrows=0).columns)
+    return list(pd.read_excel(path, nrows=0).columns)
+
+
+def import_table(path: str, spec: TableSpec) -> pd.DataFrame:
+    """Parse a CSV or Excel source with only the spec's columns, chunk by chunk"""
+    usecols = [column for column in _read_header(path) if column in spec.columns]
+    missing = set(spec.columns) - set(usecols)
+    if missing:
+        logger.warning(f"⚠️ {os.path.basename(path)} is missing columns: {sorted(missing)}")
+
+    if path.endswith('.csv'):
+        chunks = pd.read_csv(path, usecols=usecols, dtype=str, chunksize=spec.chunk_rows)
+        parts = [convert_chunk(chunk, spec) for chunk in chunks]
+    else:
+        # Excel has no streaming reader; read the needed columns as text and
+        # convert in row slices so only one slice of temporaries is alive
+        raw = pd.read_excel(path, usecols=usecols, dtype=str)
+        parts = [convert_chunk(raw.iloc[start:start + spec.chunk_rows], spec)
+                 for start in range(0, len(raw), spec.chunk_rows)]
+
+    table = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=usecols)
+    for column in usecols:
+        if spec.columns[column] == 'category':
+            table[column] = table[column].astype('category')
+    return table[usecols]
+
+
+def to_arrays(table: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Columnar, pickle-free arrays for np.savez"""
+    arrays = {}
+    for index, column in enumerate(table.columns):
+        values = table[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            arrays[f'c{index}_codes'] = values.cat.codes.to_numpy()
+            arrays[f'c{index}_categories'] = values.cat.categories.astype(str).to_numpy(dtype=str)
+        elif pd.api.types.is_string_dtype(values.dtype):
+            arrays[f'c{index}_values'] = values.fillna('').astype(str).to_numpy(dtype=str)
+            arrays[f'c{index}_null'] = values.isna().to_numpy()
+        else:
+            arrays[f'c{index}_values'] = values.to_numpy()
+    arrays['columns'] = np.array(json.dumps(list(table.columns), ensure_ascii=False))
+    return arrays
+
+
+def from_arrays(arrays) -> pd.DataFrame:
+    columns = json.loads(str(arrays['columns']))
+    data = {}
+    for index, column in enumerate(columns):
+        if f'c{index}_codes' in arrays:
+            data[column] = pd.Categorical.from_codes(arrays[f'c{index}_codes'], arrays[f'c{index}_categories'])
+        elif f'c{index}_null' in arrays:
+            values = arrays[f'c{index}_values'].astype(object)
+            values[arrays[f'c{index}_null']] = None
+            data[column] = pd.Series(values, dtype=object)
+        else:
+            data[column] = arrays[f'c{index}_values']
+    return pd.DataFrame(data, columns=columns)
+
+
+def source_hash(path: str, spec: TableSpec) -> str:
+    """Content hash of the source plus the spec, so either change re-imports"""
+    digest = hashlib.sha256(json.dumps([CACHE_VERSION, spec.columns], sort_keys=True).encode('utf-8'))
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_table(path: str, spec: TableSpec, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> pd.DataFrame:
+    """
+    Typed table for `path`, from the columnar cache when the source is
+    unchanged, otherwise imported and cached. cache_dir=None disables caching.
+    """
+    if cache_dir is None:
+        return import_table(path, spec)
+
+    stem = f'{spec.name}-{os.path.splitext(os.path.basename(path))[0]}'
+    cache_path = os.path.join(cache_dir, f'{stem}-{source_hash(path, spec)[:16]}.npz')
+    if os.path.exists(cache_path):
+        try:
+            with np.load(cache_path, allow_pickle=False) as arrays:
+                return from_arrays(arrays)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable cache {cache_path}: {e}")
+
+    logger.info(f"Importing {path} into the columnar cache...")
+    table = import_table(path, spec)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp.npz'
+    np.savez(tmp_path, **to_arrays(table))
+    os.replace(tmp_path, cache_path)
+
+    # Older imports of the same source are no longer reachable
+    for old_path in glob.glob(os.path.join(cache_dir, f'{stem}-*.npz')):
+        if old_path != cache_path and '.tmp.' not in old_path:
+            os.remove(old_path)
+    return table
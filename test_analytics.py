@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test conversation analytics
+"""
+
+import os
+import tempfile
+
+from analytics import Aggregates, LogAnalytics, SpaceSaving
+from conversation_log import ConversationLog
+
+def write_log(path, messages, **kwargs):
+    log = ConversationLog(path, flush_interval=0.05, **kwargs)
+    for user_id, message, intent in messages:
+        log.log(user_id, message, intent, "respuesta", 1.0)
+    log.close()
+
+def test_analytics():
+    """Checkpointed runs only read new records, across rotations"""
+    print("🧪 TESTING ANALYTICS")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'conversations.jsonl')
+        checkpoint = os.path.join(tmp, 'checkpoint.json')
+        items = ['citrus', 'flu shot']
+
+        write_log(path, [('a', 'hola', 'welcome'), ('a', 'quiero un citrus', 'search'), ('b', 'xyz', 'help')])
+        analytics = LogAnalytics(path, checkpoint, items)
+        assert analytics.refresh() == 3
+
+        # A small max_bytes forces rotation into gzipped segments
+        write_log(path, [('b', 'flu shot', 'item_details')] * 20, max_bytes=300)
+        resumed = LogAnalytics(path, checkpoint, items)
+        assert resumed.refresh() == 20
+        assert resumed.refresh() == 0
+
+        report = resumed.report()
+        print(f"\n📊 {report['total_messages']} messages, fallback rate {report['fallback_rate']}")
+        print(f"   Top items: {report['top_items']}")
+        assert report['total_messages'] == 23
+        assert report['top_items'][0] == ('flu shot', 20)
+
+        # Aggregates from separate runs merge into the same totals
+        first, second = Aggregates(items), Aggregates(items)
+        first.update({'message': 'citrus', 'intent': 'search', 'ts': 0})
+        second.update({'message': 'citrus', 'intent': 'search', 'ts': 0})
+        first.merge(second)
+        assert first.items.top(1) == [('citrus', 2)]
+
+    sketch = SpaceSaving(capacity=2)
+    for key in ['a', 'a', 'a', 'b', 'c']:
+        sketch.add(key)
+    assert sketch.top(1) == [('a', 3)]
+
+if __name__ == "__main__":
+    test_analytics()
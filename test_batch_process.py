@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test the batch message processor
+"""
+
+import io
+import json
+import queue
+from types import SimpleNamespace
+
+import batch_process
+from batch_process import run_batch, write_results
+
+def test_batch_process():
+    """Messages run through two workers, in order per user, each line once"""
+    print("🧪 TESTING BATCH PROCESSOR")
+    print("=" * 50)
+
+    messages = ["hola", "menu", "2", "1", "horarios", "gracias"]
+    lines = [json.dumps({'user_id': f"user{i % 4}", 'message': messages[i // 4]}) for i in range(24)]
+    lines.insert(5, '{"user_id": "user9", "mensaje": sin comillas}')
+    lines.insert(9, '')
+    # Input line number -> user, for the well-formed lines
+    expected = {number: json.loads(line)['user_id']
+                for number, line in enumerate(lines, 1) if line and 'sin comillas' not in line}
+
+    output = io.StringIO()
+    stats = run_batch(io.StringIO('\n'.join(lines) + '\n'), output, workers=2)
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    print(f"📦 {stats['processed']} processed, {stats['skipped']} skipped in {stats['wall_s']}s")
+
+    assert stats['skipped'] == 1 and stats['read'] == 24 and stats['errors'] == 0
+    assert sorted(record['line'] for record in records) == sorted(expected)
+    assert all(expected[record['line']] == record['user_id'] for record in records)
+    for user_id in set(expected.values()):
+        user_lines = [record['line'] for record in records if record['user_id'] == user_id]
+        assert user_lines == sorted(user_lines), user_id
+        assert len({record['worker'] for record in records if record['user_id'] == user_id}) == 1
+
+    # A worker that dies without sending its worker_id does not hang the writer
+    results = queue.Queue()
+    results.put({'line': 1, 'user_id': 'a', 'message': 'hola', 'elapsed_ms': 1.0})
+    results.put(0)
+    processes = [SimpleNamespace(exitcode=0), SimpleNamespace(exitcode=-9)]
+    stats = {'processed': 0, 'errors': 0, 'failed_workers': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+    poll_interval = batch_process.POLL_INTERVAL
+    batch_process.POLL_INTERVAL = 0.05
+    try:
+        write_results(results, io.StringIO(), processes, stats)
+    finally:
+        batch_process.POLL_INTERVAL = poll_interval
+    assert stats['processed'] == 1 and stats['failed_workers'] == 1
+    print("💀 Killed worker reported instead of waited on")
+
+    print("✅ Batch processor test passed")
+
+if __name__ == "__main__":
+    test_batch_process()
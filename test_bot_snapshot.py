@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test bot data snapshots and the per-snapshot reply cache
+"""
+
+import os
+import shutil
+import tempfile
+
+from bot_snapshot import BotSnapshot, ReplyCache
+from custom_whatsapp_bot import PranaWhatsAppBot
+
+def test_bot_snapshot():
+    """File changes make a snapshot stale; reloading starts an empty reply cache"""
+    print("🧪 TESTING BOT SNAPSHOT")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'bot_data')
+        shutil.copytree('bot_data', data_dir)
+        snapshot = BotSnapshot(data_dir)
+        assert not snapshot.is_stale() and BotSnapshot(data_dir).version == snapshot.version
+
+        with open(os.path.join(data_dir, 'menu_items.json'), 'a', encoding='utf-8') as f:
+            f.write('\n')
+        assert snapshot.is_stale()
+        assert BotSnapshot(data_dir).version != snapshot.version
+        print("🔄 Menu file change detected")
+
+    cache = ReplyCache('v1')
+    renders = []
+    assert cache.get('welcome', lambda: renders.append(1) or "hola") == "hola"
+    assert cache.get('welcome', lambda: renders.append(1) or "otra") == "hola"
+    assert renders == [1] and (cache.hits, cache.misses) == (1, 1)
+
+    # Paged forms of long replies are capped
+    for i in range(ReplyCache.MAX_PAGED_REPLIES + 100):
+        pages = cache.pages(f"respuesta {i}\n\n" + "item\n" * 100, 200)
+        assert len(pages) > 1
+    assert len(cache._pages) == ReplyCache.MAX_PAGED_REPLIES
+    assert cache.pages("corta", 200) == ("corta",)
+
+    bot = PranaWhatsAppBot()
+    old_replies = bot.snapshot.replies
+    old_replies.get('sentinel', lambda: "vieja")
+    assert 'sentinel' in old_replies
+    assert bot.reload()
+    assert bot.snapshot.replies is not old_replies and 'sentinel' not in bot.snapshot.replies
+    assert len(bot.snapshot.replies) > 0  # warmed again for the new snapshot
+    print("♻️ Reload starts a fresh reply cache")
+
+    print("✅ Bot snapshot test passed")
+
+if __name__ == "__main__":
+    test_bot_snapshot()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test the incremental bot-data build manifest
+"""
+
+import os
+import tempfile
+
+from build_manifest import BuildManifest
+
+def test_build_manifest():
+    """Artifacts are only rebuilt when an input or the output itself changed"""
+    print("🧪 TESTING BUILD MANIFEST")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'menu.json')
+        output = os.path.join(tmp, 'out', 'menu.txt')
+        manifest_path = os.path.join(tmp, 'manifest.json')
+        with open(source, 'w') as f:
+            f.write('{"price": 5}')
+
+        renders = []
+        def render():
+            renders.append(1)
+            with open(source) as f:
+                return f.read().upper()
+
+        manifest = BuildManifest(manifest_path)
+        assert manifest.build(output, [source], render)
+        manifest.save()
+        print(f"🔨 First build: {manifest.built}")
+
+        manifest = BuildManifest(manifest_path)
+        assert not manifest.build(output, [source], render)
+        assert len(renders) == 1
+        print("✅ Unchanged input skipped")
+
+        with open(source, 'w') as f:
+            f.write('{"price": 6}')
+        check = BuildManifest(manifest_path, check=True)
+        assert check.build(output, [source], render)
+        assert len(renders) == 1, "check mode must not render"
+        print(f"🔍 Check mode reports: {check.built}")
+
+        manifest = BuildManifest(manifest_path)
+        assert manifest.build(output, [source], render)
+        manifest.save()
+        with open(output) as f:
+            assert f.read() == '{"PRICE": 6}'
+
+        # Hand edits to an artifact are overwritten on the next build
+        with open(output, 'w') as f:
+            f.write('edited')
+        assert BuildManifest(manifest_path).is_stale(output, [source])
+        # A new builder version rebuilds everything
+        assert BuildManifest(manifest_path).is_stale(output, [source], version='2')
+
+        assert not [name for name in os.listdir(os.path.dirname(output)) if name.endswith('.tmp')]
+        print("✅ No temp files left behind")
+
+if __name__ == "__main__":
+    test_build_manifest()
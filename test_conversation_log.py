@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test the conversation log writer
+"""
+
+import glob
+import os
+import tempfile
+import time
+
+from conversation_log import ConversationLog
+from fast_path import iter_logged_messages
+
+def test_conversation_log():
+    """Records are written in batches, rotated by size and gzipped"""
+    print("🧪 TESTING CONVERSATION LOG")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'conversations.jsonl')
+        log = ConversationLog(path, max_bytes=2000, flush_interval=0.05, batch_size=10)
+
+        for i in range(100):
+            assert log.log(f"user{i % 7}", f"mensaje {i}", 'help', "respuesta", 0.5)
+        log.close()
+
+        segments = sorted(glob.glob(os.path.join(tmp, 'conversations*.jsonl*')))
+        print(f"\n📁 Segments: {[os.path.basename(s) for s in segments]}")
+        assert any(s.endswith('.gz') for s in segments)
+
+        messages = list(iter_logged_messages(segments))
+        print(f"   Records read back: {len(messages)}")
+        assert sorted(messages) == sorted(f"mensaje {i}" for i in range(100))
+        assert log.written == 100 and log.dropped == 0
+
+    # Two writers on one file (two worker processes): one rotates, the other
+    # follows it to the new segment and no record is lost
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'conversations.jsonl')
+        logs = [ConversationLog(path, max_bytes=2000, flush_interval=0.01, batch_size=5) for _ in range(2)]
+        for i in range(200):
+            logs[i % 2].log(f"user{i % 7}", f"mensaje {i}", 'help', "respuesta", 0.5)
+            if i % 20 == 0:
+                time.sleep(0.02)
+        for log in logs:
+            log.close()
+
+        segments = sorted(glob.glob(os.path.join(tmp, 'conversations*.jsonl*')))
+        messages = list(iter_logged_messages(segments))
+        print(f"👥 Two writers: {len(segments)} segments, {len(messages)} records")
+        assert sorted(messages) == sorted(f"mensaje {i}" for i in range(200))
+
+if __name__ == "__main__":
+    test_conversation_log()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the compiled dialogue state machine
+"""
+
+from custom_whatsapp_bot import PranaWhatsAppBot
+from dialogue import ANY, DialogueSessions, compile_flows, match
+
+def test_dialogue():
+    """Flows compile into per-state tables and numbers mean what the user is looking at"""
+    print("🧪 TESTING DIALOGUE STATE MACHINE")
+    print("=" * 50)
+
+    spec = {
+        'initial': 'new',
+        'recognizers': ['word'],
+        'flows': {
+            'main': [
+                ('new', ANY, 'hello', 'idle'),
+                (ANY, 'yes', 'ok', None),
+                (ANY, ANY, 'help', 'idle'),
+                ('asked', 'yes', 'confirm', 'idle'),
+            ],
+        },
+    }
+    actions = {name: (lambda name: lambda slot, context: (name, context))(name)
+               for name in ('hello', 'ok', 'help', 'confirm')}
+    machine = compile_flows(spec, {'word': lambda message: match(message)}, actions)
+    new, idle, asked = (machine.states.index(state) for state in ('new', 'idle', 'asked'))
+    assert machine.transition(new, match('yes')).action == 'hello'  # 'new' is modal
+    assert machine.transition(idle, match('yes')).action == 'ok'
+    assert machine.transition(asked, match('yes')).action == 'confirm'
+    assert machine.transition(asked, match('other')).action == 'help'
+    assert machine.step(idle, 'ctx', match('yes'))[2:] == (idle, 'ctx')
+
+    for broken in ([(ANY, 'yes', 'ok', None), (ANY, 'yes', 'help', None)], [(ANY, ANY, 'missing', None)]):
+        try:
+            compile_flows({**spec, 'flows': {'main': spec['flows']['main'] + broken}},
+                          {'word': lambda message: match(message)}, actions)
+        except ValueError as e:
+            print(f"✅ Rejected: {e}")
+        else:
+            raise AssertionError("Invalid spec compiled")
+
+    sessions = DialogueSessions(initial=0, max_sessions=2)
+    for user in ('a', 'b', 'c'):
+        sessions.set(user, 1, ('x',))
+    assert len(sessions) == 2 and sessions.get('a') == (0, None) and sessions.get('c') == (1, ('x',))
+
+    bot = PranaWhatsAppBot()
+
+    def say(user, message):
+        reply, intent = bot.handle_message(user, message)
+        print(f"👤 {message!r} -> {intent}")
+        return reply, intent
+
+    user = 'test-dialogue'
+    assert say(user, "2")[1] == 'welcome'
+    reply, intent = say(user, "2")
+    assert intent == 'category_number' and 'SHOTS' in reply
+    # Now "1" is the first shot, not the first category
+    reply, intent = say(user, "1")
+    shots = bot.inventory.category('shots')
+    assert intent == 'list_item' and shots[0].name.upper() in reply
+    reply, intent = say(user, "opción 2")
+    assert intent == 'list_item' and shots[1].name.upper() in reply
+    # Out of range: the fallback answers
+    assert say(user, "99")[1] == 'help'
+    assert say(user, "menu")[1] == 'menu_categories'
+    assert say(user, "10")[1] == 'help'
+
+    reply, intent = say(user, "quiero un citrus")
+    assert intent == 'order_start' and '(si/no)' in reply
+    reply, intent = say(user, "si")
+    assert intent == 'order_confirm' and 'CITRUS' in reply
+    assert say(user, "si")[1] == 'positive'
+    say(user, "quiero un citrus")
+    assert say(user, "no")[1] == 'order_cancel'
+    assert say(user, "no")[1] == 'goodbye'
+
+    reply, intent = say(user, "ubicacion")
+    assert intent == 'location'
+    reply, intent = say(user, "2")
+    assert intent == 'store_number' and bot.stores.stores[1].name in reply
+
+    print("✅ Dialogue test passed")
+
+if __name__ == "__main__":
+    test_dialogue()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test that the exact-match fast path answers like the full cascade
+"""
+
+from custom_whatsapp_bot import PranaWhatsAppBot
+from enhanced_whatsapp_bot import EnhancedPranaWhatsAppBot
+from fast_path import normalize_message, router_phrases
+
+def replies_match(bot, phrase: str, tag: str) -> bool:
+    """Same (reply, intent) with and without the fast path, as first and as later message"""
+    fast_path = bot.fast_path
+    for first in (True, False):
+        results = []
+        for table in (fast_path, {}):
+            bot.fast_path = table
+            user_id = f"fast-path-{tag}-{first}-{bool(table)}"
+            if not first:
+                bot.handle_message(user_id, "hola")
+            results.append(bot.handle_message(user_id, phrase))
+        bot.fast_path = fast_path
+        if results[0] != results[1]:
+            print(f"❌ {phrase!r} (first message: {first}): {results[0][1]} vs {results[1][1]}")
+            return False
+    return True
+
+def test_fast_path():
+    """Every router phrase resolves to the same intent with or without the fast path"""
+    print("🧪 TESTING FAST PATH")
+    print("=" * 50)
+
+    custom = PranaWhatsAppBot()
+    enhanced = EnhancedPranaWhatsAppBot(use_ollama=False)
+
+    for key, found in custom.fast_path.items():
+        assert found == custom.dialogue.recognize(key), key
+    for key, route in enhanced.fast_path.items():
+        assert route.intent == enhanced.resolve_message(key).intent, key
+
+    for bot in (custom, enhanced):
+        phrases = sorted({normalize_message(phrase) for phrase in router_phrases(bot)} - {''})
+        assert sum(phrase in bot.fast_path for phrase in phrases) > len(phrases) // 2
+        mismatches = [phrase for i, phrase in enumerate(phrases) if not replies_match(bot, phrase, str(i))]
+        print(f"⚡ {type(bot).__name__}: {len(phrases)} phrases, {len(bot.fast_path)} fast path entries")
+        assert mismatches == []
+
+    print("✅ Fast path test passed")
+
+if __name__ == "__main__":
+    test_fast_path()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Test the intent classifier tier
+"""
+
+import time
+
+from intent_classifier import IntentClassifier, collect_examples
+
+def test_intent_classifier():
+    """Train on the seed examples and check predictions and latency"""
+    print("🧪 TESTING INTENT CLASSIFIER")
+    print("=" * 50)
+
+    examples = collect_examples(log_glob=None)
+    model = IntentClassifier.train([text for text, _ in examples], [intent for _, intent in examples])
+
+    test_cases = [
+        ("a que horas abren", "hours"),
+        ("donde quedan", "location"),
+        ("estoy cansado", "energy_drinks"),
+        ("asdf", None),
+    ]
+
+    for message, expected in test_cases:
+        intent, confidence = model.predict(message)
+        print(f"\n📱 Testing: '{message}'")
+        print(f"   Expected: {expected}, got: {intent} ({confidence:.2f})")
+        assert intent == expected
+
+    start = time.perf_counter()
+    for _ in range(200):
+        model.predict("tienen algo para el calor")
+    per_call = (time.perf_counter() - start) / 200
+    print(f"\n⏱️  {per_call * 1e6:.1f}µs per prediction")
+    assert per_call < 0.001
+
+if __name__ == "__main__":
+    test_intent_classifier()
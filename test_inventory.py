@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test inventory-aware availability
+"""
+
+from custom_whatsapp_bot import PranaWhatsAppBot
+from inventory import InventoryIndex
+from menu_model import MenuIndex, load_menu_items
+
+def test_inventory():
+    """Running out of an ingredient hides only the items that use it"""
+    print("🧪 TESTING INVENTORY AVAILABILITY")
+    print("=" * 50)
+
+    menu_index = MenuIndex(load_menu_items('bot_data/menu_items.json'))
+    stock = {'JENGIBRE KG': 2.0, 'NARANJA': 10.0, 'PIÑA': 5.0}
+    inventory = InventoryIndex(menu_index, stock)
+
+    shots = [item.name for item in inventory.category('shots')]
+    print(f"\n💉 Shots in stock: {shots}")
+    assert 'ginger shot' in shots
+
+    flipped = inventory.update_stock({'JENGIBRE KG': 0})
+    print(f"📦 Out of jengibre, now unavailable: {[item.name for item in flipped]}")
+    assert 'ginger shot' in [item.name for item in flipped]
+    assert 'ginger shot' not in [item.name for item in inventory.category('shots')]
+    # Items without jengibre are untouched
+    assert 'Cool Melon' in [item.name for item in inventory.tagged('cold')]
+
+    flipped = inventory.update_stock({'JENGIBRE KG': 1.5})
+    assert 'ginger shot' in [item.name for item in inventory.category('shots')]
+
+    # Fast path matches are rebuilt when availability flips
+    bot = PranaWhatsAppBot()
+    bot.inventory = InventoryIndex(bot.menu_index, {'AGUACATE': 3.0})
+    bot.build_fast_path()
+    assert 'tostada de aguacate' in bot.fast_path['nada mas'].slot[1]
+    assert [item.name for item in bot.update_inventory({'AGUACATE': 0})] == \
+        [item.name for item in bot.menu_items if 'aguacate' in item.ingredients_lower]
+    bot.handle_message('inventory-user', 'hola')
+    assert 'tostada de aguacate' not in bot.handle_message('inventory-user', 'nada mas')[0]
+
+if __name__ == "__main__":
+    test_inventory()
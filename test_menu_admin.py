@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test live menu edits through the admin layer
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+def matches_rebuild(bot) -> bool:
+    """The patched reply cache and fast path equal what a full rebuild gives"""
+    replies, fast_path = dict(bot.snapshot.replies._replies), bot.fast_path
+    bot.snapshot.replies.clear()
+    bot.warm_reply_cache()
+    bot.build_fast_path()
+    return replies == bot.snapshot.replies._replies and fast_path == bot.fast_path
+
+def test_menu_admin():
+    """Create, update, toggle and delete items; indexes follow without a reload"""
+    print("🧪 TESTING MENU ADMIN")
+    print("=" * 50)
+
+    here = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree('bot_data', os.path.join(tmp, 'bot_data'))
+        shutil.copy('menu_template.json', tmp)
+        os.chdir(tmp)
+        try:
+            from custom_whatsapp_bot import PranaWhatsAppBot
+            from menu_admin import AdminError, MenuAdmin
+
+            bot = PranaWhatsAppBot()
+            admin = MenuAdmin(bot)
+            version = bot.snapshot.version
+            replies, extractor = bot.snapshot.replies, bot.order_extractor
+
+            admin.create({'name': 'Jugo Galaxia', 'price': '$9.50', 'category': 'Jugos Naturales',
+                          'ingredients': 'Pitaya, Mango, Coco', 'tags': ['energy']})
+            item = bot.menu_index.by_name['jugo galaxia']
+            print(f"➕ Created {item.name} (${item.price})")
+            assert item in bot.menu_index.category('Jugos Naturales')
+            assert item in bot.menu_index.tagged('energy')
+            assert 'Jugo Galaxia' in (bot.search_menu_items('galaxia') or '')
+            assert bot.snapshot.version != version
+            assert not bot.snapshot.is_stale()
+            assert bot.snapshot.replies is replies and matches_rebuild(bot)
+
+            admin.update('jugo galaxia', {'price': 11, 'category': 'Smoothies'})
+            item = bot.menu_index.by_name['jugo galaxia']
+            assert item.price == 11 and item.name == 'Jugo Galaxia'
+            assert item in bot.menu_index.category('Smoothies')
+            assert item not in bot.menu_index.category('Jugos Naturales')
+            assert matches_rebuild(bot)
+            print("✏️ Updated price and category")
+
+            extractor = bot.order_extractor
+            admin.set_available('Jugo Galaxia')
+            assert not bot.menu_index.by_name['jugo galaxia'].available
+            # Same name: the order automaton is patched, not rebuilt
+            assert bot.order_extractor is extractor
+            assert bot.order_extractor.extract("2 jugo galaxia")[0].item is bot.menu_index.by_name['jugo galaxia']
+            assert matches_rebuild(bot)
+            admin.set_available('Jugo Galaxia', 'si')
+            assert bot.menu_index.by_name['jugo galaxia'].available
+            print("🔁 Toggled availability")
+
+            with open('bot_data/menu_structure.json', 'r', encoding='utf-8') as f:
+                structure = json.load(f)
+            assert 'Jugo Galaxia' in [entry['name'] for entry in structure['Smoothies']]
+
+            for bad, status in (({'name': 'Jugo Galaxia', 'category': 'Smoothies'}, 409),
+                                ({'name': 'Sin Categoria'}, 400)):
+                try:
+                    admin.create(bad)
+                except AdminError as e:
+                    assert e.status == status
+                else:
+                    raise AssertionError(f"{bad} should be rejected")
+
+            admin.delete('Jugo Galaxia')
+            assert 'jugo galaxia' not in bot.menu_index.by_name
+            assert 'Jugo Galaxia' not in (bot.search_menu_items('galaxia') or '')
+            assert not bot.snapshot.is_stale() and matches_rebuild(bot)
+            print("🗑️ Deleted")
+
+            # Editing an item that is listed in cached replies and the fast path
+            admin.update('citrus', {'price': 99})
+            assert '$99' in bot.get_juices() and matches_rebuild(bot)
+            print("♻️ Patched replies and fast path match a full rebuild")
+
+            with open('menu_template.json', 'r', encoding='utf-8') as f:
+                assert 'Jugo Galaxia' not in [item['name'] for item in json.load(f)['menu_items']]
+        finally:
+            os.chdir(here)
+
+    print("✅ Menu admin test passed")
+
+if __name__ == "__main__":
+    test_menu_admin()
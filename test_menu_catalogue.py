@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite menu catalogue and its read-only query layer
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+
+from menu_catalogue import CatalogueReader, open_catalogue
+
+def test_menu_catalogue():
+    """Seeding, transactional edits, FTS search and JSON export"""
+    print("🧪 TESTING MENU CATALOGUE")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'menu.db')
+        export_path = os.path.join(tmp, 'menu_template.json')
+
+        catalogue = open_catalogue(db_path, 'menu_template.json')
+        with open('menu_template.json', 'r', encoding='utf-8') as f:
+            template = json.load(f)
+        print(f"📥 Seeded {len(catalogue)} items")
+        assert catalogue.items() == template['menu_items']
+
+        reader = CatalogueReader(db_path)
+        results = reader.search('jengibre')
+        print(f"🔍 'jengibre': {results[:3]}")
+        assert results and results[0].lower() in ('shot de jengibre', 'ginger shot')
+        assert reader.search('pina')  # accents are folded: matches "PIÑA"
+
+        # A new item is visible to the reader as soon as its transaction commits
+        catalogue.add_item({'name': 'Acai Tropical', 'price': 12, 'category': 'Bowl de Acai',
+                            'ingredients': ['Acai', 'Mango', 'Granola'], 'tags': ['energy'],
+                            'locations': ['Centro']})
+        assert reader.search('tropical') == ['Acai Tropical']
+        assert reader.item('acai tropical')['locations'] == ['Centro']
+        assert 'Acai Tropical' in [item['name'] for item in reader.tagged('energy')]
+
+        # Updating by name keeps a single row and re-indexes it
+        catalogue.add_item({'name': 'Acai Tropical', 'price': 12.5, 'category': 'Bowl de Acai',
+                            'ingredients': ['Acai', 'Pitaya']})
+        assert reader.item('Acai Tropical')['price'] == 12.5
+        assert 'Acai Tropical' not in reader.search('granola')
+        print("✅ Inserts and updates are searchable immediately")
+
+        # A failing batch leaves nothing behind
+        try:
+            catalogue.add_items([{'name': 'Half Batch', 'price': 1}, {'name': '  '}])
+        except ValueError:
+            pass
+        assert reader.item('Half Batch') is None
+        print("✅ Failed batch rolled back")
+
+        try:
+            reader.conn.execute("DELETE FROM items")
+            raise AssertionError("reader must be read-only")
+        except sqlite3.OperationalError:
+            pass
+
+        catalogue.export_json(export_path)
+        with open(export_path, 'r', encoding='utf-8') as f:
+            exported = json.load(f)
+        assert exported['menu_items'][-1]['name'] == 'Acai Tropical'
+        assert exported['categories'][:len(template['categories'])] == template['categories']
+        print(f"📤 Exported {len(exported['menu_items'])} items")
+        catalogue.close()
+
+if __name__ == "__main__":
+    test_menu_catalogue()
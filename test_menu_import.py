@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test bulk menu import into the catalogue
+"""
+
+import json
+import os
+import tempfile
+
+from menu_catalogue import MenuCatalogue
+from menu_import import import_file
+
+def test_menu_import():
+    """Errors abort the whole import, dry runs change nothing, rows merge by name"""
+    print("🧪 TESTING BULK MENU IMPORT")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalogue = MenuCatalogue(os.path.join(tmp, 'menu.db'))
+        catalogue.add_item({'name': 'CITRUS', 'price': 6.5, 'category': 'Jugos Cold Pressed',
+                            'ingredients': ['pina', 'naranja'], 'tags': ['cold']})
+
+        bad_csv = os.path.join(tmp, 'bad.csv')
+        with open(bad_csv, 'w', encoding='utf-8') as f:
+            f.write('nombre,precio,categoria,disponible\n')
+            f.write('Acai Tropical,12.5,Bowl de Acai,si\n')
+            f.write(',3,Shots,si\n')
+            f.write('Flu Shot,gratis,Shots,quizas\n')
+        report = import_file(bad_csv, catalogue)
+        print(f"❌ Errors: {report.errors}")
+        assert [error.row for error in report.errors] == [3, 4, 4]
+        assert not report.committed and catalogue.item('Acai Tropical') is None
+
+        jsonl = os.path.join(tmp, 'items.jsonl')
+        with open(jsonl, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'name': 'citrus', 'price': '$7.00'}) + '\n')
+            f.write(json.dumps({'name': 'Acai Tropical', 'price': 12, 'category': 'Bowl de Acai',
+                                'ingredients': ['Acai', 'Mango'], 'locations': ['Centro']}) + '\n')
+
+        diff = []
+        report = import_file(jsonl, catalogue, dry_run=True, out=diff.append)
+        print(f"🔍 Dry run: {diff}")
+        assert diff == ["~ row 1: CITRUS: price 6.5 -> 7.0", "+ row 2: Acai Tropical (Bowl de Acai)"]
+        assert catalogue.item('CITRUS')['price'] == 6.5 and catalogue.item('Acai Tropical') is None
+
+        report = import_file(jsonl, catalogue)
+        print(f"📥 {report.summary()}")
+        assert report.committed and (report.added, report.updated) == (1, 1)
+        # Columns missing from the file keep their value
+        assert catalogue.item('CITRUS')['tags'] == ['cold']
+        assert catalogue.item('Acai Tropical')['locations'] == ['Centro']
+
+        report = import_file(jsonl, catalogue)
+        assert report.unchanged == 2
+        print("✅ Re-import is a no-op")
+        catalogue.close()
+
+if __name__ == "__main__":
+    test_menu_import()
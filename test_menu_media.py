@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test menu image variants and how the app serves them
+"""
+
+import os
+import shutil
+import tempfile
+
+from menu_media import VARIANTS, MenuMedia, build_media
+
+def test_menu_media():
+    """Variants are built once, content-addressed, and served cacheably"""
+    print("🧪 TESTING MENU MEDIA")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        images_dir = os.path.join(tmp, 'images')
+        store_dir = os.path.join(tmp, 'store')
+        os.makedirs(images_dir)
+        for name in ('menu1.jpg', 'menu2.jpg'):
+            shutil.copy(os.path.join('menu_images', name), images_dir)
+
+        index = build_media(images_dir, store_dir)
+        assert list(index['images']) == ['menu1.jpg', 'menu2.jpg']
+        for image in index['images'].values():
+            for variant, entry in image['variants'].items():
+                assert max(entry['width'], entry['height']) <= VARIANTS[variant]['max_side']
+                assert os.path.getsize(os.path.join(store_dir, entry['file'])) == entry['bytes']
+        print(f"🖼️ Built {len(os.listdir(store_dir)) - 1} files")
+
+        # Unchanged sources are not re-encoded
+        assert build_media(images_dir, store_dir) == index
+
+        media = MenuMedia(store_dir)
+        files = media.files()
+        assert len(files) == 2
+        assert media.path('../index.json') is None and media.path(files[0])
+
+        # An empty path turns the conversation log off while app is imported;
+        # the variable and the bot's media store are restored for later tests
+        saved_log_path = os.environ.get('CONVERSATION_LOG_PATH')
+        os.environ['CONVERSATION_LOG_PATH'] = ''
+        try:
+            import app
+        finally:
+            if saved_log_path is None:
+                del os.environ['CONVERSATION_LOG_PATH']
+            else:
+                os.environ['CONVERSATION_LOG_PATH'] = saved_log_path
+        saved_media = app.bot.menu_media
+        app.bot.menu_media = media
+        try:
+            client = app.app.test_client()
+
+            response = client.get(f'/media/{files[0]}')
+            etag = response.headers['ETag']
+            print(f"📤 {response.status_code} {response.headers['Content-Length']} bytes, ETag {etag}")
+            assert response.status_code == 200 and response.mimetype == 'image/jpeg'
+            assert not etag.startswith('W/') and 'immutable' in response.headers['Cache-Control']
+            assert client.get(f'/media/{files[0]}', headers={'If-None-Match': etag}).status_code == 304
+            partial = client.get(f'/media/{files[0]}', headers={'Range': 'bytes=0-99'})
+            assert partial.status_code == 206 and len(partial.data) == 100
+            assert client.get('/media/nope.jpg').status_code == 404
+
+            client.post('/webhook', data={'From': 'whatsapp:+5800', 'Body': 'hola'})
+            twiml = client.post('/webhook', data={'From': 'whatsapp:+5800', 'Body': '¿me mandas el menú?'}).data.decode()
+            assert twiml.count('<Media>') == 2 and f'/media/{files[0]}</Media>' in twiml
+            print("📱 Menu reply carries the photos as MediaUrl")
+        finally:
+            app.bot.menu_media = saved_media
+
+    print("✅ Menu media test passed")
+
+if __name__ == "__main__":
+    test_menu_media()
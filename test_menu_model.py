@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test the read-only menu records and the menu index lookups
+"""
+
+from menu_model import MenuIndex, MenuItem, load_menu_items
+
+def test_menu_model():
+    """MenuItem is immutable; MenuIndex lookups stay in menu order across edits"""
+    print("🧪 TESTING MENU MODEL")
+    print("=" * 50)
+
+    item = MenuItem.from_dict({'name': 'Citrus', 'price': '6.50', 'category': 'Jugos',
+                               'ingredients': 'naranja y limón', 'tags': [' Cold ', '']})
+    assert item.name_lower == 'citrus' and item.category_id == 'jugos'
+    assert item.price_cents == 650 and item.ingredients == ('naranja y limón',)
+    assert item.tags == ('cold',) and item.available
+    assert item.bullet_line == "• *Citrus* - $6.50"
+    assert not hasattr(item, '__dict__')
+    for mutate in (lambda: setattr(item, 'price', 1), lambda: delattr(item, 'name'),
+                   lambda: setattr(item, 'extra', 1)):
+        try:
+            mutate()
+        except AttributeError as e:
+            print(f"✅ Rejected: {e}")
+        else:
+            raise AssertionError("MenuItem was modified")
+    assert MenuItem.from_dict(item.to_dict()).to_dict() == item.to_dict()
+
+    items = [MenuItem.from_dict({'name': name, 'price': 5, 'category': category, 'tags': tags})
+             for name, category, tags in (
+                 ('A', 'Jugos', ['cold']), ('B', 'Shots', []), ('C', 'Jugos', ['cold']),
+                 ('D', 'Jugos', []), ('E', 'Shots', ['energy']))]
+    index = MenuIndex(items)
+    assert index.by_name['c'] is items[2] and index.named(['E', 'x', 'a']) == [items[4], items[0]]
+    assert [i.name for i in index.category('JUGOS')] == ['A', 'C', 'D']
+    assert [i.name for i in index.tagged('cold')] == ['A', 'C'] and index.tags() == ['cold', 'energy']
+
+    # An edited item keeps its menu position, also when it changes category
+    moved = MenuItem.from_dict({'name': 'B', 'price': 6, 'category': 'Jugos', 'tags': ['cold']})
+    by_category = index.by_category
+    index.replace(items[1], moved)
+    # A request thread still holding the previous dicts sees them unchanged
+    assert by_category is not index.by_category and by_category['shots'] == (items[1], items[4])
+    assert [i.name for i in index.category('jugos')] == ['A', 'B', 'C', 'D']
+    assert [i.name for i in index.category('shots')] == ['E']
+    assert [i.name for i in index.tagged('cold')] == ['A', 'B', 'C']
+    assert index.by_name['b'] is moved and [i.name for i in index.items] == ['A', 'B', 'C', 'D', 'E']
+
+    # Removed items leave every bucket; new items go last
+    index.replace(items[0], None)
+    index.replace(None, MenuItem.from_dict({'name': 'F', 'category': 'Jugos', 'tags': ['cold']}))
+    assert 'a' not in index.by_name and [i.name for i in index.category('jugos')] == ['B', 'C', 'D', 'F']
+    assert [i.name for i in index.tagged('cold')] == ['B', 'C', 'F']
+    index.replace(items[4], None)
+    assert index.category('shots') == () and index.tags() == ['cold']
+
+    menu = load_menu_items()
+    assert len({item.name_lower for item in menu}) == len(MenuIndex(menu).by_name)
+    print(f"📋 {len(menu)} menu items loaded")
+
+    print("✅ Menu model test passed")
+
+if __name__ == "__main__":
+    test_menu_model()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test the menu OCR cache (the OCR worker and its pool are replaced, so
+Tesseract is not needed)
+"""
+
+import os
+import tempfile
+
+from PIL import Image, ImageDraw
+
+import menu_ocr
+from menu_ocr import DEFAULT_SETTINGS, OcrResult, ocr_images, preprocess
+
+class InlinePool:
+    """Stands in for ProcessPoolExecutor and counts how often a pool starts"""
+    started = 0
+
+    def __init__(self, max_workers=None):
+        InlinePool.started += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def map(self, fn, *iterables):
+        return map(fn, *iterables)
+
+def fake_ocr_worker(path, content_hash, settings, text_path, cache_dir):
+    text = f"{os.path.basename(path)} threshold={settings['threshold']}"
+    with open(text_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return OcrResult(path, text, cached=False)
+
+def test_menu_ocr():
+    """Unchanged images and settings are served from the cache without a pool"""
+    print("🧪 TESTING MENU OCR CACHE")
+    print("=" * 50)
+
+    saved = menu_ocr.ProcessPoolExecutor, menu_ocr._ocr_worker
+    menu_ocr.ProcessPoolExecutor, menu_ocr._ocr_worker = InlinePool, fake_ocr_worker
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, 'cache')
+            paths = []
+            for i in range(2):
+                image = Image.new('RGB', (400, 120), 'white')
+                ImageDraw.Draw(image).text((10, 40), f"JUGO {i} - $5", fill='black')
+                paths.append(os.path.join(tmp, f'menu{i}.png'))
+                image.save(paths[-1])
+
+            first = ocr_images(paths, cache_dir=cache_dir)
+            assert InlinePool.started == 1 and not any(result.cached for result in first.values())
+
+            second = ocr_images(paths, cache_dir=cache_dir)
+            assert InlinePool.started == 1, "pool started with everything cached"
+            assert all(result.cached for result in second.values())
+            assert [second[path].text for path in paths] == [first[path].text for path in paths]
+            print("💾 Second run served from the cache")
+
+            changed = ocr_images(paths, settings={'threshold': 120}, cache_dir=cache_dir)
+            assert InlinePool.started == 2 and not any(result.cached for result in changed.values())
+            assert changed[paths[0]].text.endswith('threshold=120')
+
+            with open(paths[1], 'ab') as f:
+                f.write(b'\0')
+            edited = ocr_images(paths, cache_dir=cache_dir)
+            assert InlinePool.started == 3
+            assert edited[paths[0]].cached and not edited[paths[1]].cached
+            print("🔄 Changed settings and changed bytes miss the cache")
+
+            settings = {**DEFAULT_SETTINGS, 'max_width': 200}
+            content_hash = menu_ocr.file_hash(paths[0])
+            built = preprocess(paths[0], content_hash, settings, cache_dir)
+            cached = preprocess(paths[0], content_hash, settings, cache_dir)
+            assert getattr(cached, 'fp', None) is None  # pixels loaded, file closed
+            assert built.size == cached.size == (200, 60) and cached.mode == 'L'
+            assert built.tobytes() == cached.tobytes()
+    finally:
+        menu_ocr.ProcessPoolExecutor, menu_ocr._ocr_worker = saved
+
+    print("✅ Menu OCR cache test passed")
+
+if __name__ == "__main__":
+    test_menu_ocr()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test semantic menu search
+"""
+
+import glob
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from bot_snapshot import BotSnapshot
+from menu_search import SUPERSEDED_GRACE_SECONDS, HashingEncoder, MenuSearchIndex
+
+def test_menu_search():
+    """Queries without item names should still find related items"""
+    print("🧪 TESTING SEMANTIC MENU SEARCH")
+    print("=" * 50)
+
+    index = MenuSearchIndex.for_snapshot(BotSnapshot('bot_data'))
+
+    test_cases = [
+        ("algo ligero con frutas rojas", "berry blend"),
+        ("algo para después del gym", "power maca"),
+        ("tengo gripe", "flu shot"),
+    ]
+
+    for query, expected in test_cases:
+        names = [item.name for item, _ in index.search(query)]
+        print(f"\n📱 Testing: '{query}'")
+        print(f"   Found: {names}")
+        assert expected in names
+
+    assert index.search("xyz") == []
+
+    # Store names and off-menu words share character n-grams with items
+    # ("grandes" / "granola", "tos" / "tostada") but no word
+    for query in ("palos grandes", "algo para la tos", "la castellana", "quiero pagar con tarjeta"):
+        found = index.search(query)
+        print(f"\n📱 Testing: '{query}' -> {[item.name for item, _ in found]}")
+        assert found == [], query
+
+    # Labelled examples that are not about the menu find nothing
+    with open('bot_data/intent_examples.jsonl', 'r', encoding='utf-8') as f:
+        examples = [json.loads(line) for line in f if line.strip()]
+    for example in examples:
+        if example['intent'] in ('unknown', 'location', 'hours', 'goodbye', 'positive'):
+            assert index.search(example['text']) == [], example['text']
+
+    # A replaced version stays for workers still loading it, until the grace period ends
+    with tempfile.TemporaryDirectory() as tmp:
+        encoder = HashingEncoder(dim=8)
+        paths = [MenuSearchIndex.path_for(tmp, encoder, version) for version in ('v1', 'v2', 'v3')]
+        MenuSearchIndex.save(paths[0], np.zeros((2, 8)), encoder)
+        MenuSearchIndex.save(paths[1], np.ones((2, 8)), encoder)
+        assert all(os.path.exists(path) for path in paths[:2])
+
+        long_ago = time.time() - SUPERSEDED_GRACE_SECONDS - 60
+        os.utime(paths[0], (long_ago - 60, long_ago - 60))
+        os.utime(paths[1], (long_ago, long_ago))
+        MenuSearchIndex.save(paths[2], np.ones((2, 8)), encoder)
+        saved = sorted(os.path.basename(path) for path in glob.glob(os.path.join(tmp, '*', '*.npy')))
+        print(f"\n🗂️ Kept after pruning: {saved}")
+        assert saved == ['menu-hash8-v2.npy', 'menu-hash8-v3.npy']
+
+if __name__ == "__main__":
+    test_menu_search()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test the tag-driven drink lists
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from bot_snapshot import BotSnapshot
+from custom_whatsapp_bot import PranaWhatsAppBot
+
+def listed(reply: str):
+    """Item names of a "✅ name - $price" list"""
+    return re.findall(r'^✅ (.+) - \$', reply, re.MULTILINE)
+
+def test_menu_tags():
+    """Tagged lists come from menu_items.json tags, in menu order"""
+    print("🧪 TESTING TAG INDEXES")
+    print("=" * 50)
+
+    with open('bot_data/menu_items.json', 'r', encoding='utf-8') as f:
+        menu = json.load(f)
+
+    bot = PranaWhatsAppBot()
+    lists = {'cold': bot.get_cold_drinks, 'energy': bot.get_energy_drinks, 'detox': bot.get_detox_drinks}
+    for tag, get_list in lists.items():
+        expected = [item['name'] for item in menu if tag in item.get('tags', [])]
+        print(f"🏷️ {tag}: {expected}")
+        assert expected and listed(get_list()) == expected
+
+    # Tagging another item in the data is enough for it to show up
+    untagged = next(item for item in menu if 'energy' not in item.get('tags', []))
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'bot_data')
+        shutil.copytree('bot_data', data_dir)
+        untagged.setdefault('tags', []).append('energy')
+        with open(os.path.join(data_dir, 'menu_items.json'), 'w', encoding='utf-8') as f:
+            json.dump(menu, f, ensure_ascii=False)
+
+        bot.inventory = BotSnapshot(data_dir).inventory
+        expected = [item['name'] for item in menu if 'energy' in item.get('tags', [])]
+        assert untagged['name'] in expected and listed(bot.get_energy_drinks()) == expected
+
+    print("✅ Tag index test passed")
+
+if __name__ == "__main__":
+    test_menu_tags()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test the upload-once Meta media id cache against a local fake Graph API
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from meta_media import MediaIdCache, MetaGraphClient
+
+class FakeGraphAPI(BaseHTTPRequestHandler):
+    """Records uploads and sends; answers like the Cloud API"""
+    uploads = []
+    messages = []
+    upload_delay = 0
+    upload_started = threading.Event()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        assert self.headers['Authorization'] == 'Bearer test-token'
+        if self.path.endswith('/media'):
+            assert b'messaging_product' in body and b'image/jpeg' in body
+            self.upload_started.set()
+            time.sleep(self.upload_delay)
+            self.uploads.append(len(body))
+            reply = {'id': f'media-{len(self.uploads)}'}
+        elif self.path.endswith('/messages'):
+            self.messages.append(json.loads(body))
+            reply = {'messages': [{'id': f'wamid.{len(self.messages)}'}]}
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(reply).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def test_meta_media():
+    """Each file is uploaded once; sends reference the cached id"""
+    print("🧪 TESTING META MEDIA ID CACHE")
+    print("=" * 50)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGraphAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    graph_url = f'http://127.0.0.1:{server.server_port}/v19.0'
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            image = os.path.join(tmp, 'menu1.jpg')
+            shutil.copy(os.path.join('menu_images', 'menu1.jpg'), image)
+            cache_path = os.path.join(tmp, 'ids.json')
+            client = MetaGraphClient('test-token', '12345', graph_url)
+
+            cache = MediaIdCache(client, cache_path)
+            for to in ('584140000001', '584140000002', '584140000003'):
+                client.send_image(to, cache.media_id(image))
+            print(f"📤 3 sends, {len(FakeGraphAPI.uploads)} upload")
+            assert len(FakeGraphAPI.uploads) == 1
+            assert [m['image']['id'] for m in FakeGraphAPI.messages] == ['media-1'] * 3
+            assert FakeGraphAPI.messages[0]['to'] == '584140000001'
+
+            # Persisted: a restarted worker reuses the id
+            cache = MediaIdCache(client, cache_path)
+            assert cache.media_id(image) == 'media-1' and cache.uploads == 0
+
+            # Nothing is due yet; an id close to expiry is refreshed in the background
+            assert cache.refresh_due() == []
+            for entry in cache.entries.values():
+                entry['expires_at'] = time.time() + 60
+            cache.start(interval=0.05)
+            deadline = time.time() + 5
+            while cache.media_id(image) == 'media-1' and time.time() < deadline:
+                time.sleep(0.02)
+            cache.stop()
+            assert cache.media_id(image) == 'media-2'
+            print("🔄 Expiring id refreshed in the background")
+
+            # Changed bytes mean a new content hash, so a new upload
+            with open(image, 'ab') as f:
+                f.write(b'\0')
+            assert cache.media_id(image) == 'media-3'
+
+            # A slow refresh upload does not hold up sends of cached ids
+            for entry in cache.entries.values():
+                entry['expires_at'] = time.time() + 60
+            FakeGraphAPI.upload_delay = 1.0
+            FakeGraphAPI.upload_started.clear()
+            refresh = threading.Thread(target=cache.refresh_due)
+            refresh.start()
+            assert FakeGraphAPI.upload_started.wait(5)
+            started = time.monotonic()
+            assert cache.media_id(image) == 'media-3'
+            assert time.monotonic() - started < 0.5
+            refresh.join()
+            FakeGraphAPI.upload_delay = 0
+            assert cache.media_id(image) == 'media-4'
+            print("🔄 Sends served from the cache during a refresh upload")
+
+            # Two workers sharing the file keep each other's ids
+            other_image = os.path.join(tmp, 'menu2.jpg')
+            with open(image, 'rb') as src, open(other_image, 'wb') as dst:
+                dst.write(src.read() + b'\1')
+            worker_a, worker_b = MediaIdCache(client, cache_path), MediaIdCache(client, cache_path)
+            assert worker_a.media_id(image) == 'media-4'
+            assert worker_b.media_id(other_image) == 'media-5'
+            assert worker_a.media_id(other_image) == 'media-5' and worker_a.uploads == 0
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                assert sorted(entry['id'] for entry in json.load(f).values()) == ['media-4', 'media-5']
+            print("👥 Workers merge their ids into the shared file")
+
+            # Unexpected errors are logged and the refresh thread keeps going
+            calls = []
+
+            def broken_refresh():
+                calls.append(time.time())
+                raise KeyError('id')
+
+            cache.refresh_due = broken_refresh
+            cache.start(interval=0.01)
+            deadline = time.time() + 5
+            while len(calls) < 3 and time.time() < deadline:
+                time.sleep(0.01)
+            cache.stop()
+            assert len(calls) >= 3
+    finally:
+        server.shutdown()
+
+    print("✅ Meta media cache test passed")
+
+if __name__ == "__main__":
+    test_meta_media()
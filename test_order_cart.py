@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test order extraction, cart pricing and the in-chat order flow
+"""
+
+import time
+
+from custom_whatsapp_bot import PranaWhatsAppBot
+from menu_model import MenuItem
+from order_cart import Cart, KeywordAutomaton, OrderExtractor, format_cents
+
+def test_order_cart():
+    """Orders are extracted in one pass and priced in integer cents"""
+    print("🧪 TESTING ORDER CART")
+    print("=" * 50)
+
+    # Overlapping keywords: every occurrence is reported, including suffixes
+    automaton = KeywordAutomaton({'he': 1, 'she': 2, 'his': 3, 'hers': 4})
+    assert sorted(automaton.scan('ushers')) == [(1, 4, 2), (2, 4, 1), (2, 6, 4)]
+
+    items = [
+        MenuItem('CITRUS', 6.5, 'Jugos', ('Naranja',), '', True),
+        MenuItem('ginger shot', 1.5, 'Shots', ('Jengibre',), '', True, aliases=('shot de jengibre',)),
+        MenuItem('Granola', 0.1, 'Extras', (), '', True),
+        MenuItem('yogurt con granola', 4.35, 'Desayunos', (), '', True),
+        MenuItem('Chía', 0.3, 'Extras', (), '', True),
+    ]
+    extractor = OrderExtractor(items)
+
+    def parsed(message):
+        return [(line.item.name, line.quantity, line.explicit) for line in extractor.extract(message)]
+
+    assert parsed("2 citrus y un ginger shot") == [('CITRUS', 2, True), ('ginger shot', 1, True)]
+    assert parsed("dos de yogurt con granola, 3 x chia") == [('yogurt con granola', 2, True), ('Chía', 3, True)]
+    assert parsed("media docena de shot de jengibre") == [('ginger shot', 6, True)]
+    assert parsed("el citrus, por favor") == [('CITRUS', 1, False)]
+    # Whole words only
+    assert parsed("citruses y granolas") == []
+    # Any written number is a quantity; the cart caps it
+    assert parsed("100 citrus y 0 chia") == [('CITRUS', 100, True), ('Chía', 1, False)]
+
+    # A price edit patches the automaton; a rename needs a new one
+    repriced = MenuItem('CITRUS', 7, 'Jugos', ('Naranja',), '', True)
+    assert extractor.replace(items[0], repriced)
+    assert extractor.extract("2 citrus")[0].item is repriced
+    assert extractor.replace(repriced, items[0])
+    assert not extractor.replace(items[0], MenuItem('Citrus Plus', 7, 'Jugos', (), '', True))
+
+    by_name = {item.name_lower: item for item in items}
+    cart = Cart().add(extractor.extract("3 granola y un chía")).add(extractor.extract("3 granola"))
+    rows, total = cart.priced(by_name)
+    # 6 x $0.10 + $0.30 is exactly 90 cents (floats would give 0.8999...)
+    assert [(item.name, quantity) for item, quantity, _ in rows] == [('Granola', 6), ('Chía', 1)]
+    assert total == 90 and format_cents(total) == '$0.90'
+    assert items[3].price_cents == 435 and format_cents(2 * 435) == '$8.70'
+    assert "Total: $0.90" in cart.summary(by_name)
+    big = Cart().add(extractor.extract("40 granola"))
+    assert [item.name for item in big.over_limit(extractor.extract("20 granola y 1 chia"))] == ['Granola']
+    assert big.add(extractor.extract("20 granola")).lines == (('granola', 50),)
+
+    # Linear time: doubling the message roughly doubles the work
+    base = "quiero 2 citrus, un shot de jengibre y dos de yogurt con granola por favor. "
+    timings = []
+    for repeat in (200, 400, 800, 1600):
+        message = base * repeat
+        elapsed = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            lines = extractor.extract(message)
+            elapsed = min(elapsed, time.perf_counter() - start)
+        assert len(lines) == 3 * repeat
+        timings.append(elapsed / len(message))
+        print(f"⚡ {len(message):7d} chars: {elapsed * 1000:6.1f}ms ({elapsed / len(message) * 1e6:.2f} µs/char)")
+    assert timings[-1] < timings[0] * 3
+
+    bot = PranaWhatsAppBot()
+    user = 'test-order'
+    bot.process_message(user, "hola")
+    reply, intent = bot.handle_message(user, "2 citrus y un ginger shot")
+    assert intent == 'order_start' and '2 x CITRUS - $13.00' in reply and 'Total: $14.50' in reply
+    reply, intent = bot.handle_message(user, "dame 3 n4")
+    assert intent == 'order_add' and 'Total: $34.00' in reply
+    reply, intent = bot.handle_message(user, "si")
+    assert intent == 'order_confirm' and bot.templates['order_confirmation'][0] in reply and '$34.00' in reply
+    # The cart is gone once confirmed
+    assert bot.handle_message(user, "si")[1] == 'positive'
+
+    bot.process_message('test-order-big', "hola")
+    reply, intent = bot.handle_message('test-order-big', "100 citrus")
+    print(f"📦 100 citrus -> {reply.splitlines()[0]}")
+    assert intent == 'order_start' and 'hasta 50 *CITRUS*' in reply and '50 x CITRUS - $325.00' in reply
+
+    print("✅ Order cart test passed")
+
+if __name__ == "__main__":
+    test_order_cart()
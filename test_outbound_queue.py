@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test the durable outbound queue against a local fake Twilio API
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from outbound_queue import OutboundQueue, TwilioSender
+
+class FakeTwilioAPI(BaseHTTPRequestHandler):
+    """Answers like Twilio's Messages endpoint, failing on cue by message body"""
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse is visible
+    delivered = []
+    attempts = {}
+    connections = set()
+    lock = threading.Lock()
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        assert self.path == '/2010-04-01/Accounts/ACtest/Messages.json'
+        assert form['From'] == ['whatsapp:+14155238886']
+        body = form['Body'][0]
+        with self.lock:
+            self.connections.add(self.client_address)
+            attempt = self.attempts[body] = self.attempts.get(body, 0) + 1
+
+        if body.startswith('flaky') and attempt <= 2:
+            status, reply = 503, {'code': 20503, 'message': 'Service Unavailable', 'status': 503}
+        elif body.startswith('throttled') and attempt == 1:
+            status, reply = 429, {'code': 20429, 'message': 'Too Many Requests', 'status': 429}
+        elif body.startswith('invalid'):
+            status, reply = 400, {'code': 21211, 'message': "Invalid 'To' Phone Number", 'status': 400}
+        else:
+            with self.lock:
+                self.delivered.append((form['To'][0], body))
+                status, reply = 201, {'sid': f'SM{len(self.delivered):032d}', 'status': 'queued'}
+
+        data = json.dumps(reply).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def wait_until(condition, timeout=15.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+def test_outbound_queue():
+    """Messages survive restarts, transient errors are retried and permanent ones dead-lettered"""
+    print("🧪 TESTING OUTBOUND QUEUE")
+    print("=" * 50)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeTwilioAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f'http://127.0.0.1:{server.server_port}'
+
+    def sender():
+        return TwilioSender('ACtest', 'secret', '+14155238886', api_url)
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'outbound.db')
+            options = dict(path=path, workers=3, rate_per_second=200, max_attempts=4, base_delay=0.02)
+
+            # Queued while no worker runs (e.g. the process died): kept on disk
+            queue = OutboundQueue(sender, **options)
+            ids = [queue.enqueue(f'+58414000{n:04d}', f'hola {n}') for n in range(20)]
+            assert len(set(ids)) == 20 and queue.pending() == 20
+            del queue
+
+            queue = OutboundQueue(sender, **options)
+            queue.enqueue('+584140009001', 'flaky reply')
+            queue.enqueue('+584140009002', 'throttled reply')
+            queue.enqueue('+584140009003', 'invalid reply')
+            start = time.perf_counter()
+            queue.start()
+            assert wait_until(lambda: queue.pending() == 0)
+            print(f"📤 {len(FakeTwilioAPI.delivered)} delivered in {time.perf_counter() - start:.2f}s "
+                  f"over {len(FakeTwilioAPI.connections)} connections")
+            queue.stop()
+
+            bodies = [body for _, body in FakeTwilioAPI.delivered]
+            assert sorted(bodies) == sorted([f'hola {n}' for n in range(20)] + ['flaky reply', 'throttled reply'])
+            assert FakeTwilioAPI.delivered[0][0].startswith('whatsapp:+58414')
+            assert FakeTwilioAPI.attempts['flaky reply'] == 3 and FakeTwilioAPI.attempts['invalid reply'] == 1
+            # Pooled clients keep their connections open instead of one per message
+            assert len(FakeTwilioAPI.connections) <= 3
+
+            dead = queue.dead_letters()
+            assert [(row['recipient'], row['attempts']) for row in dead] == [('+584140009003', 1)]
+            assert '21211' in dead[0]['error']
+
+            metrics = queue.metrics()
+            print(f"📊 {metrics}")
+            assert (metrics['sent'], metrics['retried'], metrics['dead_lettered']) == (22, 3, 1)
+            assert metrics['queued'] == 0 and metrics['dead_letters'] == 1
+            assert metrics['latency']['count'] == 22
+            text = queue.prometheus()
+            assert 'prana_outbound_delivery_seconds_bucket{le="+Inf"} 22' in text
+
+            # Out of attempts: dead-lettered after max_attempts
+            failing = OutboundQueue(sender, **{**options, 'max_attempts': 2})
+            failing.enqueue('+584140009004', 'flaky again')
+            failing.start()
+            assert wait_until(lambda: failing.pending() == 0)
+            failing.stop()
+            assert FakeTwilioAPI.attempts['flaky again'] == 2
+            assert [row['body'] for row in failing.dead_letters()][0] == 'flaky again'
+
+            # Backoff doubles per attempt, with jitter, up to the cap
+            assert all(0.01 <= queue.retry_delay(1) <= 0.02 for _ in range(50))
+            assert 0.08 <= queue.retry_delay(4) <= 0.16
+            assert queue.retry_delay(30) <= queue.max_delay
+    finally:
+        server.shutdown()
+
+    print("✅ Outbound queue test passed")
+
+if __name__ == "__main__":
+    test_outbound_queue()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test sales popularity: ranking in the setup script and its use by the bot
+"""
+
+import tempfile
+
+import pandas as pd
+
+from menu_model import MenuItem, Popularity
+from whatsapp_bot_setup import PranaWhatsAppBotSetup
+
+def test_popularity():
+    """Sales rows join menu items by normalized name; units rank, revenue breaks ties"""
+    print("🧪 TESTING SALES POPULARITY")
+    print("=" * 50)
+
+    menu = [
+        {'name': 'Jugo de Piña', 'category': 'Jugos'},
+        {'name': 'Cacao Nibs', 'category': 'Extras'},
+        {'name': 'Citrus', 'category': 'Jugos'},
+        {'name': 'Green Day', 'category': 'Jugos'},
+        {'name': 'Flu Shot', 'category': 'Shots'},
+    ]
+    sales = pd.DataFrame({
+        'descripción': ['JUGO DE PINA', 'jugo de piña', 'Cacao Nibs Topping', 'Citrus', 'Green Day',
+                        'Hamburguesa', None, 'Flu Shot'],
+        'cantidad': [3, 2, 7, 5, 1, 9, 4, 'x'],
+        'total vendido': [30, 20, 7, 60, 10, 90, 40, 10],
+    })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup = PranaWhatsAppBotSetup(output_dir=tmp)
+        setup.menu_items = menu
+        setup.sales_data = sales
+        popularity = setup.compute_popularity()
+
+    assert list(PranaWhatsAppBotSetup._match_key(pd.Series(['Jugo de Piña', 'Cacao Nibs Topping']))) == \
+        ['jugodepina', 'cacaonibs']
+    print(f"🏆 Top items: {popularity['top_items']}")
+    # Citrus and piña both sold 5; Citrus made more
+    assert popularity['top_items'] == ['Cacao Nibs', 'Citrus', 'Jugo de Piña', 'Green Day']
+    assert popularity['items']['Jugo de Piña'] == {'units': 5.0, 'revenue': 50.0}
+    assert 'Hamburguesa' not in popularity['items'] and 'Flu Shot' not in popularity['items']
+    assert popularity['matched_records'] == 5
+    assert list(popularity['categories']) == ['Jugos', 'Extras']
+    assert popularity['top_n'] == 10
+    assert popularity['top_by_category']['Jugos'] == ['Citrus', 'Jugo de Piña', 'Green Day']
+
+    items = [MenuItem.from_dict(item) for item in menu]
+    ranking = Popularity(popularity, items)
+    names = lambda found: [item.name for item in found]
+    assert names(ranking.recommended()) == ['Citrus', 'Jugo de Piña', 'Green Day']
+    assert names(ranking.recommended(2, available=lambda item: item.name != 'Citrus')) == \
+        ['Jugo de Piña', 'Green Day']
+    assert names(ranking.sort([items[4], items[3], items[1], items[2]])) == \
+        ['Cacao Nibs', 'Citrus', 'Green Day', 'Flu Shot']
+    assert not Popularity({}, items) and names(Popularity({}, items).sort(items)) == names(items)
+
+    # An item moved to another category ranks among that category's best sellers
+    moved = MenuItem.from_dict({'name': 'Cacao Nibs', 'category': 'Jugos'})
+    ranking.replace(items[1], moved)
+    assert names(ranking.top_by_category['jugos']) == ['Cacao Nibs', 'Citrus', 'Jugo de Piña', 'Green Day']
+    assert ranking.top_by_category['extras'] == ()
+    assert ranking.top_items[0] is moved
+    capped = Popularity({**popularity, 'top_n': 2}, items)
+    capped.replace(items[1], moved)
+    assert names(capped.top_by_category['jugos']) == ['Cacao Nibs', 'Citrus']
+
+    print("✅ Popularity test passed")
+
+if __name__ == "__main__":
+    test_popularity()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test per-sender token-bucket rate limiting
+"""
+
+from rate_limit import ALLOW, DROP, NOTIFY, RateLimiter, TokenBucketLimiter
+
+def test_rate_limit():
+    """Bursts are shed, tokens refill, idle senders are evicted"""
+    print("🧪 TESTING RATE LIMITER")
+    print("=" * 50)
+
+    limiter = RateLimiter(per_minute=60, burst=3, max_keys=100)
+    decisions = [limiter.check('spammer', now=100.0) for _ in range(30)]
+    print(f"📱 30 pasted messages: {decisions.count(ALLOW)} allowed, {decisions.count(DROP)} dropped")
+    assert decisions[:3] == [ALLOW] * 3 and decisions[3] == NOTIFY and decisions[4:] == [DROP] * 26
+
+    # Other senders are unaffected; the spammer gets one token back per second
+    assert limiter.check('other', now=100.0) == ALLOW
+    assert limiter.check('spammer', now=101.0) == ALLOW
+    assert limiter.check('spammer', now=101.0) == NOTIFY
+
+    # Memory stays bounded: idle (refilled) buckets and the overflow are evicted
+    for n in range(1000):
+        limiter.check(f'sender-{n}', now=200.0 + n)
+    metrics = limiter.metrics()
+    print(f"📊 {metrics}")
+    assert metrics['active_senders'] <= 100 and metrics['evicted_senders'] >= 900
+    assert metrics['allowed'] == 5 + 1000 and metrics['dropped'] == 26
+
+    shared = RateLimiter(per_minute=600, burst=10, global_per_second=1, global_burst=2)
+    assert [shared.check(f'u{n}', now=0.0) for n in range(3)] == [ALLOW, ALLOW, NOTIFY]
+    assert shared.metrics()['limited_global'] == 1
+
+    # A message refused by the global limit doesn't use up the sender's tokens
+    strict = RateLimiter(per_minute=6, burst=2, global_per_second=1, global_burst=1)
+    assert [strict.check(sender, now=0.0) for sender in 'abbb'] == [ALLOW, NOTIFY, DROP, DROP]
+    assert strict.check('b', now=1.0) == ALLOW
+    assert strict.metrics()['limited_sender'] == 0 and strict.metrics()['limited_global'] == 3
+
+    # A rate of 0 turns that limit off; a token bucket needs a positive rate
+    unlimited = RateLimiter(per_minute=0)
+    assert [unlimited.check('spammer', now=0.0) for _ in range(50)] == [ALLOW] * 50
+    assert unlimited.metrics()['active_senders'] == 0
+    try:
+        TokenBucketLimiter(0, 5)
+        assert False, "a zero rate was accepted"
+    except ValueError as e:
+        print(f"🚫 {e}")
+
+    print("✅ Rate limiter test passed")
+
+if __name__ == "__main__":
+    test_rate_limit()
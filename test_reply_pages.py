@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test reply segmentation and "más" paging
+"""
+
+from custom_whatsapp_bot import PranaWhatsAppBot
+from reply_pages import CHANNEL_LIMITS, PAGE_BREAK, PageCursors, segment
+
+def test_reply_pages():
+    """Long replies are split on item boundaries and paged per user"""
+    print("🧪 TESTING REPLY PAGING")
+    print("=" * 50)
+
+    items = [f"✅ Item {n} - ${n}.0\nIngredientes: mango, piña, fresa" for n in range(200)]
+    text = "📋 *MENÚ*\n\n" + "\n\n".join(items)
+    pages = segment(text, 1600)
+    print(f"📄 {len(text)} characters -> {len(pages)} pages")
+    assert len(pages) > 1
+    assert all(len(page) <= 1600 for page in pages)
+    # Every item is on exactly one page, whole
+    body = "\n\n".join(page.split("\n\n📄")[0] for page in pages)
+    assert all(body.count(item + "\n\n") + body.endswith(item) == 1 for item in items)
+    assert "1/" in pages[0] and "más" in pages[0] and "📄" not in pages[-1]
+
+    assert segment("hola", 1600) == ("hola",)
+    assert segment(f"uno{PAGE_BREAK}dos", 1600)[1] == "dos"
+    assert all(len(page) <= 200 for page in segment("x" * 1000, 200))
+
+    cursors = PageCursors()
+    assert cursors.start('u', ('a', 'b', 'c')) == 'a'
+    assert (cursors.next('u'), cursors.next('u'), cursors.next('u')) == ('b', 'c', None)
+
+    bot = PranaWhatsAppBot()
+    user = 'test-paging'
+    bot.process_message(user, "hola")
+    first, intent = bot.handle_message(user, "menu completo")
+    replies = [first]
+    while True:
+        reply, intent = bot.handle_message(user, "más")
+        if intent != 'more':
+            break
+        replies.append(reply)
+    print(f"📱 'menu completo' sent as {len(replies)} messages")
+    limit = CHANNEL_LIMITS['twilio']
+    assert len(replies) > 1 and all(len(reply) <= limit for reply in replies)
+    assert replies[-1].endswith("¿Hay algo más en lo que pueda ayudarte?")
+
+    print("✅ Reply paging test passed")
+
+if __name__ == "__main__":
+    test_reply_pages()
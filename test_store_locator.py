@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test the store registry and nearest-store lookups
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from custom_whatsapp_bot import PranaWhatsAppBot
+from store_locator import Store, StoreRegistry, load_stores
+
+def test_store_locator():
+    """Shared locations find the closest open store"""
+    print("🧪 TESTING STORE LOCATOR")
+    print("=" * 50)
+
+    stores = load_stores('bot_data/stores.json')
+    tuesday_noon = datetime(2026, 10, 20, 12, 0)
+    monday_late = datetime(2026, 10, 19, 22, 30)
+
+    # Altamira, between the two stores but closer to Los Palos Grandes
+    store, km, is_open = stores.nearest(10.4985, -66.8467, tuesday_noon)
+    print(f"🧭 Nearest to Altamira: {store.name} at {km:.2f} km")
+    assert store.id == 'palos_grandes' and is_open and 0 < km < 1.5
+    store, _, _ = stores.nearest(10.4960, -66.8560, tuesday_noon)
+    assert store.id == 'castellana'
+    assert stores.nearest(10.4985, -66.8467, monday_late)[2] is False
+    assert 'cerrado' in stores.nearest_reply(10.4985, -66.8467, monday_late)
+    assert stores.replies['castellana'] in stores.nearest_reply(10.4960, -66.8560, tuesday_noon)
+
+    assert stores.match("dónde queda prana los palos grandes?").id == 'palos_grandes'
+    assert stores.match("voy a la castellana").id == 'castellana'
+    assert stores.match("hola") is None
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        stores.nearest(10.4985, -66.8467, tuesday_noon)
+    per_query_us = (time.perf_counter() - start) * 1000
+    print(f"⚡ {per_query_us:.1f} µs per lookup")
+
+    # Vectorized haversine agrees with a plain loop over many stores
+    rng = np.random.default_rng(7)
+    always = {day: (0, 24 * 60) for day in range(7)}
+    many = StoreRegistry([Store(f's{n}', f'S{n}', '', float(lat), float(lon), (), '', always)
+                          for n, (lat, lon) in enumerate(zip(rng.uniform(-60, 60, 300), rng.uniform(-180, 180, 300)))])
+    for lat, lon in zip(rng.uniform(-60, 60, 20), rng.uniform(-180, 180, 20)):
+        lat1, lon1 = np.radians(lat), np.radians(lon)
+        def haversine(store):
+            lat2, lon2 = np.radians(store.lat), np.radians(store.lon)
+            a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+            return 2 * 6371.0088 * np.arcsin(np.sqrt(a))
+        assert many.nearest(lat, lon, tuesday_noon)[0] == min(many.stores, key=haversine)
+
+    # A store added to stores.json is recognized by name after a reload
+    bot = PranaWhatsAppBot()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree('bot_data', os.path.join(tmp, 'bot_data'))
+        with open('bot_data/stores.json', 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data['stores'].append({**data['stores'][0], 'id': 'altamira', 'name': 'PRANA ALTAMIRA',
+                               'aliases': ['altamira']})
+        with open(os.path.join(tmp, 'bot_data', 'stores.json'), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.chdir(tmp)
+        try:
+            assert bot.reload()
+        finally:
+            os.chdir(cwd)
+    bot.handle_message('store-user', "hola")
+    reply, intent = bot.handle_message('store-user', "queda cerca de altamira?")
+    print(f"🏪 New store by name -> {intent}")
+    assert intent == 'specific_location' and 'PRANA ALTAMIRA' in reply
+
+    print("✅ Store locator test passed")
+
+if __name__ == "__main__":
+    test_store_locator()
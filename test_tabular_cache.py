@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test the typed, cached loader for the Prana ML spreadsheets
+"""
+
+import os
+import tempfile
+import time
+
+from tabular_cache import SALES_SPEC, TableSpec, load_table
+
+def test_tabular_cache():
+    """Only spec columns are kept, currency is parsed, and the cache follows the source"""
+    print("🧪 TESTING TABULAR CACHE")
+    print("=" * 50)
+
+    spec = TableSpec('test', {**SALES_SPEC.columns, 'tipo': 'category'}, chunk_rows=2)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'sales.csv')
+        cache_dir = os.path.join(tmp, 'cache')
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write('descripción,cantidad,precio unitario,total vendido,tipo,ignored\n')
+            f.write('Green Detox,"1,200","$5.50","$6,600.00",jugo,x\n')
+            f.write('avenatopping,3,$0.37,$1.11,extra,y\n')
+            f.write(',2,n/a,$0,jugo,z\n')
+
+        start = time.perf_counter()
+        table = load_table(source, spec, cache_dir)
+        import_ms = (time.perf_counter() - start) * 1000
+        print(f"📥 Imported {len(table)} rows in {import_ms:.1f}ms: {list(table.columns)}")
+        assert list(table.columns) == ['descripción', 'cantidad', 'precio unitario', 'total vendido', 'tipo']
+        assert table['cantidad'].tolist() == [1200.0, 3.0, 2.0]
+        assert table['total vendido'].tolist() == [6600.0, 1.11, 0.0]
+        assert table['precio unitario'].isna().tolist() == [False, False, True]
+        assert table['descripción'].tolist() == ['Green Detox', 'avenatopping', None]
+        assert str(table['tipo'].dtype) == 'category'
+
+        start = time.perf_counter()
+        cached = load_table(source, spec, cache_dir)
+        print(f"⚡ Loaded from cache in {(time.perf_counter() - start) * 1000:.1f}ms")
+        assert cached.equals(table)
+        assert len(os.listdir(cache_dir)) == 1
+
+        # Editing the source re-imports and replaces the old cache file
+        with open(source, 'a', encoding='utf-8') as f:
+            f.write('Cool Melon,4,$7.00,$28.00,jugo,w\n')
+        updated = load_table(source, spec, cache_dir)
+        assert updated['descripción'].tolist()[-1] == 'Cool Melon'
+        assert len(os.listdir(cache_dir)) == 1
+        print("✅ Changed source re-imported")
+
+if __name__ == "__main__":
+    test_tabular_cache()
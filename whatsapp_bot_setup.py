@@ -6,17 +6,30 @@ This script helps set up the WhatsApp bot by processing menu data and integratin
 
 import os
 import json
+import numpy as np
 import pandas as pd
-from PIL import Image
-import pytesseract
+from build_manifest import BuildManifest
+from menu_media import build_media
+from menu_ocr import ocr_images
+from tabular_cache import INVENTORY_SPEC, SALES_SPEC, load_table, parse_numeric
 import re
-from typing import List, Dict, Any
+import sys
+import argparse
+from typing import List, Dict, Any, Optional
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+MENU_TEMPLATE = "menu_template.json"
+
+# Prana ML data the inventory and sales artifacts are built from
+PRANA_ML_DATA_DIR = os.path.join("..", "prana_ml", "data")
+
+# Bump when a generate_*/compute_* method changes so every artifact is rebuilt
+BOT_DATA_VERSION = '2'
+
 class PranaWhatsAppBotSetup:
     def __init__(self, data_dir: str = "data", output_dir: str = "bot_data"):
         self.data_dir = data_dir
@@ -25,6 +38,11 @@ class PranaWhatsAppBotSetup:
         self.inventory_data = None
         self.sales_data = None
         
+        # Files each artifact is built from (see artifact_inputs)
+        self.menu_sources = [MENU_TEMPLATE]
+        self.inventory_path = os.path.join(PRANA_ML_DATA_DIR, "inv_prana_may.xls")
+        self.sales_path = os.path.join(PRANA_ML_DATA_DIR, "cleaned_sales.csv")
+        
         # Create output directory if it doesn't exist
         os.makedirs(self.output_dir, exist_ok=True)
     
@@ -34,7 +52,8 @@ class PranaWhatsAppBotSetup:
         """
         logger.info("Loading manual menu data...")
         
-        menu_file = "menu_template.json"
+        menu_file = MENU_TEMPLATE
+        self.menu_sources = [menu_file]
         
         if os.path.exists(menu_file):
             try:
@@ -62,28 +81,30 @@ class PranaWhatsAppBotSetup:
             menu_images_dir = "menu_images"
         
         menu_items = []
+        image_paths = []
         
-        # Process each menu image
+        # Collect each menu image
         for i in range(1, 9):
             image_path = os.path.join(menu_images_dir, f"menu{i}.jpg")
             
             if not os.path.exists(image_path):
                 logger.warning(f"Menu image {image_path} not found, skipping...")
                 continue
+            image_paths.append(image_path)
+        self.menu_sources = image_paths
+        
+        # OCR runs in parallel; unchanged images come from the cache
+        for image_path, result in ocr_images(image_paths).items():
+            source = os.path.splitext(os.path.basename(image_path))[0]
+            if result.error:
+                logger.error(f"Error processing {source}.jpg: {result.error}")
+                continue
             
-            try:
-                # Extract text from image using OCR
-                image = Image.open(image_path)
-                text = pytesseract.image_to_string(image, lang='spa')
-                
-                # Parse menu items from text
-                items = self._parse_menu_text(text, f"menu{i}")
-                menu_items.extend(items)
-                
-                logger.info(f"Processed menu{i}.jpg - found {len(items)} items")
-                
-            except Exception as e:
-                logger.error(f"Error processing menu{i}.jpg: {str(e)}")
+            # Parse menu items from text
+            items = self._parse_menu_text(result.text, source)
+            menu_items.extend(items)
+            
+            logger.info(f"Processed {source}.jpg - found {len(items)} items{' (cached)' if result.cached else ''}")
         
         self.menu_items = menu_items
         return menu_items
@@ -132,16 +153,15 @@ class PranaWhatsAppBotSetup:
     def load_inventory_data(self) -> pd.DataFrame:
         """
         Load and process inventory data from existing Prana ML files
+        (typed columns, served from the columnar cache when unchanged)
         """
         logger.info("Loading inventory data...")
         
-        # Point to the prana_ml data folder
-        prana_ml_data_dir = os.path.join("..", "prana_ml", "data")
-        inventory_path = os.path.join(prana_ml_data_dir, "inv_prana_may.xls")
+        inventory_path = self.inventory_path
         
         if os.path.exists(inventory_path):
             try:
-                inventory = pd.read_excel(inventory_path)
+                inventory = load_table(inventory_path, INVENTORY_SPEC)
                 self.inventory_data = inventory
                 logger.info(f"Loaded inventory data with {len(inventory)} items")
                 return inventory
@@ -155,16 +175,15 @@ class PranaWhatsAppBotSetup:
     def load_sales_data(self) -> pd.DataFrame:
         """
         Load and process sales data from existing Prana ML files
+        (typed columns, served from the columnar cache when unchanged)
         """
         logger.info("Loading sales data...")
         
-        # Point to the prana_ml data folder
-        prana_ml_data_dir = os.path.join("..", "prana_ml", "data")
-        sales_path = os.path.join(prana_ml_data_dir, "cleaned_sales.csv")
+        sales_path = self.sales_path
         
         if os.path.exists(sales_path):
             try:
-                sales = pd.read_csv(sales_path)
+                sales = load_table(sales_path, SALES_SPEC)
                 self.sales_data = sales
                 logger.info(f"Loaded sales data with {len(sales)} records")
                 return sales
@@ -175,6 +194,95 @@ class PranaWhatsAppBotSetup:
         
         return pd.DataFrame()
     
+    def compute_inventory_levels(self) -> Dict[str, float]:
+        """
+        Current quantity per inventory article ("Artículo" -> "Cantidad Total"),
+        used by the bots to hide items whose ingredients are out of stock
+        """
+        if self.inventory_data is None or self.inventory_data.empty:
+            return {}
+        if not {'Artículo', 'Cantidad Total'}.issubset(self.inventory_data.columns):
+            logger.warning("Inventory data is missing Artículo/Cantidad Total columns")
+            return {}
+        
+        inventory = self.inventory_data.dropna(subset=['Artículo'])
+        quantities = parse_numeric(inventory['Cantidad Total']).fillna(0)
+        levels = quantities.groupby(inventory['Artículo'].astype(str).str.strip()).sum()
+        return {article: round(float(qty), 3) for article, qty in levels.items()}
+    
+    @staticmethod
+    def _match_key(names: pd.Series) -> pd.Series:
+        """
+        Normalize names so sales descriptions line up with menu item names
+        ("Cacao Nibs Topping" / "cacao nibs" -> "cacaonibs")
+        """
+        return (names.astype(str).str.lower()
+                .str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+                .str.replace('topping', '', regex=False)
+                .str.replace(r'[^a-z0-9]', '', regex=True))
+    
+    def compute_popularity(self, top_n: int = 10) -> Dict[str, Any]:
+        """
+        Rank menu items and categories by units sold.
+        
+        Sales rows are aggregated by normalized description and joined to the
+        menu in one pass; rows that match no menu item are ignored.
+        """
+        if self.sales_data is None or self.sales_data.empty or not self.menu_items:
+            return {}
+        
+        sales = self.sales_data.rename(columns={
+            'descripción': 'description', 'cantidad': 'units', 'total vendido': 'revenue'
+        })
+        if not {'description', 'units', 'revenue'}.issubset(sales.columns):
+            logger.warning("Sales data is missing description/quantity/total columns")
+            return {}
+        
+        sales = sales.dropna(subset=['description'])
+        sales = sales.assign(
+            key=self._match_key(sales['description']),
+            units=pd.to_numeric(sales['units'], errors='coerce').fillna(0),
+            revenue=pd.to_numeric(sales['revenue'], errors='coerce').fillna(0),
+        )
+        totals = sales.groupby('key', sort=False)[['units', 'revenue']].sum()
+        
+        menu = pd.DataFrame({
+            'name': [item['name'] for item in self.menu_items],
+            'category': [item['category'] for item in self.menu_items],
+        })
+        menu['key'] = self._match_key(menu['name'])
+        menu = menu.drop_duplicates('key').join(totals, on='key', how='inner')
+        menu = menu[menu['units'] > 0]
+        if menu.empty:
+            logger.warning("No sales records matched a menu item")
+            return {}
+        
+        # Units first, revenue breaks ties
+        order = np.lexsort((-menu['revenue'].to_numpy(), -menu['units'].to_numpy()))
+        menu = menu.iloc[order]
+        
+        categories = menu.groupby('category', sort=False)[['units', 'revenue']].sum()
+        categories = categories.sort_values(['units', 'revenue'], ascending=False)
+        
+        return {
+            'source': 'cleaned_sales.csv',
+            'matched_records': int(sales['key'].isin(menu['key']).sum()),
+            'items': {
+                row.name: {'units': float(row.units), 'revenue': round(float(row.revenue), 2)}
+                for row in menu.itertuples(index=False)
+            },
+            'categories': {
+                category: {'units': float(row.units), 'revenue': round(float(row.revenue), 2)}
+                for category, row in categories.iterrows()
+            },
+            'top_n': top_n,
+            'top_items': menu['name'].head(top_n).tolist(),
+            'top_by_category': {
+                category: group['name'].head(top_n).tolist()
+                for category, group in menu.groupby('category', sort=False)
+            },
+        }
+    
     def generate_bot_config(self) -> Dict[str, Any]:
         """
         Generate Botpress configuration
@@ -269,55 +377,107 @@ class PranaWhatsAppBotSetup:
         
         return menu_structure
     
-    def save_bot_data(self):
+    def artifact_inputs(self) -> Dict[str, List[str]]:
         """
-        Save all processed data for bot implementation
+        Input files of each artifact in output_dir. Inventory and sales
+        artifacts are only planned when their source file exists.
+        """
+        menu = list(self.menu_sources)
+        counts = [self.inventory_path, self.sales_path]
+        artifacts = {
+            "menu_items.json": menu,
+            "menu_structure.json": menu,
+            "response_templates.json": [],
+            "bot_config.json": menu + counts,
+            "setup_report.md": menu + counts,
+        }
+        if os.path.exists(self.inventory_path):
+            artifacts["inventory_summary.json"] = [self.inventory_path]
+            artifacts["inventory_levels.json"] = [self.inventory_path]
+        if os.path.exists(self.sales_path):
+            artifacts["sales_summary.json"] = [self.sales_path]
+            artifacts["popularity.json"] = menu + [self.sales_path]
+        return artifacts
+    
+    def stale_artifacts(self, manifest: BuildManifest) -> List[str]:
+        """Artifacts whose inputs (or contents) changed since the last build"""
+        return [
+            name for name, inputs in self.artifact_inputs().items()
+            if manifest.is_stale(os.path.join(self.output_dir, name), inputs, BOT_DATA_VERSION)
+        ]
+    
+    def load_stale_sources(self, stale: List[str]):
+        """Load only the Prana ML data that a stale artifact needs"""
+        inputs = self.artifact_inputs()
+        needed = {path for name in stale for path in inputs[name]}
+        if self.inventory_path in needed and self.inventory_data is None:
+            self.load_inventory_data()
+        if self.sales_path in needed and self.sales_data is None:
+            self.load_sales_data()
+    
+    def _inventory_summary(self) -> Optional[Dict[str, Any]]:
+        if self.inventory_data is None:
+            return None
+        return {
+            'total_items': len(self.inventory_data),
+            'columns': list(self.inventory_data.columns),
+            'sample_data': self.inventory_data.head(5).to_dict('records')
+        }
+    
+    def _sales_summary(self) -> Optional[Dict[str, Any]]:
+        if self.sales_data is None:
+            return None
+        return {
+            'total_records': len(self.sales_data),
+            'columns': list(self.sales_data.columns),
+            'sample_data': self.sales_data.head(5).to_dict('records')
+        }
+    
+    def save_bot_data(self, manifest: Optional[BuildManifest] = None) -> List[str]:
+        """
+        Save processed data for bot implementation. Only artifacts whose
+        inputs changed since the last build (per the build manifest) are
+        regenerated; each is written to a temp file and renamed into place.
+        Returns the paths that were rebuilt.
         """
         logger.info("Saving bot data...")
         
-        # Save menu items
-        menu_file = os.path.join(self.output_dir, "menu_items.json")
-        with open(menu_file, 'w', encoding='utf-8') as f:
-            json.dump(self.menu_items, f, ensure_ascii=False, indent=2)
-        
-        # Save bot configuration
-        config_file = os.path.join(self.output_dir, "bot_config.json")
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.generate_bot_config(), f, ensure_ascii=False, indent=2)
-        
-        # Save response templates
-        templates_file = os.path.join(self.output_dir, "response_templates.json")
-        with open(templates_file, 'w', encoding='utf-8') as f:
-            json.dump(self.generate_response_templates(), f, ensure_ascii=False, indent=2)
-        
-        # Save menu structure
-        menu_structure_file = os.path.join(self.output_dir, "menu_structure.json")
-        with open(menu_structure_file, 'w', encoding='utf-8') as f:
-            json.dump(self.generate_menu_structure(), f, ensure_ascii=False, indent=2)
-        
-        # Save inventory data summary
-        if self.inventory_data is not None:
-            inventory_summary = {
-                'total_items': len(self.inventory_data),
-                'columns': list(self.inventory_data.columns),
-                'sample_data': self.inventory_data.head(5).to_dict('records')
-            }
-            inventory_file = os.path.join(self.output_dir, "inventory_summary.json")
-            with open(inventory_file, 'w', encoding='utf-8') as f:
-                json.dump(inventory_summary, f, ensure_ascii=False, indent=2)
-        
-        # Save sales data summary
-        if self.sales_data is not None:
-            sales_summary = {
-                'total_records': len(self.sales_data),
-                'columns': list(self.sales_data.columns),
-                'sample_data': self.sales_data.head(5).to_dict('records')
-            }
-            sales_file = os.path.join(self.output_dir, "sales_summary.json")
-            with open(sales_file, 'w', encoding='utf-8') as f:
-                json.dump(sales_summary, f, ensure_ascii=False, indent=2)
-        
-        logger.info(f"Bot data saved to {self.output_dir}/")
+        owns_manifest = manifest is None
+        if owns_manifest:
+            manifest = BuildManifest(os.path.join(self.output_dir, "build_manifest.json"))
+        
+        def as_json(generate):
+            def render():
+                data = generate()
+                # Empty results (e.g. no sales matched the menu) are not written
+                return json.dumps(data, ensure_ascii=False, indent=2) if data else None
+            return render
+        
+        renderers = {
+            "menu_items.json": as_json(lambda: self.menu_items),
+            "menu_structure.json": as_json(self.generate_menu_structure),
+            "response_templates.json": as_json(self.generate_response_templates),
+            "bot_config.json": as_json(self.generate_bot_config),
+            "setup_report.md": self.generate_setup_report,
+            # Summaries of the raw files
+            "inventory_summary.json": as_json(self._inventory_summary),
+            "sales_summary.json": as_json(self._sales_summary),
+            # Stock per article (read by the bots' availability checks)
+            "inventory_levels.json": as_json(lambda: self.compute_inventory_levels() if self.inventory_data is not None else None),
+            # Item and category popularity (read by the bots' recommendations)
+            "popularity.json": as_json(lambda: self.compute_popularity() if self.sales_data is not None else None),
+        }
+        
+        for name, inputs in self.artifact_inputs().items():
+            path = os.path.join(self.output_dir, name)
+            if manifest.build(path, inputs, renderers[name], BOT_DATA_VERSION):
+                logger.info(f"🔄 Rebuilt {path}")
+        
+        if owns_manifest:
+            manifest.save()
+        
+        logger.info(f"Bot data saved to {self.output_dir}/ ({len(manifest.built)} rebuilt, {len(manifest.skipped)} up to date)")
+        return list(manifest.built)
     
     def generate_setup_report(self) -> str:
         """
@@ -359,6 +519,9 @@ class PranaWhatsAppBotSetup:
 - `bot_data/menu_structure.json` - Organized menu by category
 - `bot_data/inventory_summary.json` - Inventory data summary
 - `bot_data/sales_summary.json` - Sales data summary
+- `bot_data/popularity.json` - Item and category popularity from sales
+- `bot_data/inventory_levels.json` - Stock per inventory article
+- `bot_data/build_manifest.json` - Input and output hashes of each generated file
 
 ## Estimated Implementation Time
 
@@ -388,33 +551,47 @@ def main():
     """
     Main function to run the WhatsApp bot setup
     """
+    parser = argparse.ArgumentParser(description="Build bot_data/ for the Prana WhatsApp Bot")
+    parser.add_argument('--check', action='store_true', help="Report which artifacts would be rebuilt, write nothing")
+    parser.add_argument('--force', action='store_true', help="Rebuild every artifact")
+    args = parser.parse_args()
+    
     print("🚀 Prana Juice Bar WhatsApp Bot Setup")
     print("=" * 50)
     
     # Initialize setup
     setup = PranaWhatsAppBotSetup()
+    manifest = BuildManifest(os.path.join(setup.output_dir, "build_manifest.json"), check=args.check, force=args.force)
     
     # Load manual menu data (preferred over OCR)
     print("\n📋 Loading manual menu data...")
     menu_items = setup.load_manual_menu_data()
     
-    # Load existing data
+    stale = setup.stale_artifacts(manifest)
+    if args.check:
+        if stale:
+            print(f"\n🔄 Would rebuild {len(stale)} artifact(s):")
+            for name in stale:
+                print(f"   - {os.path.join(setup.output_dir, name)}")
+        else:
+            print("\n✅ Everything in bot_data/ is up to date")
+        sys.exit(1 if stale else 0)
+    
+    # Load existing data (only what a changed artifact needs)
     print("\n📊 Loading existing Prana ML data...")
-    setup.load_inventory_data()
-    setup.load_sales_data()
+    setup.load_stale_sources(stale)
     
-    # Save bot data
+    # Save bot data and the setup report
     print("\n💾 Saving bot data...")
-    setup.save_bot_data()
+    setup.save_bot_data(manifest)
+    manifest.save()
+    print(manifest.summary())
     
-    # Generate report
-    print("\n📈 Generating setup report...")
-    report = setup.generate_setup_report()
+    # Menu photos sent with menu replies (only changed images are re-encoded)
+    print("\n🖼️ Building menu image variants...")
+    build_media()
     
     report_file = os.path.join(setup.output_dir, "setup_report.md")
-    with open(report_file, 'w', encoding='utf-8') as f:
-        f.write(report)
-    
     print(f"\n✅ Setup complete! Check the '{setup.output_dir}' folder for generated files.")
     print(f"📄 Setup report saved to: {report_file}")
     print("\n🎯 Next steps:")
@@ -425,4 +602,4 @@ def main():
     print("5. Test and launch!")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 WhatsApp Integration for Prana Juice Bar Bot
-Multiple integration options: Twilio, pywhatkit, webhooks
+Multiple integration options: Twilio, Meta Cloud API, pywhatkit, webhooks
 """
 
 import json
@@ -9,7 +9,9 @@ import logging
 from flask import Flask, request, jsonify
 from custom_whatsapp_bot import PranaWhatsAppBot
 import os
+import threading
 from datetime import datetime
+from typing import List
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,16 +24,56 @@ class WhatsAppIntegration:
     def __init__(self, integration_type="webhook"):
         """
         Initialize WhatsApp integration
-        integration_type: "twilio", "pywhatkit", "webhook"
+        integration_type: "twilio", "meta", "pywhatkit", "webhook"
         """
         self.integration_type = integration_type
         self.bot = PranaWhatsAppBot()
+        self.meta = None
+        self.media_ids = None
+        self.outbound = None
+        if integration_type == "meta":
+            self._setup_meta()
+        elif integration_type == "twilio":
+            self._setup_twilio()
+        
+    def _setup_meta(self):
+        """Cloud API client plus the upload-once media id cache (refreshed in the background)"""
+        from meta_media import MediaIdCache, MetaGraphClient
+        
+        self.meta = MetaGraphClient.from_env()
+        if self.meta is None:
+            logger.error("Missing Meta credentials (META_ACCESS_TOKEN, META_PHONE_NUMBER_ID)")
+            return
+        self.media_ids = MediaIdCache(self.meta)
+        self.media_ids.start()
+        
+    def _setup_twilio(self):
+        """Durable outbound queue; its workers each keep one Twilio client"""
+        from outbound_queue import DEFAULT_QUEUE_PATH, RATE_PER_SECOND, WORKERS, OutboundQueue, TwilioSender
+        
+        try:
+            configured = TwilioSender.from_env() is not None
+        except ImportError:
+            logger.error("Twilio not installed. Run: pip install twilio")
+            return
+        if not configured:
+            logger.error("Missing Twilio credentials")
+            return
+        self.outbound = OutboundQueue(
+            TwilioSender.from_env,
+            path=os.getenv('OUTBOUND_QUEUE_PATH', DEFAULT_QUEUE_PATH),
+            workers=int(os.getenv('OUTBOUND_WORKERS', WORKERS)),
+            rate_per_second=float(os.getenv('OUTBOUND_RATE_PER_SECOND', RATE_PER_SECOND)),
+        )
+        self.outbound.start()
         
     def send_message(self, phone_number: str, message: str) -> bool:
         """Send message via selected integration method"""
         try:
             if self.integration_type == "twilio":
                 return self._send_via_twilio(phone_number, message)
+            elif self.integration_type == "meta":
+                return self._send_via_meta(phone_number, message)
             elif self.integration_type == "pywhatkit":
                 return self._send_via_pywhatkit(phone_number, message)
             elif self.integration_type == "webhook":
@@ -44,41 +86,38 @@ class WhatsAppIntegration:
             return False
     
     def _send_via_twilio(self, phone_number: str, message: str) -> bool:
-        """Send message via Twilio WhatsApp API"""
+        """Queue a message for Twilio; True once it is stored, the workers deliver it"""
+        if self.outbound is None:
+            return False
+        message_id = self.outbound.enqueue(phone_number, message)
+        logger.info(f"Message {message_id} queued for Twilio")
+        return True
+    
+    def send_images(self, phone_number: str, paths: List[str]) -> bool:
+        """Send image files (one message each); each file is uploaded to Meta only once"""
+        if self.integration_type != "meta":
+            logger.error(f"Sending images is not supported for {self.integration_type}")
+            return False
+        if self.meta is None:
+            return False
         try:
-            from twilio.rest import Client
-            
-            # Get credentials from environment variables
-            account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-            auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-            from_number = os.getenv('TWILIO_WHATSAPP_NUMBER')
-            
-            if not all([account_sid, auth_token, from_number]):
-                logger.error("Missing Twilio credentials")
-                return False
-            
-            client = Client(account_sid, auth_token)
-            
-            # Format phone number for WhatsApp
-            if not phone_number.startswith('whatsapp:'):
-                phone_number = f"whatsapp:{phone_number}"
-            if not from_number.startswith('whatsapp:'):
-                from_number = f"whatsapp:{from_number}"
-            
-            message = client.messages.create(
-                from_=from_number,
-                body=message,
-                to=phone_number
-            )
-            
-            logger.info(f"Message sent via Twilio: {message.sid}")
+            for path in paths:
+                self.meta.send_image(phone_number, self.media_ids.media_id(path))
             return True
-            
-        except ImportError:
-            logger.error("Twilio not installed. Run: pip install twilio")
+        except Exception as e:
+            logger.error(f"Meta error: {e}")
+            return False
+    
+    def _send_via_meta(self, phone_number: str, message: str) -> bool:
+        """Send message via the WhatsApp Cloud API"""
+        if self.meta is None:
             return False
+        try:
+            result = self.meta.send_text(phone_number, message)
+            logger.info(f"Message sent via Meta: {result.get('messages', [{}])[0].get('id')}")
+            return True
         except Exception as e:
-            logger.error(f"Twilio error: {e}")
+            logger.error(f"Meta error: {e}")
             return False
     
     def _send_via_pywhatkit(self, phone_number: str, message: str) -> bool:
@@ -112,6 +151,19 @@ class WhatsAppIntegration:
         logger.info(f"Webhook message to {phone_number}: {message}")
         return True
 
+_integration = None
+# Two concurrent first requests must not each start an outbound queue
+_integration_lock = threading.Lock()
+
+def get_integration() -> WhatsAppIntegration:
+    """Shared integration for replies (type from WHATSAPP_INTEGRATION, default "webhook")"""
+    global _integration
+    if _integration is None:
+        with _integration_lock:
+            if _integration is None:
+                _integration = WhatsAppIntegration(os.getenv('WHATSAPP_INTEGRATION', 'webhook'))
+    return _integration
+
 # Flask routes for webhook integration
 @app.route('/webhook', methods=['POST'])
 def webhook():
@@ -131,13 +183,21 @@ def webhook():
                     # Extract phone number and message
                     phone_number = message_data.get('from', '')
                     message_text = message_data.get('text', {}).get('body', '')
+                    location = message_data.get('location')
                     
-                    # Process message with bot
-                    response = bot.process_message(phone_number, message_text)
+                    # Process message with bot (a shared location gets the nearest store)
+                    if location:
+                        response, intent = bot.handle_location(phone_number, float(location['latitude']),
+                                                               float(location['longitude']))
+                    else:
+                        response, intent = bot.handle_message(phone_number, message_text)
                     
-                    # Send response back
-                    integration = WhatsAppIntegration("webhook")
+                    # Send response back, plus the menu photos for menu requests
+                    integration = get_integration()
                     integration.send_message(phone_number, response)
+                    media_files = [path for path in map(bot.menu_media.path, bot.media_for(intent)) if path]
+                    if media_files and integration.integration_type == "meta":
+                        integration.send_images(phone_number, media_files)
                     
                     return jsonify({"status": "success"})
         
@@ -152,6 +212,13 @@ def health_check():
     """Health check endpoint"""
     return jsonify({"status": "healthy", "bot": "Prana Juice Bar Bot"})
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Outbound queue counters and delivery latency in the Prometheus text format"""
+    integration = get_integration()
+    body = integration.outbound.prometheus() if integration.outbound is not None else ''
+    return body, 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
 @app.route('/test', methods=['POST'])
 def test_bot():
     """Test endpoint for bot responses"""
@@ -210,19 +277,28 @@ def setup_environment():
     print("   export TWILIO_ACCOUNT_SID='your_account_sid'")
     print("   export TWILIO_AUTH_TOKEN='your_auth_token'")
     print("   export TWILIO_WHATSAPP_NUMBER='whatsapp:+1234567890'")
+    print("   export WHATSAPP_INTEGRATION='twilio'")
+    print("   Replies are queued in outbound_queue.db (OUTBOUND_QUEUE_PATH) and sent by")
+    print("   OUTBOUND_WORKERS threads at up to OUTBOUND_RATE_PER_SECOND messages per second")
+    print()
+    
+    print("3. ☁️ For the Meta Cloud API, set:")
+    print("   export WHATSAPP_INTEGRATION='meta'")
+    print("   export META_ACCESS_TOKEN='your_access_token'")
+    print("   export META_PHONE_NUMBER_ID='your_phone_number_id'")
     print()
     
-    print("3. 🌐 For webhook integration:")
+    print("4. 🌐 For webhook integration:")
     print("   - Deploy this script to a server with HTTPS")
     print("   - Set webhook URL in your WhatsApp Business API")
     print("   - URL: https://yourdomain.com/webhook")
     print()
     
-    print("4. 🚀 Run the bot:")
+    print("5. 🚀 Run the bot:")
     print("   python whatsapp_integration.py")
     print()
     
-    print("5. 🧪 Test locally:")
+    print("6. 🧪 Test locally:")
     print("   python -c \"from whatsapp_integration import run_local_test; run_local_test()\"")
 
 if __name__ == "__main__":